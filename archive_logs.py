@@ -0,0 +1,45 @@
+"""
+Log Archiver
+Moves closed days of network logs out of the database into memory-mapped segment files
+Usage: python archive_logs.py [--keep-days N] [--vacuum]
+"""
+
+import argparse
+from main import create_app
+from config import Config
+from models import db
+from services.log_archive import LogArchive
+
+
+def archive_logs(keep_days, vacuum):
+    """Archive closed days and optionally reclaim the freed database space"""
+    app = create_app()
+    archive = LogArchive(app.config['LOG_ARCHIVE_DIR'])
+    
+    with app.app_context():
+        print(f"[*] Archiving logs older than {keep_days} day(s) to {archive.directory}...")
+        archived = archive.archive_closed_days(keep_days)
+        
+        if not archived:
+            print("[INFO] No closed days to archive")
+            return
+        
+        for day, count in archived.items():
+            print(f"[OK] {day}: {count} logs")
+        
+        if vacuum:
+            print("[*] Vacuuming database...")
+            db.session.execute(db.text('VACUUM'))
+            print("[OK] Database vacuumed")
+        
+        print(f"\n[SUCCESS] Archived {sum(archived.values())} logs from {len(archived)} day(s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archive closed days of network logs')
+    parser.add_argument('--keep-days', type=int, default=Config.LOG_ARCHIVE_KEEP_DAYS,
+                        help='Days (including today) to keep in the database')
+    parser.add_argument('--vacuum', action='store_true', help='Reclaim freed space afterwards')
+    args = parser.parse_args()
+    
+    archive_logs(args.keep_days, args.vacuum)
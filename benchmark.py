@@ -0,0 +1,684 @@
+"""
+Performance Benchmarks
+Measures storage and throughput of the core services against throwaway SQLite databases
+Usage: python benchmark.py <benchmark> [options]
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.request import urlopen
+from config import Config
+from main import create_app
+from models import db, NetworkLog
+from log_generator import LogGenerator
+
+
+def make_app(db_path, **settings):
+    """Create an app bound to a scratch database"""
+    settings['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    settings.setdefault('ALERT_ESCALATION_INTERVAL', 0)
+    return create_app(type('BenchmarkConfig', (Config,), settings))
+
+
+def seed_logs(app, corpus, batch=1000):
+    """Insert a corpus of generated logs in batches"""
+    from services.activity_rollup import record_logs
+    
+    with app.app_context():
+        for offset in range(0, len(corpus), batch):
+            db.session.add_all(
+                NetworkLog(
+                    timestamp=entry['timestamp'],
+                    source=entry['source'],
+                    level=entry['level'],
+                    message=entry['message'],
+                    meta_data=entry['metadata']
+                )
+                for entry in corpus[offset:offset + batch]
+            )
+            record_logs((entry['timestamp'], entry['level']) for entry in corpus[offset:offset + batch])
+            db.session.commit()
+
+
+def generate_corpus(count, hours=24):
+    """Generate a realistic mix of log entries spread over the last few hours"""
+    generator = LogGenerator()
+    base_time = datetime.utcnow() - timedelta(hours=hours)
+    corpus = []
+    
+    for _ in range(count):
+        log = generator.generate_log()
+        log['timestamp'] = base_time + timedelta(seconds=random.randint(0, hours * 3600))
+        log['metadata'] = '{"environment": "production", "region": "us-east-1"}'
+        corpus.append(log)
+    
+    return corpus
+
+
+def bench_compact(args):
+    """Compare plain and template-compressed message storage"""
+    from services.log_codec import LogMessageCodec
+    
+    corpus = generate_corpus(args.count)
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    results = {}
+    
+    try:
+        for label, enabled in (('plain', False), ('compact', True)):
+            db_path = os.path.join(workdir, f'{label}.db')
+            app = make_app(db_path)
+            
+            with app.app_context():
+                codec = LogMessageCodec(enabled=enabled)
+                
+                start = time.perf_counter()
+                for offset in range(0, len(corpus), args.batch):
+                    for entry in corpus[offset:offset + args.batch]:
+                        log = NetworkLog(
+                            timestamp=entry['timestamp'],
+                            source=entry['source'],
+                            level=entry['level'],
+                            meta_data=entry['metadata']
+                        )
+                        codec.store_message(log, entry['message'])
+                        db.session.add(log)
+                    db.session.commit()
+                ingest_time = time.perf_counter() - start
+                
+                db.session.remove()
+                start = time.perf_counter()
+                for log in NetworkLog.query.order_by(NetworkLog.timestamp.desc()).all():
+                    log.to_dict()
+                read_time = time.perf_counter() - start
+                
+                db.session.execute(db.text('VACUUM'))
+                db.session.remove()
+                db.engine.dispose()
+            
+            results[label] = {
+                'ingest': ingest_time,
+                'read': read_time,
+                'size': os.path.getsize(db_path)
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    print(f"Corpus: {args.count} logs, batch size {args.batch}\n")
+    print(f"{'storage':<10}{'db size':>14}{'ingest/s':>14}{'read/s':>14}")
+    for label, result in results.items():
+        print(f"{label:<10}{result['size'] / 1024:>11.0f} KB"
+              f"{args.count / result['ingest']:>14.0f}{args.count / result['read']:>14.0f}")
+    
+    plain, compact = results['plain'], results['compact']
+    print(f"\nSize reduction: {(1 - compact['size'] / plain['size']) * 100:.1f}%")
+    print(f"Ingest overhead: {(compact['ingest'] / plain['ingest'] - 1) * 100:+.1f}%")
+    print(f"Read overhead: {(compact['read'] / plain['read'] - 1) * 100:+.1f}%")
+
+
+RULE_WORDS = ['timeout', 'failed', 'breach', 'cpu', 'memory', 'disk', 'latency', 'packet', 'dns',
+              'database', 'service', 'crash', 'unauthorized', 'degraded', 'refused', 'reset']
+
+# Rules whose literals are spelled as escapes, with texts they match
+ESCAPE_PATTERNS = [r'link\x20down', r'\x41BC', r'port\u0020flap', r'bgp\N{SPACE}reset', r'\101\102\103 fail',
+                   r'fan\040failed', r'(link\x20down|link\x20flap)', r'\x6cink down\b']
+ESCAPE_TEXTS = ['link down on ge-0/0/1', 'abc123 reported', 'port flap on xe-1/0/2', 'bgp reset by peer',
+                'abc fail', 'fan failed in chassis 2', 'link flap detected', 'linkdown']
+
+
+def make_rules(count):
+    """Generate a mix of keyword-alternation and regex rules"""
+    from models import AlertRule
+    
+    severities = ['low', 'medium', 'high', 'critical']
+    rules = []
+    for i in range(count):
+        first, second = random.sample(RULE_WORDS, 2)
+        if i % 2:
+            pattern = rf"({first}-{i}|{second}-{i}|{first} {second} {i})"
+        else:
+            pattern = rf"{first}.*{second}-{i}\b"
+        rules.append(AlertRule(
+            name=f'rule-{i}',
+            pattern=pattern,
+            category='network',
+            severity=severities[i % 4],
+            priority_boost=0.05
+        ))
+    return rules
+
+
+def make_alert_texts(count, rule_count):
+    """Generate alert texts where roughly a third match some rule"""
+    texts = []
+    for _ in range(count):
+        first, second = random.sample(RULE_WORDS, 2)
+        if random.random() < 0.33:
+            texts.append(f"{first} on edge router, {second}-{random.randrange(rule_count)} observed".lower())
+        else:
+            texts.append(f"{first} {second} warning on host-{random.randint(1, 500)}".lower())
+    return texts
+
+
+def bench_rules(args):
+    """Compare per-alert rule matching against the compiled, cached rule set"""
+    import re
+    from models import AlertRule
+    from services.alert_classifier import AlertClassifier
+    from services.rule_engine import RuleSet
+    
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    
+    try:
+        print(f"{'rules':>8}{'uncached alerts/s':>20}{'compiled alerts/s':>20}{'speedup':>10}")
+        
+        for count in args.rules:
+            app = make_app(os.path.join(workdir, f'rules-{count}.db'))
+            texts = make_alert_texts(args.alerts, count)
+            
+            with app.app_context():
+                db.session.add_all(make_rules(count))
+                db.session.commit()
+                
+                # What classify_alert used to do for every alert
+                def uncached(text):
+                    matched = []
+                    for rule in AlertRule.query.filter_by(enabled=True).all():
+                        try:
+                            if re.search(rule.pattern, text, re.IGNORECASE):
+                                matched.append(rule)
+                        except re.error:
+                            if rule.pattern.lower() in text:
+                                matched.append(rule)
+                    return matched
+                
+                classifier = AlertClassifier()
+                classifier.get_rule_set()
+                
+                sample = texts[:max(10, args.alerts // max(1, count // 10))]
+                start = time.perf_counter()
+                for text in sample:
+                    uncached(text)
+                uncached_rate = len(sample) / (time.perf_counter() - start)
+                
+                start = time.perf_counter()
+                for text in texts:
+                    classifier.get_rule_set().match(text)
+                compiled_rate = len(texts) / (time.perf_counter() - start)
+                
+                db.session.remove()
+                db.engine.dispose()
+            
+            print(f"{count:>8}{uncached_rate:>20.0f}{compiled_rate:>20.0f}{compiled_rate / uncached_rate:>9.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    # The literal prefilter must never change whether a rule matches
+    patterns = ESCAPE_PATTERNS + [rule.pattern for rule in make_rules(20)]
+    texts = ESCAPE_TEXTS + make_alert_texts(500, 20)
+    mismatches = []
+    for i, pattern in enumerate(patterns, 1):
+        rule_set = RuleSet([AlertRule(id=i, name=f'check-{i}', pattern=pattern, severity='high')], {})
+        mismatches.extend(
+            (pattern, text) for text in texts
+            if (rule_set.match(text) is not None) != bool(re.search(pattern, text, re.IGNORECASE))
+        )
+    
+    ok = not mismatches
+    print(f"\n{'PASS' if ok else 'FAIL'}: prefiltered matches equal re.search for {len(patterns)} rules "
+          f"over {len(texts)} texts")
+    for pattern, text in mismatches[:10]:
+        print(f"  {pattern!r} on {text!r}")
+    if not ok:
+        sys.exit(1)
+
+
+def make_alerts(count):
+    """Generate alert payloads shaped like an NMS alert storm"""
+    titles = ['Interface {} down', 'High CPU on router-{}', 'Packet loss to site-{}',
+              'Unauthorized login on host-{}', 'Disk usage warning on db-{}', 'DNS timeout from resolver-{}']
+    return [
+        {
+            'title': random.choice(titles).format(random.randint(1, 200)),
+            'description': 'Reported by NMS poller',
+            'source': f'nms-{random.randint(1, 5)}',
+            'metadata': {'poller': 'primary'}
+        }
+        for _ in range(count)
+    ]
+
+
+def bench_alerts(args):
+    """Compare per-alert ingest requests against batch ingest"""
+    from models import Alert
+    
+    alerts = make_alerts(args.count)
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    
+    try:
+        app = make_app(os.path.join(workdir, 'alerts.db'))
+        client = app.test_client()
+        
+        print(f"Alerts: {args.count}\n")
+        print(f"{'path':<16}{'requests':>10}{'alerts/s':>12}")
+        
+        start = time.perf_counter()
+        for alert in alerts:
+            client.post('/api/alerts/ingest', json=alert)
+        elapsed = time.perf_counter() - start
+        print(f"{'per-alert':<16}{len(alerts):>10}{args.count / elapsed:>12.0f}")
+        
+        for batch in args.batch:
+            start = time.perf_counter()
+            for offset in range(0, len(alerts), batch):
+                client.post('/api/alerts/ingest/batch', json=alerts[offset:offset + batch])
+            elapsed = time.perf_counter() - start
+            requests = -(-len(alerts) // batch)
+            print(f"{f'batch of {batch}':<16}{requests:>10}{args.count / elapsed:>12.0f}")
+        
+        with app.app_context():
+            stored = Alert.query.count()
+            db.session.remove()
+            db.engine.dispose()
+        
+        print(f"\nStored {stored} alerts")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def seed_log_volume(app, count, minutes, batch=50000):
+    """Bulk insert `count` short logs, and one alert per 100, spread over the last few minutes"""
+    from sqlalchemy import insert
+    from models import Alert
+    from services.activity_rollup import record_alerts, record_logs
+    
+    levels = ['INFO'] * 80 + ['WARNING'] * 12 + ['ERROR'] * 6 + ['CRITICAL'] * 2
+    severities = ['low', 'medium', 'high', 'critical']
+    now = datetime.utcnow()
+    
+    with app.app_context():
+        for offset in range(0, count, batch):
+            rows = [
+                {
+                    'timestamp': now - timedelta(seconds=random.random() * minutes * 60),
+                    'source': f'router-{random.randint(1, 50)}',
+                    'level': random.choice(levels),
+                    'raw_message': 'Interface GigabitEthernet0/1 changed state'
+                }
+                for _ in range(min(batch, count - offset))
+            ]
+            db.session.execute(insert(NetworkLog), rows)
+            record_logs((row['timestamp'], row['level']) for row in rows)
+            alerts = [
+                {'timestamp': row['timestamp'], 'title': 'Interface state changed', 'severity': random.choice(severities),
+                 'category': 'network', 'status': 'resolved'}
+                for row in rows[::100]
+            ]
+            db.session.execute(insert(Alert), alerts)
+            record_alerts((alert['timestamp'], alert['severity']) for alert in alerts)
+            db.session.commit()
+        db.session.remove()
+
+
+def bench_chatops(args):
+    """Latency of the aggregate ChatOps commands as log volume grows"""
+    import statistics
+    
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    
+    try:
+        app = make_app(os.path.join(workdir, 'chatops.db'), CHAT_CACHE_TTL=0)
+        client = app.test_client()
+        
+        print(f"Logs spread over the last {args.minutes} minutes, {args.runs} runs per command, cache off\n")
+        print(f"{'logs':>10}  {'command':<10}{'p50 ms':>10}{'p99 ms':>10}")
+        
+        seeded = 0
+        for volume in sorted(args.logs):
+            seed_log_volume(app, volume - seeded, args.minutes)
+            seeded = volume
+            
+            for command in args.commands:
+                timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    client.post('/api/chat/message', json={'message': command})
+                    timings.append((time.perf_counter() - start) * 1000)
+                
+                p99 = statistics.quantiles(timings, n=100)[98] if len(timings) > 1 else timings[0]
+                print(f"{volume:>10}  {command:<10}{statistics.median(timings):>10.2f}{p99:>10.2f}")
+        
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+STAND_IN_PING = """#!/bin/sh
+# Stand-in for ping: prints a reply a second for DIAGNOSTIC_STAND_IN_SECONDS seconds
+for i in $(seq "$DIAGNOSTIC_STAND_IN_SECONDS"); do
+    sleep 1
+    echo "64 bytes from $3: icmp_seq=$i ttl=64 time=0.05 ms"
+done
+"""
+
+
+def bench_diagnostics(args):
+    """Check that diagnostics run in the bounded pool and never block chat, using a stand-in ping"""
+    from models import DiagnosticJob
+    
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    stand_in = os.path.join(workdir, 'ping')
+    with open(stand_in, 'w') as f:
+        f.write(STAND_IN_PING)
+    os.chmod(stand_in, 0o755)
+    
+    path = os.environ.get('PATH', '')
+    os.environ['PATH'] = f'{workdir}{os.pathsep}{path}'
+    os.environ['DIAGNOSTIC_STAND_IN_SECONDS'] = str(args.seconds)
+    
+    try:
+        app = make_app(os.path.join(workdir, 'diagnostics.db'), COMMAND_TIMEOUT=args.timeout,
+                       DIAGNOSTIC_WORKERS=args.workers, DIAGNOSTIC_MAX_PENDING=args.pending, CHAT_CACHE_TTL=0)
+        client = app.test_client()
+        
+        print(f"{args.jobs} pings of {args.seconds}s each, {args.workers} workers, "
+              f"{args.pending} pending at most, {args.timeout}s timeout\n")
+        
+        started = time.perf_counter()
+        submit_times = []
+        job_ids = []
+        refused = 0
+        for index in range(args.jobs):
+            start = time.perf_counter()
+            data = client.post('/api/chat/message', json={'message': f'ping 127.0.0.{index % 250 + 1}'}).get_json()
+            submit_times.append((time.perf_counter() - start) * 1000)
+            if data['job_id']:
+                job_ids.append(data['job_id'])
+            else:
+                refused += 1
+        
+        # The API keeps answering while the pool is busy
+        status_times = []
+        while True:
+            start = time.perf_counter()
+            client.post('/api/chat/message', json={'message': 'status'})
+            status_times.append((time.perf_counter() - start) * 1000)
+            
+            jobs = [client.get(f'/api/chat/jobs/{job_id}').get_json() for job_id in job_ids]
+            if all(job['status'] not in ('queued', 'running') for job in jobs):
+                break
+            time.sleep(0.2)
+        elapsed = time.perf_counter() - started
+        
+        with app.app_context():
+            rows = DiagnosticJob.query.filter(DiagnosticJob.id.in_(job_ids)).all()
+            events = sorted([(job.started_at, 1) for job in rows] + [(job.finished_at, -1) for job in rows])
+            running = peak = 0
+            for _, change in events:
+                running += change
+                peak = max(peak, running)
+            statuses = Counter(job.status for job in rows)
+            db.session.remove()
+            db.engine.dispose()
+        
+        print(f"Chat reply when submitting: max {max(submit_times):.1f} ms")
+        print(f"Status command while busy:  max {max(status_times):.1f} ms over {len(status_times)} calls")
+        print(f"Accepted {len(job_ids)}, refused {refused}; peak concurrency {peak} (limit {args.workers})")
+        print(f"Finished: {dict(statuses)} in {elapsed:.1f}s")
+        
+        expected = 'timed_out' if args.seconds > args.timeout else 'succeeded'
+        ok = peak <= args.workers and statuses == Counter({expected: len(job_ids)})
+        print(f"\n{'PASS' if ok else 'FAIL'}: every job {expected}, never more than {args.workers} at once")
+        if not ok:
+            sys.exit(1)
+    finally:
+        os.environ['PATH'] = path
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_sweep(args):
+    """Sweep a /24 of loopback addresses, some listening and some silent, through the sweep API"""
+    import socket
+    from models import NetworkMetric
+    
+    network = ipaddress.ip_network(args.network)
+    hosts = [str(address) for address in network.hosts()]
+    
+    # Listening sockets complete the handshake from their backlog, so nothing needs to accept
+    listeners = []
+    port = None
+    for host in hosts[::args.every]:
+        listener = socket.socket()
+        listener.bind((host, port or 0))
+        listener.listen(16)
+        port = listener.getsockname()[1]
+        listeners.append(listener)
+    
+    # Stand-ins for dead hosts: a full accept queue drops further SYNs, so probes time out
+    silent = [host for index, host in enumerate(hosts) if index % args.every][:args.down]
+    for host in silent:
+        listener = socket.socket()
+        listener.bind((host, port))
+        listener.listen(0)
+        filler = socket.create_connection((host, port))
+        listeners.extend((listener, filler))
+    
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    try:
+        app = make_app(os.path.join(workdir, 'sweep.db'), SWEEP_CONCURRENCY=args.concurrency)
+        client = app.test_client()
+        
+        print(f"Sweep of {args.network}: {len(hosts)} hosts, {len(hosts[::args.every])} listening on port {port}, "
+              f"{len(silent)} silent; concurrency {args.concurrency}, {app.config['SWEEP_TIMEOUT']}s timeout\n")
+        print(f"{'run':<6}{'seconds':>10}{'open':>8}{'closed':>8}{'down':>8}")
+        
+        for run in range(1, args.runs + 1):
+            data = client.post('/api/chat/sweep', json={'targets': args.network, 'ports': [port]}).get_json()
+            states = Counter(result['state'] for result in data['results'])
+            print(f"{run:<6}{data['seconds']:>10.3f}{states['open']:>8}{states['closed']:>8}{states['down']:>8}")
+        
+        with app.app_context():
+            stored = NetworkMetric.query.count()
+            db.session.remove()
+            db.engine.dispose()
+        print(f"\nStored {stored} metric rows")
+    finally:
+        for listener in listeners:
+            listener.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_ingest(args):
+    """Metric ingest throughput through the API, as columnar JSON and as line protocol"""
+    import json
+    from models import NetworkMetric
+    
+    names = [('cpu_usage', '%'), ('memory_usage', '%'), ('network_throughput', 'Mbps'), ('response_time', 'ms')]
+    start = time.time() - args.samples
+    
+    def columnar(offset):
+        # One batch per metric name and source, each holding consecutive samples
+        per_series = args.batch // (len(names) * 2)
+        return [
+            {'name': name, 'unit': unit, 'source': f'router-{source}',
+             'timestamps': [start + offset + i for i in range(per_series)],
+             'values': [round(random.uniform(0, 100), 2) for _ in range(per_series)]}
+            for name, unit in names for source in (1, 2)
+        ]
+    
+    def line_protocol(offset):
+        return '\n'.join(
+            f'{name},source=router-{i % 2 + 1},unit={unit} value={random.uniform(0, 100):.2f} {int(start + offset + i)}'
+            for i in range(args.batch // len(names)) for name, unit in names
+        )
+    
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    try:
+        app = make_app(os.path.join(workdir, 'ingest.db'))
+        client = app.test_client()
+        
+        print(f"Samples: {args.samples} per format, batches of {args.batch}\n")
+        print(f"{'format':<16}{'requests':>10}{'samples':>10}{'samples/s':>12}")
+        
+        for label, make_body, content_type, query in (
+            ('columnar JSON', lambda offset: json.dumps(columnar(offset)), 'application/json', ''),
+            ('line protocol', line_protocol, 'text/plain', '?precision=s')
+        ):
+            bodies = [make_body(offset) for offset in range(0, args.samples, args.batch)]
+            stored = 0
+            started = time.perf_counter()
+            for body in bodies:
+                stored += client.post(f'/api/metrics/ingest{query}', data=body,
+                                      content_type=content_type).get_json()['count']
+            elapsed = time.perf_counter() - started
+            print(f"{label:<16}{len(bodies):>10}{stored:>10}{stored / elapsed:>12.0f}")
+        
+        with app.app_context():
+            total = NetworkMetric.query.count()
+            db.session.remove()
+            db.engine.dispose()
+        print(f"\nStored {total} metric rows")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _wait_for_server(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {url} did not start')
+
+
+def _load(url, duration, clients):
+    """Hit a URL from several client threads, returning requests completed"""
+    deadline = time.monotonic() + duration
+    counts = [0] * clients
+    
+    def client(index):
+        while time.monotonic() < deadline:
+            urlopen(url, timeout=30).read()
+            counts[index] += 1
+    
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    return sum(counts)
+
+
+def bench_workers(args):
+    """Measure API throughput of the WSGI app as the worker count grows"""
+    workdir = tempfile.mkdtemp(prefix='inms-bench-')
+    db_path = os.path.join(workdir, 'load.db')
+    
+    try:
+        seed_logs(make_app(db_path), generate_corpus(args.logs))
+        
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}')
+        url = f'http://127.0.0.1:{args.port}{args.path}'
+        
+        print(f"Endpoint: {args.path} ({args.clients} client threads, {args.duration}s per run, {os.cpu_count()} CPUs)\n")
+        print(f"{'workers':<10}{'requests':>10}{'req/s':>10}")
+        
+        for workers in args.workers:
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{args.port}',
+                 '--log-level', 'warning', 'wsgi:app'],
+                env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                stdout=subprocess.DEVNULL
+            )
+            try:
+                _wait_for_server(url)
+                completed = _load(url, args.duration, args.clients)
+            finally:
+                server.terminate()
+                server.wait()
+            
+            print(f"{workers:<10}{completed:>10}{completed / args.duration:>10.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'compact': bench_compact,
+    'workers': bench_workers,
+    'rules': bench_rules,
+    'alerts': bench_alerts,
+    'chatops': bench_chatops,
+    'diagnostics': bench_diagnostics,
+    'sweep': bench_sweep,
+    'ingest': bench_ingest,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Network management performance benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    compact = subparsers.add_parser('compact', help='Template-compressed log message storage')
+    compact.add_argument('--count', type=int, default=50000)
+    compact.add_argument('--batch', type=int, default=500)
+    
+    workers = subparsers.add_parser('workers', help='Throughput scaling with gunicorn worker count')
+    workers.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    workers.add_argument('--clients', type=int, default=16)
+    workers.add_argument('--duration', type=int, default=10)
+    workers.add_argument('--logs', type=int, default=20000)
+    workers.add_argument('--path', default='/api/logs/raw?limit=200')
+    workers.add_argument('--port', type=int, default=5099)
+    
+    rules = subparsers.add_parser('rules', help='Alert rule matching throughput by rule count')
+    rules.add_argument('--rules', type=int, nargs='+', default=[10, 1000, 10000])
+    rules.add_argument('--alerts', type=int, default=2000)
+    
+    alerts = subparsers.add_parser('alerts', help='Per-alert versus batch alert ingest')
+    alerts.add_argument('--count', type=int, default=5000)
+    alerts.add_argument('--batch', type=int, nargs='+', default=[100, 1000])
+    
+    chatops = subparsers.add_parser('chatops', help='Aggregate ChatOps command latency by log volume')
+    chatops.add_argument('--logs', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    chatops.add_argument('--commands', nargs='+', default=['status', 'health', 'report', 'recent'])
+    chatops.add_argument('--minutes', type=int, default=30)
+    chatops.add_argument('--runs', type=int, default=50)
+    
+    diagnostics = subparsers.add_parser('diagnostics', help='Diagnostics pool concurrency with a stand-in ping')
+    diagnostics.add_argument('--jobs', type=int, default=20)
+    diagnostics.add_argument('--seconds', type=int, default=2)
+    diagnostics.add_argument('--workers', type=int, default=4)
+    diagnostics.add_argument('--pending', type=int, default=16)
+    diagnostics.add_argument('--timeout', type=int, default=30)
+    
+    sweep = subparsers.add_parser('sweep', help='Reachability sweep of a loopback /24 with stand-in listeners')
+    sweep.add_argument('--network', default='127.77.0.0/24')
+    sweep.add_argument('--every', type=int, default=2, help='Listen on every Nth host')
+    sweep.add_argument('--down', type=int, default=32, help='Hosts that never answer')
+    sweep.add_argument('--concurrency', type=int, default=256)
+    sweep.add_argument('--runs', type=int, default=3)
+    
+    ingest = subparsers.add_parser('ingest', help='Metric ingest throughput by payload format')
+    ingest.add_argument('--samples', type=int, default=1000000)
+    ingest.add_argument('--batch', type=int, default=10000)
+    
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
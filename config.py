@@ -15,15 +15,38 @@ class Config:
     LOG_SUMMARY_TIME_WINDOW = timedelta(hours=1)
     LOG_ANOMALY_THRESHOLD = 2.5  # Standard deviations for anomaly detection
     MAX_SUMMARY_EVENTS = 10
+    LOG_COMPACT_STORAGE = os.environ.get('LOG_COMPACT_STORAGE') == '1'  # Store messages as template + params
+    LOG_ARCHIVE_DIR = os.environ.get('LOG_ARCHIVE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+    LOG_ARCHIVE_KEEP_DAYS = 1  # Days (including today) kept in the database
     
     # Alert Classification Settings
     ALERT_SEVERITY_LEVELS = ['low', 'medium', 'high', 'critical']
     ALERT_CATEGORIES = ['network', 'security', 'performance', 'system', 'application']
     AUTO_ACK_THRESHOLD = 0.3  # Below this priority score, auto-acknowledge
+    ALERT_ESCALATION_INTERVAL = 300  # Seconds between passes re-scoring open alerts by age; 0 disables them
+    ALERT_ESCALATION_STEP = 3600  # Seconds of age per escalation or decay step
+    ALERT_PRIORITY_AGE_RATES = {'critical': 0.0, 'high': 0.02, 'medium': 0.0, 'low': -0.02}  # Score change per step
+    RULE_CACHE_CHECK_INTERVAL = 1.0  # Seconds between checks for rule changes made by other workers
+    ALERT_RULE_TIME_BUDGET = 0.05  # Seconds one rule's regex search may take before the rule is disabled
+    MAX_ALERT_BATCH = 10000  # Alerts accepted per batch ingest request
+    MAX_METRIC_BATCH = 200000  # Samples accepted per metric ingest request
+    OPEN_ALERT_RECONCILE_INTERVAL = 30.0  # Seconds between reloads of the in-memory open alert index
+    ALERT_DEDUP_WINDOW = 600  # Seconds a repeat is folded into the unresolved alert it duplicates; 0 disables
+    LOG_ALERT_LEVEL = 'CRITICAL'  # Ingested logs at or above this level raise alerts
+    LOG_ALERT_RULE_LEVEL = 'ERROR'  # Ingested logs at or above this level raise alerts when an alert rule matches
+    LOG_ALERT_MAX_PER_BATCH = 100  # Alerts one log ingest batch may raise; the rest are counted as suppressed
     
     # ChatOps Settings
-    CHAT_HISTORY_LIMIT = 100
-    COMMAND_TIMEOUT = 30  # seconds
+    CHAT_HISTORY_LIMIT = 100  # Chat messages kept; older ones are deleted
+    CHAT_HISTORY_FLUSH_INTERVAL = 0.5  # Seconds between background writes of the chat transcript
+    COMMAND_TIMEOUT = 30  # seconds; diagnostic commands are killed after this long
+    DIAGNOSTIC_WORKERS = 4  # Diagnostic commands run at once per process
+    DIAGNOSTIC_MAX_PENDING = 16  # Queued plus running diagnostics per process; more are refused
+    SWEEP_CONCURRENCY = 256  # Connections and pings one sweep keeps in flight
+    SWEEP_TIMEOUT = 1.0  # Seconds each sweep probe may take
+    SWEEP_PORTS = [22, 80, 443]  # TCP ports probed when a sweep names none
+    SWEEP_MAX_HOSTS = 256  # Hosts one sweep may cover (a /24)
+    CHAT_CACHE_TTL = 10  # Seconds a read-only command's reply is reused; 0 disables the cache
     
     # Application Settings
     DEBUG = True
@@ -1,12 +1,19 @@
 from datetime import datetime, timedelta
 import random
-from main import app
-from models import db, NetworkLog, Alert, AlertRule, NetworkMetric
+from main import create_app
+from config import Config
+from models import db, NetworkLog, ActivityRollup, Alert, AlertRule, NetworkMetric
+from services.activity_rollup import rebuild, record_alerts, record_logs
+from services.alert_dedup import fingerprint
+from services.lifecycle_stats import record_created, record_transitions
+from services.log_codec import LogMessageCodec
+from services.similarity import title_signature
 import json
 
 
 def init_database():
     """Initialize database with tables and sample data"""
+    app = create_app()
     
     with app.app_context():
         # Create all tables
@@ -17,6 +24,8 @@ def init_database():
         # Check if data already exists
         if NetworkLog.query.first():
             print("[INFO] Database already contains data. Skipping sample data generation.")
+            if not ActivityRollup.query.first():
+                print(f"[OK] Rolled up {rebuild()} existing logs and alerts by minute")
             return
         
         # Generate sample data
@@ -107,6 +116,8 @@ def init_database():
         
         base_time = datetime.utcnow() - timedelta(hours=6)
         log_count = 0
+        rollup = []  # (timestamp, level) of every generated log
+        log_codec = LogMessageCodec(enabled=Config.LOG_COMPACT_STORAGE)
         
         for hour in range(6):
             hour_time = base_time + timedelta(hours=hour)
@@ -152,15 +163,17 @@ def init_database():
                     timestamp=timestamp,
                     source=source,
                     level=level,
-                    message=message,
                     meta_data=json.dumps({
                         'environment': 'production',
                         'region': 'us-east-1'
                     })
                 )
+                log_codec.store_message(log, message)
                 db.session.add(log)
+                rollup.append((timestamp, level))
                 log_count += 1
         
+        record_logs(rollup)
         db.session.commit()
         print(f"[OK] Generated {log_count} network logs\n")
         
@@ -246,6 +259,8 @@ def init_database():
                 weights=[0.4, 0.3, 0.3]
             )[0]
             
+            source = random.choice(sources)
+            
             alert = Alert(
                 timestamp=timestamp,
                 title=template['title'],
@@ -254,13 +269,25 @@ def init_database():
                 category=template['category'],
                 status=status,
                 priority_score=priority_score,
-                source=random.choice(sources),
+                base_priority=priority_score,
+                source=source,
                 meta_data=json.dumps({'auto_generated': True}),
                 acknowledged_at=timestamp + timedelta(minutes=random.randint(5, 30)) if status in ['acknowledged', 'resolved'] else None,
-                resolved_at=timestamp + timedelta(hours=random.randint(1, 3)) if status == 'resolved' else None
+                resolved_at=timestamp + timedelta(hours=random.randint(1, 3)) if status == 'resolved' else None,
+                fingerprint=fingerprint(template['title'], source, template['category']),
+                last_seen=timestamp,
+                minhash=title_signature(template['title'])
             )
             db.session.add(alert)
             alert_count += 1
+            
+            key = [(timestamp, alert.category, alert.severity)]
+            record_created(key)
+            record_alerts([(timestamp, alert.severity)])
+            if alert.acknowledged_at:
+                record_transitions('acknowledged', key, alert.acknowledged_at)
+            if alert.resolved_at:
+                record_transitions('resolved', key, alert.resolved_at)
         
         db.session.commit()
         print(f"[OK] Generated {alert_count} alerts\n")
@@ -1,41 +1,74 @@
-from flask import Flask, render_template
+from flask import Flask, Response, render_template
 from flask_cors import CORS
+from sqlalchemy import event
 from models import db
 from config import Config
 from routes.logs import logs_bp
 from routes.alerts import alerts_bp
 from routes.chat import chat_bp
+from routes.metrics import metrics_bp
+from services import instrumentation
+from services.open_alerts import open_alerts
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config.from_object(Config)
 
-# Initialize extensions
-CORS(app)
-db.init_app(app)
+def create_app(config_class=Config):
+    """Create and configure an application instance"""
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    
+    # Initialize extensions
+    CORS(app)
+    db.init_app(app)
+    instrumentation.init_app(app)
+    
+    # Register blueprints
+    app.register_blueprint(logs_bp)
+    app.register_blueprint(alerts_bp)
+    app.register_blueprint(chat_bp)
+    app.register_blueprint(metrics_bp)
+    
+    # Routes
+    @app.route('/')
+    def index():
+        """Main dashboard"""
+        return render_template('index.html')
+    
+    @app.route('/api/health')
+    def health():
+        """Health check endpoint"""
+        return {'status': 'healthy', 'service': 'Intelligent Network Management System'}
+    
+    @app.route('/api/metrics')
+    def metrics():
+        """Prometheus metrics for this worker process"""
+        return Response(instrumentation.registry.render(), mimetype='text/plain; version=0.0.4')
+    
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _configure_sqlite)
+        
+        # Create database tables
+        db.create_all()
+        print("[OK] Database tables created successfully")
+        
+        open_alerts.reload()
+        
+        # Pre-fork servers copy the parent's pool; make each worker open its own connections
+        db.engine.dispose()
+    
+    return app
 
-# Register blueprints
-app.register_blueprint(logs_bp)
-app.register_blueprint(alerts_bp)
-app.register_blueprint(chat_bp)
 
-# Routes
-@app.route('/')
-def index():
-    """Main dashboard"""
-    return render_template('index.html')
+def _configure_sqlite(dbapi_connection, connection_record):
+    """Let several worker processes share one SQLite file"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA busy_timeout=30000')
+    cursor.close()
 
-@app.route('/api/health')
-def health():
-    """Health check endpoint"""
-    return {'status': 'healthy', 'service': 'Intelligent Network Management System'}
-
-# Create database tables
-with app.app_context():
-    db.create_all()
-    print("[OK] Database tables created successfully")
 
 if __name__ == '__main__':
+    app = create_app()
     print("Starting Intelligent Network Management System...")
     print("Dashboard: http://localhost:5000")
     print("API Docs: See implementation_plan.md for endpoints")
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime
 import json
 
@@ -12,9 +13,29 @@ class NetworkLog(db.Model):
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     source = db.Column(db.String(100), nullable=False, index=True)
     level = db.Column(db.String(20), nullable=False, index=True)  # INFO, WARNING, ERROR, CRITICAL
-    message = db.Column(db.Text, nullable=False)
+    raw_message = db.Column('message', db.Text)  # NULL when stored in compact (template) form
+    template_id = db.Column(db.Integer, db.ForeignKey('log_templates.id'))
+    message_params = db.Column(db.Text)  # Template parameters joined by PARAM_SEPARATOR
     meta_data = db.Column(db.Text)  # JSON string for additional data
     
+    @hybrid_property
+    def message(self):
+        """Full message text, rebuilt from the template when stored compactly"""
+        if self.template_id is None:
+            return self.raw_message
+        return LogTemplate.fill(LogTemplate.get_pattern(self.template_id), self.message_params)
+    
+    @message.setter
+    def message(self, value):
+        self.raw_message = value
+        self.template_id = None
+        self.message_params = None
+    
+    @message.expression
+    def message(cls):
+        # SQL comparisons only see messages stored in plain form
+        return cls.raw_message
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -26,6 +47,71 @@ class NetworkLog(db.Model):
         }
 
 
+class ActivityRollup(db.Model):
+    """Stores log counts by level and alert counts by severity per minute, kept current by ingest"""
+    __tablename__ = 'activity_rollups'
+    
+    minute = db.Column(db.DateTime, primary_key=True)  # Start of the minute
+    kind = db.Column(db.String(10), primary_key=True)  # log, alert
+    name = db.Column(db.String(20), primary_key=True)  # Log level or alert severity
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class LogTemplate(db.Model):
+    """Stores message templates shared by compactly stored logs"""
+    __tablename__ = 'log_templates'
+    
+    PLACEHOLDER = '<*>'
+    PARAM_SEPARATOR = '\x1f'
+    
+    # Templates never change once written, so patterns are cached by id for the process
+    _patterns = {}
+    
+    id = db.Column(db.Integer, primary_key=True)
+    pattern = db.Column(db.Text, nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def render(self, params):
+        """Rebuild a message by filling the placeholders with packed params"""
+        return self.fill(self.pattern, params)
+    
+    @classmethod
+    def get_pattern(cls, template_id):
+        """Get a template pattern by id, loading it once per process"""
+        pattern = cls._patterns.get(template_id)
+        if pattern is None:
+            pattern = db.session.get(cls, template_id).pattern
+            cls._patterns[template_id] = pattern
+        return pattern
+    
+    @classmethod
+    def forget(cls, template_id):
+        """Drop a cached pattern whose row was rolled back"""
+        cls._patterns.pop(template_id, None)
+    
+    @classmethod
+    def fill(cls, pattern, params):
+        """Fill a template pattern with params joined by PARAM_SEPARATOR"""
+        if not params:
+            return pattern
+        
+        parts = pattern.split(cls.PLACEHOLDER)
+        values = params.split(cls.PARAM_SEPARATOR)
+        
+        message = [parts[0]]
+        for value, part in zip(values, parts[1:]):
+            message.append(value)
+            message.append(part)
+        return ''.join(message)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'pattern': self.pattern,
+            'created_at': self.created_at.isoformat()
+        }
+
+
 class LogSummary(db.Model):
     """Stores generated log summaries"""
     __tablename__ = 'log_summaries'
@@ -59,6 +145,12 @@ class LogSummary(db.Model):
 class Alert(db.Model):
     """Stores network alerts"""
     __tablename__ = 'alerts'
+    __table_args__ = (
+        # Listing order (priority_score, timestamp, id) descending, scanned backwards
+        db.Index('ix_alerts_priority_order', 'priority_score', 'timestamp', 'id'),
+        # Also serves plain status lookups, so status needs no index of its own
+        db.Index('ix_alerts_status_priority_order', 'status', 'priority_score', 'timestamp', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -66,12 +158,17 @@ class Alert(db.Model):
     description = db.Column(db.Text)
     severity = db.Column(db.String(20), nullable=False, index=True)  # low, medium, high, critical
     category = db.Column(db.String(50), nullable=False, index=True)
-    status = db.Column(db.String(20), default='open', index=True)  # open, acknowledged, resolved
+    status = db.Column(db.String(20), default='open')  # open, acknowledged, resolved
     priority_score = db.Column(db.Float, default=0.5)
+    base_priority = db.Column(db.Float)  # Score at classification; priority_score adds age escalation or decay
     source = db.Column(db.String(100))
     meta_data = db.Column(db.Text)  # JSON string
     acknowledged_at = db.Column(db.DateTime)
     resolved_at = db.Column(db.DateTime)
+    fingerprint = db.Column(db.String(40), index=True)  # Hash of normalized title, source and category
+    occurrence_count = db.Column(db.Integer, default=1, nullable=False)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    minhash = db.Column(db.LargeBinary)  # Packed MinHash signature of the title
     
     def to_dict(self):
         return {
@@ -83,10 +180,14 @@ class Alert(db.Model):
             'category': self.category,
             'status': self.status,
             'priority_score': self.priority_score,
+            'base_priority': self.base_priority,
             'source': self.source,
             'metadata': json.loads(self.meta_data) if self.meta_data else {},
             'acknowledged_at': self.acknowledged_at.isoformat() if self.acknowledged_at else None,
-            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'fingerprint': self.fingerprint,
+            'occurrence_count': self.occurrence_count,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None
         }
 
 
@@ -101,6 +202,7 @@ class AlertRule(db.Model):
     severity = db.Column(db.String(20), nullable=False)
     priority_boost = db.Column(db.Float, default=0.0)  # Adjustment to priority score
     enabled = db.Column(db.Boolean, default=True)
+    disabled_reason = db.Column(db.String(200))  # Set when a rule is disabled automatically
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
@@ -112,10 +214,90 @@ class AlertRule(db.Model):
             'severity': self.severity,
             'priority_boost': self.priority_boost,
             'enabled': self.enabled,
+            'disabled_reason': self.disabled_reason,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+class AlertLifecycleStat(db.Model):
+    """Stores additive daily alert lifecycle aggregates, one row per duration sketch bucket"""
+    __tablename__ = 'alert_lifecycle_stats'
+    
+    day = db.Column(db.Date, primary_key=True)  # Day the alerts were raised
+    category = db.Column(db.String(50), primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    metric = db.Column(db.String(20), primary_key=True)  # created, acknowledged, resolved
+    bucket = db.Column(db.Integer, primary_key=True)  # Duration sketch bucket; 0 for created
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds = db.Column(db.Float, nullable=False, default=0.0)  # Summed time to reach the metric's status
+
+
+class CommandLatencyStat(db.Model):
+    """Stores ChatOps command calls per minute, one row per latency sketch bucket"""
+    __tablename__ = 'command_latency_stats'
+    
+    minute = db.Column(db.DateTime, primary_key=True)  # Start of the minute the commands ran
+    command = db.Column(db.String(50), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)  # Latency sketch bucket, see services/command_stats.py
+    count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    total_ms = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class AlertThreshold(db.Model):
+    """Stores log rate rules: `count` logs of a level from one source within a window raise an alert"""
+    __tablename__ = 'alert_thresholds'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    level = db.Column(db.String(20), nullable=False)  # Log level counted, e.g. ERROR
+    source = db.Column(db.String(100))  # NULL counts every source separately
+    count = db.Column(db.Integer, nullable=False)
+    window_seconds = db.Column(db.Integer, nullable=False, default=300)
+    enabled = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'level': self.level,
+            'source': self.source,
+            'count': self.count,
+            'window_seconds': self.window_seconds,
+            'enabled': self.enabled,
             'created_at': self.created_at.isoformat()
         }
 
 
+class DiagnosticJob(db.Model):
+    """Stores a diagnostic command run in the background for ChatOps"""
+    __tablename__ = 'diagnostic_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    command = db.Column(db.String(20), nullable=False)  # ping, traceroute
+    target = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, timed_out
+    output = db.Column(db.Text, default='')  # Grows while the command runs
+    exit_code = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'command': self.command,
+            'target': self.target,
+            'status': self.status,
+            'output': self.output,
+            'exit_code': self.exit_code,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
 class ChatMessage(db.Model):
     """Stores chat interactions"""
     __tablename__ = 'chat_messages'
@@ -126,6 +308,8 @@ class ChatMessage(db.Model):
     bot_response = db.Column(db.Text)
     command_type = db.Column(db.String(50))  # status, logs, alerts, diagnostic, etc.
     execution_time = db.Column(db.Float)  # seconds
+    cache_hit = db.Column(db.Boolean)  # Served from the response cache; null for uncached commands
+    job_id = db.Column(db.Integer)  # Diagnostic job the command started (jobs are pruned, so no foreign key)
     success = db.Column(db.Boolean, default=True)
     
     def to_dict(self):
@@ -136,6 +320,8 @@ class ChatMessage(db.Model):
             'bot_response': self.bot_response,
             'command_type': self.command_type,
             'execution_time': self.execution_time,
+            'cache_hit': self.cache_hit,
+            'job_id': self.job_id,
             'success': self.success
         }
 
@@ -143,10 +329,14 @@ class ChatMessage(db.Model):
 class NetworkMetric(db.Model):
     """Stores network performance metrics"""
     __tablename__ = 'network_metrics'
+    __table_args__ = (
+        # Series reads: one metric over a time range
+        db.Index('ix_network_metrics_name_time', 'metric_name', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
-    metric_name = db.Column(db.String(100), nullable=False, index=True)
+    metric_name = db.Column(db.String(100), nullable=False)  # Indexed by ix_network_metrics_name_time
     metric_value = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(20))
     source = db.Column(db.String(100))
@@ -160,3 +350,28 @@ class NetworkMetric(db.Model):
             'unit': self.unit,
             'source': self.source
         }
+
+
+class WorkerLease(db.Model):
+    """Time-limited claims that let one worker process run a periodic job"""
+    __tablename__ = 'worker_leases'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class CacheVersion(db.Model):
+    """Version counters that tell worker processes when to reload in-memory caches"""
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,15 +1,52 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from models import Alert, AlertRule, db
 from services.alert_classifier import AlertClassifier
+from services.escalation import EscalationScheduler
+from services.instrumentation import record_ingest
+from services.lifecycle_stats import get_analytics
+from services.log_alerts import LogAlertStage
+from services.open_alerts import open_alerts
+from datetime import date, datetime, timedelta
+import json
+import time
 
 alerts_bp = Blueprint('alerts', __name__)
 classifier = AlertClassifier()
+log_alert_stage = LogAlertStage(classifier)
+escalation = EscalationScheduler()
+
+VALID_STATUSES = ['open', 'acknowledged', 'resolved']
+FILTER_FIELDS = ['severity', 'category', 'status', 'source', 'fingerprint', 'min_priority', 'start_time', 'end_time']
+
+
+@alerts_bp.record
+def configure_services(state):
+    """Apply the registering app's configuration to the alert services"""
+    classifier.auto_ack_threshold = state.app.config['AUTO_ACK_THRESHOLD']
+    classifier.set_rule_check_interval(state.app.config['RULE_CACHE_CHECK_INTERVAL'])
+    classifier.rule_time_budget = state.app.config['ALERT_RULE_TIME_BUDGET']
+    classifier.deduplicator.window = state.app.config['ALERT_DEDUP_WINDOW']
+    open_alerts.reconcile_interval = state.app.config['OPEN_ALERT_RECONCILE_INTERVAL']
+    log_alert_stage.alert_level = state.app.config['LOG_ALERT_LEVEL']
+    log_alert_stage.rule_level = state.app.config['LOG_ALERT_RULE_LEVEL']
+    log_alert_stage.max_alerts = state.app.config['LOG_ALERT_MAX_PER_BATCH']
+    escalation.interval = state.app.config['ALERT_ESCALATION_INTERVAL']
+    escalation.step = state.app.config['ALERT_ESCALATION_STEP']
+    escalation.rates = dict(state.app.config['ALERT_PRIORITY_AGE_RATES'])
+    escalation.auto_ack_threshold = state.app.config['AUTO_ACK_THRESHOLD']
+
+
+@alerts_bp.before_app_request
+def start_escalation():
+    """Start the escalation scheduler in the process serving requests, not at app creation"""
+    escalation.start(current_app._get_current_object())
 
 
 @alerts_bp.route('/api/alerts/ingest', methods=['POST'])
 def ingest_alert():
     """Receive and classify a new alert"""
     try:
+        started = time.perf_counter()
         data = request.get_json()
         
         if not data or 'title' not in data:
@@ -17,6 +54,13 @@ def ingest_alert():
         
         # Classify and store the alert
         alert = classifier.classify_alert(data)
+        record_ingest('alerts', 1, started)
+        
+        if alert.occurrence_count > 1:
+            return jsonify({
+                'message': 'Duplicate of an open alert; occurrence recorded',
+                'alert': alert.to_dict()
+            }), 200
         
         return jsonify({
             'message': 'Alert classified and stored',
@@ -28,6 +72,60 @@ def ingest_alert():
         return jsonify({'error': str(e)}), 500
 
 
+@alerts_bp.route('/api/alerts/ingest/batch', methods=['POST'])
+def ingest_alert_batch():
+    """Classify and store a JSON array or NDJSON stream of alerts in one transaction"""
+    try:
+        started = time.perf_counter()
+        items = _parse_batch()
+        
+        if not items:
+            return jsonify({'error': 'No alerts provided'}), 400
+        max_batch_size = current_app.config['MAX_ALERT_BATCH']
+        if len(items) > max_batch_size:
+            return jsonify({'error': f'Batch too large (max {max_batch_size} alerts)'}), 413
+        
+        results = classifier.classify_batch(items)
+        stored = sum(1 for result in results if 'id' in result)
+        duplicates = sum(1 for result in results if result.get('duplicate'))
+        record_ingest('alerts', stored, started)
+        
+        return jsonify({
+            'message': f'Classified and stored {stored} of {len(items)} alerts',
+            'count': stored,
+            'duplicates': duplicates,
+            'failed': len(items) - stored,
+            'results': results
+        }), 201 if stored else 400
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _parse_batch():
+    """Read a batch from a JSON array/object or from newline-delimited JSON"""
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if data is None:
+            raise ValueError('Invalid JSON body')
+        return data if isinstance(data, list) else [data]
+    
+    # NDJSON: a malformed line fails only its own item
+    items = []
+    for line in request.get_data(as_text=True).splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(line)
+    return items
+
+
 @alerts_bp.route('/api/alerts', methods=['GET'])
 def get_alerts():
     """List alerts with optional filtering"""
@@ -47,17 +145,22 @@ def get_alerts():
         if request.args.get('min_priority'):
             filters['min_priority'] = float(request.args.get('min_priority'))
         
-        # Get alerts
-        alerts = classifier.get_alerts(filters if filters else None)
+        limit = min(500, max(1, request.args.get('limit', 50, type=int)))
         
-        limit = request.args.get('limit', 50, type=int)
-        alerts = alerts[:limit]
+        # Get one page of alerts
+        alerts, next_cursor = classifier.get_alerts(
+            filters if filters else None, limit=limit, cursor=request.args.get('cursor')
+        )
         
         return jsonify({
             'count': len(alerts),
-            'alerts': [alert.to_dict() for alert in alerts]
+            'alerts': [alert.to_dict() for alert in alerts],
+            'next_cursor': next_cursor
         }), 200
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -72,10 +175,9 @@ def update_alert_status(alert_id):
             return jsonify({'error': 'Status is required'}), 400
         
         new_status = data['status']
-        valid_statuses = ['open', 'acknowledged', 'resolved']
         
-        if new_status not in valid_statuses:
-            return jsonify({'error': f'Invalid status. Must be one of: {valid_statuses}'}), 400
+        if new_status not in VALID_STATUSES:
+            return jsonify({'error': f'Invalid status. Must be one of: {VALID_STATUSES}'}), 400
         
         alert = classifier.update_alert_status(alert_id, new_status)
         
@@ -92,30 +194,146 @@ def update_alert_status(alert_id):
         return jsonify({'error': str(e)}), 500
 
 
+@alerts_bp.route('/api/alerts/bulk-status', methods=['POST'])
+def bulk_update_status():
+    """Update the status of every alert selected by id list or filter"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        new_status = data['status']
+        if new_status not in VALID_STATUSES:
+            return jsonify({'error': f'Invalid status. Must be one of: {VALID_STATUSES}'}), 400
+        
+        alert_ids = data.get('ids')
+        if alert_ids is not None:
+            if not isinstance(alert_ids, list) or not all(isinstance(i, int) for i in alert_ids):
+                return jsonify({'error': 'ids must be a list of alert ids'}), 400
+            if len(alert_ids) > current_app.config['MAX_ALERT_BATCH']:
+                return jsonify({'error': f"Too many ids (max {current_app.config['MAX_ALERT_BATCH']})"}), 413
+        
+        filters = parse_alert_filters(data.get('filter') or {})
+        updated = classifier.bulk_update_status(new_status, alert_ids=alert_ids, filters=filters)
+        
+        return jsonify({
+            'message': f'{updated} alerts set to {new_status}',
+            'updated': updated
+        }), 200
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def parse_alert_filters(raw):
+    """Validate a filter object for bulk alert operations"""
+    unknown = set(raw) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown filter fields: {sorted(unknown)}. Allowed: {FILTER_FIELDS}')
+    
+    filters = dict(raw)
+    for field in ('start_time', 'end_time'):
+        if field in filters:
+            filters[field] = datetime.fromisoformat(filters[field])
+    if 'min_priority' in filters:
+        filters['min_priority'] = float(filters['min_priority'])
+    return filters
+
+
 @alerts_bp.route('/api/alerts/stats', methods=['GET'])
 def get_alert_stats():
     """Get alert statistics"""
     try:
         from collections import Counter
         
-        alerts = Alert.query.all()
+        # One grouped scan instead of loading every alert
+        rows = db.session.query(
+            Alert.severity, Alert.category, Alert.status, db.func.count()
+        ).group_by(Alert.severity, Alert.category, Alert.status).all()
         
-        severity_counts = Counter(alert.severity for alert in alerts)
-        category_counts = Counter(alert.category for alert in alerts)
-        status_counts = Counter(alert.status for alert in alerts)
+        severity_counts = Counter()
+        category_counts = Counter()
+        status_counts = Counter()
+        for severity, category, status, count in rows:
+            severity_counts[severity] += count
+            category_counts[category] += count
+            status_counts[status] += count
+        
+        open_counts = open_alerts.get_counts()
         
         return jsonify({
-            'total_alerts': len(alerts),
+            'total_alerts': sum(status_counts.values()),
             'by_severity': dict(severity_counts),
             'by_category': dict(category_counts),
             'by_status': dict(status_counts),
-            'critical_open': sum(1 for a in alerts if a.severity == 'critical' and a.status == 'open')
+            'critical_open': open_counts['by_severity'].get('critical', 0),
+            'open_by_severity': open_counts['by_severity'],
+            'open_by_category': open_counts['by_category']
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@alerts_bp.route('/api/alerts/analytics', methods=['GET'])
+def get_alert_analytics():
+    """Alert counts, MTTA and MTTR with p50/p95 by day, category and severity"""
+    try:
+        days = request.args.get('days', 7, type=int)
+        if not 1 <= days <= 366:
+            return jsonify({'error': 'days must be between 1 and 366'}), 400
+        
+        end_day = date.fromisoformat(request.args['end']) if 'end' in request.args else datetime.utcnow().date()
+        start_day = date.fromisoformat(request.args['start']) if 'start' in request.args else end_day - timedelta(days=days - 1)
+        if (end_day - start_day).days > 366:
+            return jsonify({'error': 'The range may cover at most 366 days'}), 400
+        
+        return jsonify(get_analytics(
+            start_day, end_day,
+            category=request.args.get('category'),
+            severity=request.args.get('severity')
+        )), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@alerts_bp.route('/api/alerts/escalation', methods=['GET'])
+def get_escalation():
+    """Escalation settings and the stats of this worker's recent passes"""
+    try:
+        return jsonify({
+            'interval': escalation.interval,
+            'step': escalation.step,
+            'rates': escalation.rates,
+            'auto_ack_threshold': escalation.auto_ack_threshold,
+            'passes': list(escalation.passes)
         }), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@alerts_bp.route('/api/alerts/escalation/run', methods=['POST'])
+def run_escalation():
+    """Run an escalation pass now"""
+    try:
+        return jsonify(escalation.run_pass()), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @alerts_bp.route('/api/alerts/rules', methods=['POST'])
 def create_rule():
     """Create a new classification rule"""
@@ -139,6 +357,38 @@ def create_rule():
             'rule': rule.to_dict()
         }), 201
     
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@alerts_bp.route('/api/alerts/rules/<int:rule_id>', methods=['PUT'])
+def update_rule(rule_id):
+    """Update a classification rule"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No changes provided'}), 400
+        
+        rule = classifier.update_rule(rule_id, data)
+        
+        if not rule:
+            return jsonify({'error': 'Rule not found'}), 404
+        
+        return jsonify({
+            'message': 'Rule updated successfully',
+            'rule': rule.to_dict()
+        }), 200
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -159,22 +409,128 @@ def get_rules():
         return jsonify({'error': str(e)}), 500
 
 
+@alerts_bp.route('/api/alerts/rules/stats', methods=['GET'])
+def get_rule_stats():
+    """Per-rule regex evaluations, hits and search time in this worker"""
+    try:
+        stats = classifier.get_rule_stats()
+        
+        return jsonify({
+            'count': len(stats),
+            'time_budget': classifier.rule_time_budget,
+            'rules': stats
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@alerts_bp.route('/api/alerts/thresholds', methods=['POST'])
+def create_threshold():
+    """Create a log threshold rule"""
+    try:
+        data = request.get_json()
+        
+        required_fields = ['name', 'level', 'count']
+        if not data or not all(field in data for field in required_fields):
+            return jsonify({'error': f'Missing required fields: {required_fields}'}), 400
+        
+        threshold = log_alert_stage.create_threshold(
+            name=data['name'],
+            level=data['level'],
+            count=data['count'],
+            window_seconds=data.get('window_seconds', 300),
+            source=data.get('source')
+        )
+        
+        return jsonify({
+            'message': 'Threshold created successfully',
+            'threshold': threshold.to_dict()
+        }), 201
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@alerts_bp.route('/api/alerts/thresholds/<int:threshold_id>', methods=['PUT'])
+def update_threshold(threshold_id):
+    """Update or enable/disable a log threshold rule"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No changes provided'}), 400
+        
+        threshold = log_alert_stage.update_threshold(threshold_id, data)
+        
+        if not threshold:
+            return jsonify({'error': 'Threshold not found'}), 404
+        
+        return jsonify({
+            'message': 'Threshold updated successfully',
+            'threshold': threshold.to_dict()
+        }), 200
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@alerts_bp.route('/api/alerts/thresholds', methods=['GET'])
+def get_thresholds():
+    """List log threshold rules"""
+    try:
+        thresholds = log_alert_stage.get_thresholds()
+        
+        return jsonify({
+            'count': len(thresholds),
+            'thresholds': [threshold.to_dict() for threshold in thresholds]
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @alerts_bp.route('/api/alerts/groups', methods=['GET'])
 def get_alert_groups():
-    """Get grouped similar alerts"""
+    """Get clusters of similar alerts, largest first"""
     try:
         hours = request.args.get('hours', 1, type=int)
-        groups = classifier.group_similar_alerts(hours)
+        threshold = request.args.get('threshold', 0.6, type=float)
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = min(100, max(1, request.args.get('per_page', 20, type=int)))
+        alerts_per_group = min(100, max(1, request.args.get('alerts_per_group', 20, type=int)))
+        
+        if not 0 < threshold <= 1:
+            return jsonify({'error': 'threshold must be in (0, 1]'}), 400
+        
+        total, groups = classifier.group_similar_alerts(
+            hours, threshold=threshold, page=page, per_page=per_page, alerts_per_group=alerts_per_group
+        )
         
-        result = {}
-        for key, alerts in groups.items():
-            result[key] = {
-                'count': len(alerts),
-                'alerts': [alert.to_dict() for alert in alerts]
-            }
+        result = []
+        for group in groups:
+            result.append({
+                'key': group['alerts'][0].title if group['alerts'] else None,
+                'count': group['count'],
+                'occurrences': group['occurrences'],
+                'alerts': [alert.to_dict() for alert in group['alerts']]
+            })
         
         return jsonify({
-            'group_count': len(result),
+            'group_count': total,
+            'page': page,
+            'per_page': per_page,
+            'threshold': threshold,
             'groups': result
         }), 200
     
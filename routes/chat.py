@@ -1,9 +1,30 @@
-from flask import Blueprint, request, jsonify
-from models import ChatMessage
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from models import DiagnosticJob, db
 from services.chatops import ChatOps
+from services.command_stats import MAX_WINDOW_MINUTES, get_command_stats
+from routes.alerts import classifier
+import json
+import time
 
 chat_bp = Blueprint('chat', __name__)
-chatops = ChatOps()
+chatops = ChatOps(alert_classifier=classifier)
+
+
+@chat_bp.record
+def configure_services(state):
+    """Apply the registering app's configuration to the ChatOps service"""
+    chatops.response_cache.ttl = state.app.config['CHAT_CACHE_TTL']
+    chatops.diagnostics.timeout = state.app.config['COMMAND_TIMEOUT']
+    chatops.diagnostics.max_workers = state.app.config['DIAGNOSTIC_WORKERS']
+    chatops.diagnostics.max_pending = state.app.config['DIAGNOSTIC_MAX_PENDING']
+    chatops.diagnostics.init_app(state.app)
+    chatops.sweep.concurrency = state.app.config['SWEEP_CONCURRENCY']
+    chatops.sweep.timeout = state.app.config['SWEEP_TIMEOUT']
+    chatops.sweep.ports = tuple(state.app.config['SWEEP_PORTS'])
+    chatops.sweep.max_hosts = state.app.config['SWEEP_MAX_HOSTS']
+    chatops.history.limit = state.app.config['CHAT_HISTORY_LIMIT']
+    chatops.history.flush_interval = state.app.config['CHAT_HISTORY_FLUSH_INTERVAL']
+    chatops.history.init_app(state.app)
 
 
 @chat_bp.route('/api/chat/message', methods=['POST'])
@@ -18,17 +39,103 @@ def send_message():
         user_message = data['message']
         
         # Process the message
-        bot_response = chatops.process_message(user_message)
+        chat_msg = chatops.process_message(user_message)
         
         return jsonify({
             'user_message': user_message,
-            'bot_response': bot_response
+            'bot_response': chat_msg.bot_response,
+            'job_id': chat_msg.job_id
         }), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _event(name, data):
+    """Format one Server-Sent Event"""
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@chat_bp.route('/api/chat/message/stream', methods=['POST'])
+def stream_message():
+    """Send a command to ChatOps, streaming the reply as Server-Sent Events
+    
+    Emits `chunk` events as the command produces its reply, then one `done` event (or `error`
+    if the stream fails). A diagnostic the command started keeps running after the stream
+    ends; `done` carries its job_id for polling /api/chat/jobs/<id>.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or 'message' not in data:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    user_message = data['message']
+    
+    def events():
+        try:
+            stream = chatops.stream_message(user_message)
+            try:
+                while True:
+                    yield _event('chunk', {'text': next(stream)})
+            except StopIteration as done:
+                chat_msg = done.value
+            
+            yield _event('done', {
+                'job_id': chat_msg.job_id,
+                'success': chat_msg.success,
+                'cache_hit': chat_msg.cache_hit,
+                'execution_time': chat_msg.execution_time
+            })
+        
+        except Exception as e:
+            db.session.rollback()
+            yield _event('error', {'error': str(e)})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@chat_bp.route('/api/chat/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get a diagnostic job's status and output so far"""
+    try:
+        job = db.session.get(DiagnosticJob, job_id)
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify(job.to_dict()), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@chat_bp.route('/api/chat/sweep', methods=['POST'])
+def sweep_hosts():
+    """Check reachability of a host list or CIDR block concurrently"""
+    try:
+        data = request.get_json()
+        
+        if not data or not data.get('targets'):
+            return jsonify({'error': 'targets (host list or CIDR) is required'}), 400
+        
+        started = time.perf_counter()
+        results = chatops.sweep.run(data['targets'], ports=data.get('ports'), icmp=bool(data.get('icmp')))
+        
+        return jsonify({
+            'hosts': len(results),
+            'reachable': sum(result.reachable for result in results),
+            'seconds': round(time.perf_counter() - started, 3),
+            'results': [result.to_dict() for result in results]
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @chat_bp.route('/api/chat/history', methods=['GET'])
 def get_history():
     """Retrieve chat history"""
@@ -46,6 +153,20 @@ def get_history():
         return jsonify({'error': str(e)}), 500
 
 
+@chat_bp.route('/api/chat/stats', methods=['GET'])
+def get_stats():
+    """Per-command call volume, error rate and p50/p95/p99 latency over a window"""
+    try:
+        minutes = request.args.get('minutes', 60, type=int)
+        if not 1 <= minutes <= MAX_WINDOW_MINUTES:
+            return jsonify({'error': f'minutes must be between 1 and {MAX_WINDOW_MINUTES}'}), 400
+        
+        return jsonify(get_command_stats(minutes)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @chat_bp.route('/api/chat/commands', methods=['GET'])
 def get_commands():
     """List available commands"""
@@ -92,15 +213,25 @@ def get_commands():
                 'category': 'alerts'
             },
             'acknowledge': {
-                'description': 'Acknowledge an alert',
-                'usage': 'acknowledge <alert_id>',
+                'description': 'Acknowledge alerts by id, range or filter',
+                'usage': 'acknowledge <id|from-to>[,...] [severity=|category=|source=|fingerprint=<value>]',
                 'category': 'alerts'
             },
             'ping': {
-                'description': 'Ping a host',
+                'description': 'Ping a host in the background (poll /api/chat/jobs/<id>)',
                 'usage': 'ping <host>',
                 'category': 'diagnostics'
             },
+            'traceroute': {
+                'description': 'Trace the route to a host in the background (poll /api/chat/jobs/<id>)',
+                'usage': 'traceroute <host>',
+                'category': 'diagnostics'
+            },
+            'sweep': {
+                'description': 'Check reachability of many hosts at once by TCP connect, optionally with ICMP',
+                'usage': 'sweep <host|cidr>[,...] [ports=22,80,443] [icmp]',
+                'category': 'diagnostics'
+            },
             'summarize': {
                 'description': 'Get log summary',
                 'usage': 'summarize [hours]',
@@ -111,6 +242,11 @@ def get_commands():
                 'usage': 'report',
                 'category': 'reports'
             },
+            'perf': {
+                'description': 'Per-command latency (p50/p95/p99), error rate and calls',
+                'usage': 'perf [minutes]',
+                'category': 'reports'
+            },
             'help': {
                 'description': 'Show available commands',
                 'usage': 'help',
@@ -1,17 +1,38 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from datetime import datetime, timedelta
 from models import NetworkLog, LogSummary, db
+from config import Config
 from services.log_summarizer import LogSummarizer
+from services.log_codec import LogMessageCodec
+from services.log_archive import LogArchive
+from services.activity_rollup import record_logs
+from services.instrumentation import record_ingest
+from services.response_cache import mark_data_changed
+from routes.alerts import log_alert_stage
 import json
+import time
 
 logs_bp = Blueprint('logs', __name__)
-summarizer = LogSummarizer()
+log_archive = LogArchive(Config.LOG_ARCHIVE_DIR)
+summarizer = LogSummarizer(archive=log_archive)
+log_codec = LogMessageCodec(enabled=Config.LOG_COMPACT_STORAGE)
+
+
+@logs_bp.record
+def configure_services(state):
+    """Apply the registering app's configuration to the log services"""
+    config = state.app.config
+    log_archive.directory = config['LOG_ARCHIVE_DIR']
+    log_codec.enabled = config['LOG_COMPACT_STORAGE']
+    summarizer.anomaly_threshold = config['LOG_ANOMALY_THRESHOLD']
+    summarizer.max_events = config['MAX_SUMMARY_EVENTS']
 
 
 @logs_bp.route('/api/logs/ingest', methods=['POST'])
 def ingest_logs():
     """Bulk log ingestion endpoint"""
     try:
+        started = time.perf_counter()
         data = request.get_json()
         
         if not data:
@@ -21,22 +42,37 @@ def ingest_logs():
         logs_data = data if isinstance(data, list) else [data]
         
         added_logs = []
+        entries = []  # (timestamp, source, level, message) for the log-to-alert stage
         for log_data in logs_data:
             log = NetworkLog(
                 timestamp=datetime.fromisoformat(log_data['timestamp']) if 'timestamp' in log_data else datetime.utcnow(),
                 source=log_data.get('source', 'unknown'),
                 level=log_data.get('level', 'INFO').upper(),
-                message=log_data.get('message', ''),
                 meta_data=json.dumps(log_data.get('metadata', {}))
             )
+            message = log_data.get('message', '')
+            log_codec.store_message(log, message)
             db.session.add(log)
             added_logs.append(log)
+            entries.append((log.timestamp, log.source, log.level, message))
         
+        record_logs((log.timestamp, log.level) for log in added_logs)
         db.session.commit()
+        mark_data_changed()
+        record_ingest('logs', len(added_logs), started)
+        
+        # The logs are stored either way; a failure here only costs their alerts
+        try:
+            alerts = log_alert_stage.process(entries)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('Log-to-alert stage failed')
+            alerts = {'error': str(e)}
         
         return jsonify({
             'message': f'Successfully ingested {len(added_logs)} logs',
-            'count': len(added_logs)
+            'count': len(added_logs),
+            'alerts': alerts
         }), 201
     
     except Exception as e:
@@ -100,9 +136,11 @@ def get_raw_logs():
         
         # Build query
         query = NetworkLog.query
+        time_threshold = None
         
         if level:
-            query = query.filter(NetworkLog.level == level.upper())
+            level = level.upper()
+            query = query.filter(NetworkLog.level == level)
         
         if source:
             query = query.filter(NetworkLog.source == source)
@@ -114,6 +152,12 @@ def get_raw_logs():
         # Execute query
         logs = query.order_by(NetworkLog.timestamp.desc()).limit(limit).all()
         
+        # Merge in archived days; once the page is full only older rows can still qualify
+        archive_end = logs[-1].timestamp if len(logs) >= limit else None
+        archived = log_archive.query(time_threshold, archive_end, level=level, source=source, limit=limit)
+        if archived:
+            logs = sorted(logs + archived, key=lambda log: log.timestamp, reverse=True)[:limit]
+        
         return jsonify({
             'count': len(logs),
             'logs': [log.to_dict() for log in logs]
@@ -0,0 +1,89 @@
+from flask import Blueprint, current_app, request, jsonify
+from datetime import datetime, timedelta
+from models import db
+from services.instrumentation import record_ingest
+from services.metric_ingest import naive_utc, parse_columnar, parse_line_protocol, store
+from services.metric_series import get_series
+from services.response_cache import mark_data_changed
+import time
+
+metrics_bp = Blueprint('metrics', __name__)
+
+MAX_POINTS = 5000
+MAX_RANGE_DAYS = 366
+
+
+@metrics_bp.route('/api/metrics/ingest', methods=['POST'])
+def ingest_metrics():
+    """Bulk metric ingestion from columnar JSON or line protocol (text/plain)"""
+    try:
+        started = time.perf_counter()
+        
+        try:
+            if request.mimetype == 'text/plain':
+                rows = parse_line_protocol(request.get_data(as_text=True), request.args.get('precision', 'ns'))
+            else:
+                data = request.get_json(silent=True)
+                if not data:
+                    return jsonify({'error': 'No data provided'}), 400
+                rows = parse_columnar(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not rows:
+            return jsonify({'error': 'No samples provided'}), 400
+        max_batch_size = current_app.config['MAX_METRIC_BATCH']
+        if len(rows) > max_batch_size:
+            return jsonify({'error': f'Batch too large (max {max_batch_size} samples)'}), 413
+        
+        count = store(rows)
+        db.session.commit()
+        mark_data_changed()
+        record_ingest('metrics', count, started)
+        
+        return jsonify({
+            'message': f'Successfully ingested {count} samples',
+            'count': count
+        }), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@metrics_bp.route('/api/metrics/series', methods=['GET'])
+def get_metric_series():
+    """Bucketed avg/min/max of one metric over a time range, downsampled with LTTB"""
+    try:
+        name = request.args.get('name')
+        if not name:
+            return jsonify({'error': 'name is required'}), 400
+        
+        points = request.args.get('points', 300, type=int)
+        if not 3 <= points <= MAX_POINTS:
+            return jsonify({'error': f'points must be between 3 and {MAX_POINTS}'}), 400
+        
+        try:
+            # Stored timestamps are naive UTC, so bounds with an offset are converted to match
+            end = naive_utc(datetime.fromisoformat(request.args['to'])) if 'to' in request.args else datetime.utcnow()
+            start = (naive_utc(datetime.fromisoformat(request.args['from'])) if 'from' in request.args
+                     else end - timedelta(hours=1))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if start >= end:
+            return jsonify({'error': 'from must be before to'}), 400
+        if end - start > timedelta(days=MAX_RANGE_DAYS):
+            return jsonify({'error': f'The range may cover at most {MAX_RANGE_DAYS} days'}), 400
+        
+        series, width = get_series([name], start, end, points, source=request.args.get('source'))
+        
+        return jsonify({
+            'name': name,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'bucket_seconds': round(width, 3),
+            'points': [point.to_dict() for point in series.get(name, [])]
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,101 @@
+import heapq
+import itertools
+from collections import Counter
+from models import ActivityRollup, Alert, NetworkLog, db
+
+
+def minute_of(timestamp):
+    """Get the start of a timestamp's minute"""
+    return timestamp.replace(second=0, microsecond=0)
+
+
+def _upsert():
+    """INSERT ... ON CONFLICT for the bound database"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    statement = insert(ActivityRollup)
+    return statement.on_conflict_do_update(
+        index_elements=['minute', 'kind', 'name'],
+        set_={'count': ActivityRollup.count + statement.excluded.count}
+    )
+
+
+def _add(kind, counts):
+    if counts:
+        db.session.execute(_upsert(), [
+            {'minute': minute, 'kind': kind, 'name': name, 'count': count}
+            for (minute, name), count in counts.items()
+        ])
+
+
+def record_logs(logs):
+    """Count logs, given as (timestamp, level), in the current transaction"""
+    _add('log', Counter((minute_of(timestamp), level) for timestamp, level in logs))
+
+
+def record_alerts(alerts):
+    """Count new alerts, given as (timestamp, severity), in the current transaction"""
+    _add('alert', Counter((minute_of(timestamp), severity) for timestamp, severity in alerts))
+
+
+def rebuild(batch_size=50000):
+    """Recount every stored log and alert into the rollup, replacing its rows"""
+    ActivityRollup.query.delete(synchronize_session=False)
+    
+    total = 0
+    for kind, columns in (('log', (NetworkLog.timestamp, NetworkLog.level)),
+                          ('alert', (Alert.timestamp, Alert.severity))):
+        counts = Counter()
+        for timestamp, name in db.session.query(*columns).yield_per(batch_size):
+            counts[(minute_of(timestamp), name)] += 1
+        _add(kind, counts)
+        total += sum(counts.values())
+    
+    db.session.commit()
+    return total
+
+
+def _counts(kind, since):
+    rows = db.session.query(
+        ActivityRollup.name, db.func.sum(ActivityRollup.count)
+    ).filter(
+        ActivityRollup.minute >= minute_of(since), ActivityRollup.kind == kind
+    ).group_by(ActivityRollup.name)
+    return Counter({name: count for name, count in rows if count})
+
+
+def level_counts(since):
+    """Get log counts by level from the minute holding `since` onwards
+    
+    Reads one rollup row per minute and level, so the cost follows the window's length,
+    not the log volume in it.
+    """
+    return _counts('log', since)
+
+
+def severity_counts(since):
+    """Get counts by severity of alerts raised from the minute holding `since` onwards"""
+    return _counts('alert', since)
+
+
+def latest_events(since, limit):
+    """Get the newest `limit` logs and alerts since `since`, merged newest first
+    
+    Returns (timestamp, 'log' | 'alert', row) tuples; each side reads at most `limit` rows.
+    """
+    logs = NetworkLog.query.filter(
+        NetworkLog.timestamp >= since
+    ).order_by(NetworkLog.timestamp.desc()).limit(limit).all()
+    alerts = Alert.query.filter(
+        Alert.timestamp >= since
+    ).order_by(Alert.timestamp.desc()).limit(limit).all()
+    
+    merged = heapq.merge(
+        ((log.timestamp, 'log', log) for log in logs),
+        ((alert.timestamp, 'alert', alert) for alert in alerts),
+        key=lambda event: event[0], reverse=True
+    )
+    return list(itertools.islice(merged, limit))
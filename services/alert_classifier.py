@@ -1,43 +1,215 @@
-import re
 from datetime import datetime
 from collections import Counter
+from sqlalchemy import case, insert, tuple_, update
 from models import Alert, AlertRule, db
+from services.activity_rollup import record_alerts
+from services.alert_dedup import AlertDeduplicator, fingerprint
+from services.cache_sync import VersionedCache, bump_version
+from services.instrumentation import RULE_HITS, RULE_SEARCH_TIME
+from services.lifecycle_stats import record_created, record_transitions
+from services.open_alerts import OpenAlert, open_alerts
+from services.pattern_matcher import KeywordLevels
+from services.response_cache import mark_data_changed
+from services.rule_engine import RuleSet, validate_pattern
+from services.similarity import SimilarityIndex, title_signature
+import base64
 import json
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 class AlertClassifier:
     """Service for classifying and prioritizing network alerts"""
     
-    def __init__(self, auto_ack_threshold=0.3):
+    RULES_CACHE = 'alert_rules'
+    
+    # Checked in order; the first level with a keyword in the text wins
+    CATEGORY_KEYWORDS = [
+        ('security', ['security', 'breach', 'unauthorized', 'attack', 'intrusion', 'malware', 'virus']),
+        ('network', ['network', 'connection', 'packet', 'bandwidth', 'latency', 'timeout', 'dns']),
+        ('performance', ['performance', 'slow', 'high cpu', 'memory', 'disk', 'load', 'throughput']),
+        ('system', ['system', 'service', 'daemon', 'process', 'kernel', 'boot', 'shutdown']),
+        ('application', ['application', 'app', 'database', 'query', 'api', 'request'])
+    ]
+    SEVERITY_KEYWORDS = [
+        ('critical', ['critical', 'emergency', 'down', 'failed', 'breach']),
+        ('high', ['error', 'failure', 'high', 'warning']),
+        ('medium', ['warning', 'degraded', 'slow'])
+    ]
+    
+    CATEGORY_MATCHER = KeywordLevels(CATEGORY_KEYWORDS)
+    SEVERITY_MATCHER = KeywordLevels(SEVERITY_KEYWORDS)
+    
+    def __init__(self, auto_ack_threshold=0.3, rule_check_interval=1.0, dedup_window=600, rule_time_budget=0.05):
         self.auto_ack_threshold = auto_ack_threshold
+        self.rule_time_budget = rule_time_budget  # Seconds one rule's regex search may take
         self.severity_scores = {
             'low': 0.25,
             'medium': 0.5,
             'high': 0.75,
             'critical': 1.0
         }
+        self._rule_set = VersionedCache(self.RULES_CACHE, self._load_rule_set, rule_check_interval)
+        self.deduplicator = AlertDeduplicator(dedup_window)
+    
+    def _load_rule_set(self):
+        return RuleSet(AlertRule.query.filter_by(enabled=True).all(), self.severity_scores, self.rule_time_budget)
+    
+    def get_rule_set(self):
+        """Get the compiled snapshot of enabled rules"""
+        return self._rule_set.get()
+    
+    def set_rule_check_interval(self, seconds):
+        """Set how often other workers' rule changes are checked for"""
+        self._rule_set.check_interval = seconds
+    
+    def _disable_slow_rules(self, rule_set):
+        """Disable the rules whose regex went over the time budget while classifying"""
+        slow = rule_set.take_over_budget()
+        if not slow:
+            return
+        
+        for rule_id, elapsed in slow.items():
+            reason = (f"Regex search took {elapsed * 1000:.0f} ms, over the "
+                      f"{rule_set.time_budget * 1000:g} ms budget")
+            logger.warning("Disabling alert rule %s: %s", rule_id, reason)
+            db.session.execute(
+                update(AlertRule)
+                .where(AlertRule.id == rule_id)
+                .values(enabled=False, disabled_reason=reason)
+                .execution_options(synchronize_session=False)
+            )
+        
+        bump_version(self.RULES_CACHE)
+        db.session.commit()
+        self._rule_set.invalidate()
     
     def classify_alert(self, alert_data):
-        """Classify an incoming alert and assign priority"""
+        """Classify an incoming alert and assign priority, folding repeats into the open alert"""
+        now = datetime.utcnow()
+        rule_set = self.get_rule_set()
+        row = self._build_alert(alert_data, rule_set, now)
+        self._disable_slow_rules(rule_set)
+        fp = row['fingerprint']
+        
+        existing_id = self.deduplicator.find([fp], now).get(fp)
+        if existing_id and self.deduplicator.record_repeats(fp, existing_id, 1, now):
+            db.session.commit()
+            return db.session.get(Alert, existing_id)
+        
+        row['minhash'] = title_signature(row['title'])
+        alert = Alert(**row)
+        
+        db.session.add(alert)
+        record_created([(row['timestamp'], row['category'], row['severity'])])
+        record_alerts([(row['timestamp'], row['severity'])])
+        db.session.commit()
+        self.deduplicator.remember(fp, alert.id, now)
+        open_alerts.update(alert)
+        mark_data_changed()
+        
+        return alert
+    
+    def classify_batch(self, items):
+        """Classify a batch of alerts against one rule snapshot and store them in one insert
+        
+        Returns a result per item, in order: the classification and id of the alert it was
+        stored as (or folded into, when `duplicate` is set), or an error.
+        """
+        now = datetime.utcnow()
+        rule_set = self.get_rule_set()
+        results = []
+        groups = {}  # fingerprint -> [row, result, ...]
+        
+        for index, alert_data in enumerate(items):
+            if not isinstance(alert_data, dict) or 'title' not in alert_data:
+                results.append({'index': index, 'error': 'Alert must be a JSON object with a title'})
+                continue
+            
+            try:
+                row = self._build_alert(alert_data, rule_set, now)
+            except (TypeError, ValueError) as e:
+                results.append({'index': index, 'error': str(e)})
+                continue
+            
+            result = {
+                'index': index,
+                'severity': row['severity'],
+                'category': row['category'],
+                'status': row['status'],
+                'priority_score': row['priority_score']
+            }
+            results.append(result)
+            
+            key = row['fingerprint'] if self.deduplicator.window else index
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [row, result]
+            else:
+                result['duplicate'] = True
+                group.append(result)
+        
+        self._disable_slow_rules(rule_set)
+        
+        # Repeats of alerts that are already stored become one counter update per fingerprint
+        existing = self.deduplicator.find(list(groups), now)
+        for fp, alert_id in existing.items():
+            group = groups[fp]
+            if self.deduplicator.record_repeats(fp, alert_id, len(group) - 1, now):
+                for result in group[1:]:
+                    result['id'] = alert_id
+                    result['duplicate'] = True
+                del groups[fp]
+        
+        # The first alert of each new fingerprint is inserted carrying the batch's repeats
+        new_groups = list(groups.items())
+        rows = []
+        for fp, group in new_groups:
+            row = group[0]
+            row['occurrence_count'] = len(group) - 1
+            row['minhash'] = title_signature(row['title'])
+            rows.append(row)
+        
+        if rows:
+            ids = db.session.scalars(
+                insert(Alert).returning(Alert.id, sort_by_parameter_order=True), rows
+            ).all()
+            record_created((row['timestamp'], row['category'], row['severity']) for row in rows)
+            record_alerts((row['timestamp'], row['severity']) for row in rows)
+        else:
+            ids = []
+        db.session.commit()
+        mark_data_changed()
+        
+        for (fp, group), alert_id in zip(new_groups, ids):
+            for result in group[1:]:
+                result['id'] = alert_id
+            self.deduplicator.remember(fp, alert_id, now)
+            
+            row = group[0]
+            if row['status'] == 'open':
+                open_alerts.add(OpenAlert(
+                    alert_id, row['title'], row['description'], row['severity'], row['category'],
+                    row['priority_score'], row['timestamp'], row['source']
+                ))
+        
+        return results
+    
+    def _build_alert(self, alert_data, rule_set, now):
+        """Get the column values for a classified alert"""
         
         # Extract alert information
         title = alert_data.get('title', '')
         description = alert_data.get('description', '')
         combined_text = f"{title} {description}".lower()
         
-        # Get all active rules
-        rules = AlertRule.query.filter_by(enabled=True).all()
-        
-        # Apply classification rules
-        matched_rules = []
-        for rule in rules:
-            if self._matches_pattern(combined_text, rule.pattern):
-                matched_rules.append(rule)
+        # Rules are ordered by severity, so the first match is the best one
+        best_rule = rule_set.match(combined_text)
         
         # Determine category and severity
-        if matched_rules:
-            # Use the highest priority matched rule
-            best_rule = max(matched_rules, key=lambda r: self.severity_scores.get(r.severity, 0))
+        if best_rule:
             category = best_rule.category
             severity = best_rule.severity
             priority_boost = best_rule.priority_boost
@@ -56,76 +228,124 @@ class AlertClassifier:
         if priority_score < self.auto_ack_threshold:
             status = 'acknowledged'
         
-        # Create alert
-        alert = Alert(
-            timestamp=datetime.fromisoformat(alert_data['timestamp']) if 'timestamp' in alert_data else datetime.utcnow(),
-            title=title,
-            description=description,
-            severity=severity,
-            category=category,
-            status=status,
-            priority_score=priority_score,
-            source=alert_data.get('source', 'unknown'),
-            meta_data=json.dumps(alert_data.get('metadata', {})),
-            acknowledged_at=datetime.utcnow() if status == 'acknowledged' else None
-        )
-        
-        db.session.add(alert)
-        db.session.commit()
+        source = alert_data.get('source', 'unknown')
         
-        return alert
-    
-    def _matches_pattern(self, text, pattern):
-        """Check if text matches a pattern (regex or keyword)"""
-        try:
-            # Try as regex first
-            return bool(re.search(pattern, text, re.IGNORECASE))
-        except re.error:
-            # Fall back to simple keyword matching
-            return pattern.lower() in text
+        return {
+            'timestamp': datetime.fromisoformat(alert_data['timestamp']) if 'timestamp' in alert_data else now,
+            'title': title,
+            'description': description,
+            'severity': severity,
+            'category': category,
+            'status': status,
+            'priority_score': priority_score,
+            'base_priority': priority_score,
+            'source': source,
+            'meta_data': json.dumps(alert_data.get('metadata', {})),
+            'acknowledged_at': now if status == 'acknowledged' else None,
+            'fingerprint': fingerprint(title, source, category),
+            'occurrence_count': 1,
+            'last_seen': now
+        }
     
     def _classify_category(self, text):
         """Classify alert category based on keywords"""
-        category_keywords = {
-            'security': ['security', 'breach', 'unauthorized', 'attack', 'intrusion', 'malware', 'virus'],
-            'network': ['network', 'connection', 'packet', 'bandwidth', 'latency', 'timeout', 'dns'],
-            'performance': ['performance', 'slow', 'high cpu', 'memory', 'disk', 'load', 'throughput'],
-            'system': ['system', 'service', 'daemon', 'process', 'kernel', 'boot', 'shutdown'],
-            'application': ['application', 'app', 'database', 'query', 'api', 'request']
-        }
-        
-        for category, keywords in category_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                return category
-        
-        return 'system'  # Default category
+        return self.CATEGORY_MATCHER.classify(text, default='system')
     
     def _classify_severity(self, text):
         """Classify alert severity based on keywords"""
-        if any(word in text for word in ['critical', 'emergency', 'down', 'failed', 'breach']):
-            return 'critical'
-        elif any(word in text for word in ['error', 'failure', 'high', 'warning']):
-            return 'high'
-        elif any(word in text for word in ['warning', 'degraded', 'slow']):
-            return 'medium'
-        else:
-            return 'low'
+        return self.SEVERITY_MATCHER.classify(text, default='low')
     
-    def get_alerts(self, filters=None):
-        """Get alerts with optional filtering"""
-        query = Alert.query
+    def get_alerts(self, filters=None, limit=None, cursor=None):
+        """Get alerts with optional filtering, highest priority first
+        
+        Returns (alerts, next_cursor). Pass next_cursor back to continue after the last alert;
+        it is None once there are no more.
+        """
+        query = Alert.query.filter(*self._filter_conditions(filters))
+        
+        order_key = tuple_(Alert.priority_score, Alert.timestamp, Alert.id)
+        if cursor:
+            query = query.filter(order_key < decode_cursor(cursor))
         
-        if filters:
-            if 'severity' in filters:
-                query = query.filter(Alert.severity == filters['severity'])
-            if 'category' in filters:
-                query = query.filter(Alert.category == filters['category'])
-            if 'status' in filters:
-                query = query.filter(Alert.status == filters['status'])
-            if 'min_priority' in filters:
-                query = query.filter(Alert.priority_score >= filters['min_priority'])
+        query = query.order_by(Alert.priority_score.desc(), Alert.timestamp.desc(), Alert.id.desc())
+        if limit is None:
+            return query.all(), None
         
-        return query.order_by(Alert.priority_score.desc(), Alert.timestamp.desc()).all()
+        # One extra row tells whether another page exists
+        alerts = query.limit(limit + 1).all()
+        if len(alerts) <= limit:
+            return alerts, None
+        
+        alerts = alerts[:limit]
+        last = alerts[-1]
+        return alerts, encode_cursor(last.priority_score, last.timestamp, last.id)
+    
+    def _filter_conditions(self, filters):
+        """Translate alert filters into SQL conditions"""
+        if not filters:
+            return []
+        
+        conditions = []
+        if 'severity' in filters:
+            conditions.append(Alert.severity == filters['severity'])
+        if 'category' in filters:
+            conditions.append(Alert.category == filters['category'])
+        if 'status' in filters:
+            conditions.append(Alert.status == filters['status'])
+        if 'source' in filters:
+            conditions.append(Alert.source == filters['source'])
+        if 'fingerprint' in filters:
+            conditions.append(Alert.fingerprint == filters['fingerprint'])
+        if 'min_priority' in filters:
+            conditions.append(Alert.priority_score >= filters['min_priority'])
+        if 'start_time' in filters:
+            conditions.append(Alert.timestamp >= filters['start_time'])
+        if 'end_time' in filters:
+            conditions.append(Alert.timestamp <= filters['end_time'])
+        return conditions
+    
+    def bulk_update_status(self, new_status, alert_ids=None, filters=None):
+        """Move every matching alert to a new status in one UPDATE, returning the number changed"""
+        conditions = self._filter_conditions(filters)
+        if alert_ids is not None:
+            conditions.append(Alert.id.in_(alert_ids))
+        if not conditions:
+            raise ValueError('Select alerts by id or by at least one filter')
+        
+        now = datetime.utcnow()
+        values = {'status': new_status}
+        if new_status == 'acknowledged':
+            values['acknowledged_at'] = db.func.coalesce(Alert.acknowledged_at, now)
+        elif new_status == 'resolved':
+            values['resolved_at'] = now
+        
+        # Alerts already in the target status are left untouched and not counted
+        changed = db.session.execute(
+            update(Alert)
+            .where(Alert.status != new_status, *conditions)
+            .values(**values)
+            .returning(Alert.id, Alert.title, Alert.description, Alert.severity, Alert.category,
+                       Alert.priority_score, Alert.timestamp, Alert.source, Alert.acknowledged_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        
+        # An acknowledgement time equal to now was set by this update, so it is the first one
+        if new_status == 'acknowledged':
+            record_transitions('acknowledged', (
+                (row.timestamp, row.category, row.severity) for row in changed if row.acknowledged_at == now
+            ), now)
+        elif new_status == 'resolved':
+            record_transitions('resolved', ((row.timestamp, row.category, row.severity) for row in changed), now)
+        db.session.commit()
+        
+        for row in changed:
+            if new_status == 'open':
+                open_alerts.add(OpenAlert(*row[:8]))
+            else:
+                open_alerts.discard(row.id)
+        mark_data_changed()
+        
+        return len(changed)
     
     def update_alert_status(self, alert_id, new_status):
         """Update an alert's status"""
@@ -134,37 +354,71 @@ class AlertClassifier:
         if not alert:
             return None
         
+        now = datetime.utcnow()
+        previous_status = alert.status
         alert.status = new_status
         
+        # Time to acknowledge counts the first acknowledgement; time to resolve each resolution
         if new_status == 'acknowledged' and not alert.acknowledged_at:
-            alert.acknowledged_at = datetime.utcnow()
+            alert.acknowledged_at = now
+            record_transitions('acknowledged', [(alert.timestamp, alert.category, alert.severity)], now)
         elif new_status == 'resolved':
-            alert.resolved_at = datetime.utcnow()
+            alert.resolved_at = now
+            if previous_status != 'resolved':
+                record_transitions('resolved', [(alert.timestamp, alert.category, alert.severity)], now)
         
         db.session.commit()
+        open_alerts.update(alert)
+        mark_data_changed()
         return alert
     
-    def group_similar_alerts(self, time_window_hours=1):
-        """Group similar alerts that occurred within a time window"""
+    def group_similar_alerts(self, time_window_hours=1, threshold=0.6, page=1, per_page=20,
+                             alerts_per_group=20, min_size=2):
+        """Cluster alerts in a time window by title similarity
+        
+        Returns (total group count, one page of groups). Groups are ordered largest first,
+        and each holds its alert count, occurrence total and its newest alerts.
+        """
         from datetime import timedelta
         
         cutoff_time = datetime.utcnow() - timedelta(hours=time_window_hours)
-        recent_alerts = Alert.query.filter(Alert.timestamp >= cutoff_time).all()
         
-        # Group by title similarity
-        groups = {}
-        for alert in recent_alerts:
-            # Simple grouping by first 50 characters of title
-            key = alert.title[:50]
-            if key not in groups:
-                groups[key] = []
-            groups[key].append(alert)
+        # Only signatures are loaded; titles only for rows stored before signatures existed
+        rows = db.session.query(
+            Alert.id, Alert.minhash, Alert.occurrence_count,
+            case((Alert.minhash.is_(None), Alert.title))
+        ).filter(Alert.timestamp >= cutoff_time).order_by(Alert.id).all()
+        
+        index = SimilarityIndex(threshold)
+        occurrences = {}
+        for alert_id, minhash, occurrence_count, title in rows:
+            index.add(alert_id, minhash or title_signature(title or ''))
+            occurrences[alert_id] = occurrence_count or 1
+        
+        groups = [ids for ids in index.groups() if len(ids) >= min_size]
+        groups.sort(key=lambda ids: (-len(ids), ids[0]))
+        page_groups = groups[(page - 1) * per_page:page * per_page]
         
-        # Return groups with more than one alert
-        return {k: v for k, v in groups.items() if len(v) > 1}
+        shown = [ids[-alerts_per_group:] for ids in page_groups]
+        alerts = {
+            alert.id: alert
+            for alert in Alert.query.filter(Alert.id.in_([i for ids in shown for i in ids]))
+        }
+        
+        result = []
+        for ids, shown_ids in zip(page_groups, shown):
+            result.append({
+                'count': len(ids),
+                'occurrences': sum(occurrences[i] for i in ids),
+                'alerts': [alerts[i] for i in reversed(shown_ids) if i in alerts]
+            })
+        
+        return len(groups), result
     
     def create_rule(self, name, pattern, category, severity, priority_boost=0.0):
         """Create a new classification rule"""
+        validate_pattern(pattern, self.rule_time_budget)
+        
         rule = AlertRule(
             name=name,
             pattern=pattern,
@@ -174,10 +428,71 @@ class AlertClassifier:
         )
         
         db.session.add(rule)
+        bump_version(self.RULES_CACHE)
+        db.session.commit()
+        self._rule_set.invalidate()
+        
+        return rule
+    
+    def update_rule(self, rule_id, changes):
+        """Update a classification rule"""
+        rule = AlertRule.query.get(rule_id)
+        
+        if not rule:
+            return None
+        
+        if 'pattern' in changes:
+            validate_pattern(changes['pattern'], self.rule_time_budget)
+        
+        for field in ('name', 'pattern', 'category', 'severity', 'priority_boost', 'enabled'):
+            if field in changes:
+                setattr(rule, field, changes[field])
+        
+        if rule.enabled:
+            rule.disabled_reason = None
+        
+        bump_version(self.RULES_CACHE)
         db.session.commit()
+        self._rule_set.invalidate()
         
         return rule
     
     def get_rules(self):
         """Get all classification rules"""
         return AlertRule.query.all()
+    
+    def get_rule_stats(self):
+        """Get every rule's regex searches, hits and search time in this process, costliest first"""
+        stats = []
+        for rule in AlertRule.query.all():
+            _, searches, seconds = RULE_SEARCH_TIME.get_snapshot(rule.id)
+            p99 = RULE_SEARCH_TIME.get_quantile(0.99, rule.id)
+            stats.append({
+                'id': rule.id,
+                'name': rule.name,
+                'enabled': rule.enabled,
+                'disabled_reason': rule.disabled_reason,
+                'evaluations': searches,
+                'hits': RULE_HITS.get(rule.id),
+                'total_seconds': round(seconds, 6),
+                # A bucket bound can't exceed the total, which also caps the open-ended last bucket
+                'p99_seconds': round(min(p99, seconds), 6) if searches else None
+            })
+        
+        stats.sort(key=lambda item: item['total_seconds'], reverse=True)
+        return stats
+
+
+def encode_cursor(priority_score, timestamp, alert_id):
+    """Pack an alert's position in the listing order into an opaque cursor"""
+    position = json.dumps([priority_score, timestamp.isoformat(), alert_id])
+    return base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Unpack a cursor from encode_cursor, raising ValueError if it is malformed"""
+    try:
+        priority_score, timestamp, alert_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(priority_score), datetime.fromisoformat(timestamp), int(alert_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
@@ -0,0 +1,105 @@
+import hashlib
+import re
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from models import Alert, db
+
+
+# IPv6/MAC addresses, hex values, then numbers and dotted IPv4 addresses
+VARIABLE_PATTERN = re.compile(
+    r'\b(?:[0-9a-f]{0,4}:){2,7}[0-9a-f]{1,4}\b|\b0x[0-9a-f]+\b|\d+(?:\.\d+)*',
+    re.IGNORECASE
+)
+
+
+def normalize_title(title):
+    """Lowercase a title and replace the parts that vary between repeats"""
+    return ' '.join(VARIABLE_PATTERN.sub('#', title.lower()).split())
+
+
+def fingerprint(title, source, category):
+    """Identify repeats of an alert: same normalized title, source and category"""
+    key = '\x1f'.join((normalize_title(title), source or '', category or ''))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class AlertDeduplicator:
+    """In-memory fingerprint index folding repeats into the existing unresolved alert"""
+    
+    def __init__(self, window=600, max_entries=100000):
+        self.window = window  # Seconds since an alert was last seen; 0 disables deduplication
+        self.max_entries = max_entries
+        self._index = {}  # fingerprint -> (alert id, last seen)
+        self._lock = threading.Lock()
+    
+    def find(self, fingerprints, now):
+        """Get {fingerprint: alert id} for fingerprints with an unresolved alert seen within the window"""
+        if not self.window:
+            return {}
+        
+        cutoff = now - timedelta(seconds=self.window)
+        found = {}
+        missing = []
+        
+        with self._lock:
+            for fp in fingerprints:
+                entry = self._index.get(fp)
+                if entry and entry[1] >= cutoff:
+                    found[fp] = entry[0]
+                else:
+                    missing.append(fp)
+        
+        # Other workers and earlier processes may have stored the alert
+        if missing:
+            rows = db.session.query(Alert.fingerprint, Alert.id, Alert.last_seen).filter(
+                Alert.fingerprint.in_(missing),
+                Alert.status != 'resolved',
+                Alert.last_seen >= cutoff
+            ).order_by(Alert.id).all()
+            
+            for fp, alert_id, last_seen in rows:
+                found[fp] = alert_id
+                self.remember(fp, alert_id, last_seen)
+        
+        return found
+    
+    def record_repeats(self, fp, alert_id, count, now):
+        """Add repeats to an existing alert in the current transaction; False if it was resolved meanwhile"""
+        cutoff = now - timedelta(seconds=self.window)
+        result = db.session.execute(
+            update(Alert)
+            .where(Alert.id == alert_id, Alert.status != 'resolved', Alert.last_seen >= cutoff)
+            .values(occurrence_count=Alert.occurrence_count + count, last_seen=now)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if result.rowcount:
+            self.remember(fp, alert_id, now)
+            return True
+        
+        self.forget(fp)
+        return False
+    
+    def remember(self, fp, alert_id, last_seen):
+        """Point a fingerprint at the alert that absorbs its repeats"""
+        if not self.window:
+            return
+        
+        with self._lock:
+            if len(self._index) >= self.max_entries and fp not in self._index:
+                self._prune()
+            self._index[fp] = (alert_id, last_seen)
+    
+    def forget(self, fp):
+        with self._lock:
+            self._index.pop(fp, None)
+    
+    def _prune(self):
+        """Drop expired entries, or the oldest half if everything is still live"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.window)
+        live = {fp: entry for fp, entry in self._index.items() if entry[1] >= cutoff}
+        if len(live) >= self.max_entries:
+            newest = sorted(live.items(), key=lambda item: item[1][1])[len(live) // 2:]
+            live = dict(newest)
+        self._index = live
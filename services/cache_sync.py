@@ -0,0 +1,83 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import CacheVersion, WorkerLease, db
+
+
+def bump_version(name):
+    """Mark a cache as stale in every worker, as part of the caller's transaction"""
+    updated = CacheVersion.query.filter_by(name=name).update(
+        {'version': CacheVersion.version + 1, 'updated_at': datetime.utcnow()},
+        synchronize_session=False
+    )
+    
+    if not updated:
+        try:
+            with db.session.begin_nested():
+                db.session.add(CacheVersion(name=name, version=1))
+        except IntegrityError:
+            # Another worker created the counter first
+            return bump_version(name)
+
+
+def get_version(name):
+    """Get the current version of a cache (0 if it has never been bumped)"""
+    version = db.session.query(CacheVersion.version).filter_by(name=name).scalar()
+    return version or 0
+
+
+def acquire_lease(name, owner, seconds):
+    """Claim or renew a named lease for `seconds`; False while another owner holds it"""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    
+    renewed = WorkerLease.query.filter(
+        WorkerLease.name == name,
+        (WorkerLease.owner == owner) | (WorkerLease.expires_at < now)
+    ).update({'owner': owner, 'expires_at': expires_at}, synchronize_session=False)
+    
+    if not renewed:
+        try:
+            with db.session.begin_nested():
+                db.session.add(WorkerLease(name=name, owner=owner, expires_at=expires_at))
+        except IntegrityError:
+            # Held by a live owner, or another worker created it first
+            db.session.commit()
+            return False
+    
+    db.session.commit()
+    return True
+
+
+class VersionedCache:
+    """Process-local cached value that reloads when its shared version changes"""
+    
+    def __init__(self, name, loader, check_interval=0.0):
+        self.name = name
+        self.loader = loader
+        self.check_interval = check_interval  # Seconds between version checks
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+    
+    def get(self):
+        """Get the cached value, reloading it if another worker bumped the version"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._value
+        
+        version = get_version(self.name)
+        
+        with self._lock:
+            if version != self._version:
+                self._value = self.loader()
+                self._version = version
+            self._checked_at = now
+            return self._value
+    
+    def invalidate(self):
+        """Drop the local copy so the next read reloads it"""
+        with self._lock:
+            self._version = None
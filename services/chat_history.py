@@ -0,0 +1,196 @@
+import atexit
+import threading
+import time
+from collections import deque
+from sqlalchemy import insert
+from models import ChatMessage, db
+from services.command_stats import prune, record_commands
+from services.instrumentation import CHAT_HISTORY_FLUSH_TIME, CHAT_HISTORY_ROWS
+
+
+COLUMNS = ('timestamp', 'user_message', 'bot_response', 'command_type', 'execution_time', 'cache_hit', 'job_id',
+           'success')
+
+
+class ChatHistoryWriter:
+    """Write-behind store for the chat transcript with an in-memory ring of recent messages
+    
+    Messages are written in batches by a background thread, which then trims the table to
+    the newest `limit` rows in bounded chunks. Each batch also feeds the per-command latency
+    sketches in the same transaction. Reads come from the ring, which reloads from
+    the database every `reconcile_interval` seconds to pick up other workers' messages.
+    """
+    
+    def __init__(self, limit=100, flush_interval=0.5, batch_size=500, max_pending=10000, delete_batch=1000,
+                 reconcile_interval=2.0):
+        self.limit = limit  # Messages kept, in the ring and in the database
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending  # Unwritten messages kept while the database is unavailable
+        self.delete_batch = delete_batch
+        self.reconcile_interval = reconcile_interval
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._ring = deque(maxlen=limit)  # ChatMessage objects outside any session, oldest first
+        self._pending = deque()
+        self._writing = []  # Batch being written, kept for _reload until it commits
+        self._loaded_at = None
+        self._wake = threading.Event()
+        self._thread = None
+    
+    def init_app(self, app):
+        """Bind the app whose context the writer thread runs in"""
+        with self._lock:
+            self.app = app
+            self._ring = deque(self._ring, maxlen=self.limit)
+    
+    def _start(self):
+        """Write in a daemon thread, flushing what is left at exit; called with the lock held
+        
+        Started by the first message rather than at app creation, so only processes that
+        serve chat run it, and a server that forks workers after loading the app starts one
+        in each worker.
+        """
+        self._thread = threading.Thread(target=self._run, name='chat-history', daemon=True)
+        self._thread.start()
+        atexit.register(self._flush_at_exit)
+    
+    def record(self, message):
+        """Queue a transient ChatMessage for writing and add it to the ring"""
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            self._ring.append(message)
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                CHAT_HISTORY_ROWS.inc(1, 'dropped')
+            self._pending.append(message)
+            full = len(self._pending) >= self.batch_size
+        
+        if full:
+            self._wake.set()
+    
+    def recent(self, limit):
+        """Get up to `limit` of the newest messages, newest first"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reconcile_interval:
+            self._reload()
+        
+        with self._lock:
+            messages = list(self._ring)
+        messages.reverse()
+        return messages[:limit]
+    
+    def _reload(self):
+        """Refill the ring from the database, keeping messages not written yet"""
+        # Snapshot before reading, so a batch committed in between is found by id rather than missed
+        with self._lock:
+            unwritten = self._writing + list(self._pending)
+        
+        rows = db.session.query(ChatMessage.id, *(getattr(ChatMessage, name) for name in COLUMNS)).order_by(
+            ChatMessage.id.desc()
+        ).limit(self.limit).all()
+        
+        with self._lock:
+            written = {message.id for message in unwritten if message.id is not None}
+            stored = [ChatMessage(**row._asdict()) for row in reversed(rows) if row.id not in written]
+            self._ring = deque(stored + unwritten, maxlen=self.limit)
+            self._loaded_at = time.monotonic()
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+    
+    def flush(self):
+        """Write queued messages, then trim the table to the newest `limit` rows and prune old latency stats"""
+        if self.app is None:
+            return
+        
+        try:
+            self._flush()
+        except Exception:
+            self.app.logger.exception('Chat history flush failed')
+    
+    def _flush_at_exit(self):
+        """Write what is left at exit, where the database may already be gone"""
+        if self.app is None:
+            return
+        
+        try:
+            self._flush()
+        except Exception as e:
+            with self._lock:
+                lost = len(self._pending)
+            self.app.logger.error('Chat history lost %d unwritten messages at exit: %s', lost,
+                                  str(e).split('\n', 1)[0])
+    
+    def _flush(self):
+        with self._flush_lock, self.app.app_context():
+            try:
+                written = False
+                while self._write_batch():
+                    written = True
+                if written:
+                    self._trim()
+                    prune()
+                    db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+    
+    def _write_batch(self):
+        """Write up to batch_size queued messages; False when there was nothing to write"""
+        with self._lock:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._writing = batch
+        if not batch:
+            return False
+        
+        started = time.perf_counter()
+        try:
+            ids = db.session.scalars(
+                insert(ChatMessage).returning(ChatMessage.id, sort_by_parameter_order=True),
+                [{name: getattr(message, name) for name in COLUMNS} for message in batch]
+            ).all()
+            # Ids are set before the commit, so _reload can recognise rows it reads right after it
+            for message, message_id in zip(batch, ids):
+                message.id = message_id
+            record_commands(batch)
+            db.session.commit()
+        except Exception:
+            # Put the batch back for the next flush; ids from the rolled back insert may be reused
+            with self._lock:
+                for message in batch:
+                    message.id = None
+                self._writing = []
+                self._pending.extendleft(reversed(batch))
+            raise
+        finally:
+            with self._lock:
+                self._writing = []
+        
+        CHAT_HISTORY_FLUSH_TIME.observe(time.perf_counter() - started)
+        CHAT_HISTORY_ROWS.inc(len(batch), 'written')
+        return True
+    
+    def _trim(self):
+        """Delete rows older than the newest `limit`, at most delete_batch per statement"""
+        cutoff = db.session.query(ChatMessage.id).order_by(ChatMessage.id.desc()).offset(self.limit).limit(1).scalar()
+        if cutoff is None:
+            return
+        
+        while True:
+            chunk = db.session.query(ChatMessage.id).filter(ChatMessage.id <= cutoff).order_by(
+                ChatMessage.id
+            ).limit(self.delete_batch).subquery()
+            deleted = ChatMessage.query.filter(ChatMessage.id.in_(db.select(chunk.c.id))).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+            CHAT_HISTORY_ROWS.inc(deleted, 'deleted')
+            if deleted < self.delete_batch:
+                return
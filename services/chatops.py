@@ -1,15 +1,39 @@
 import re
-import subprocess
-import platform
 from datetime import datetime, timedelta
-from models import ChatMessage, NetworkLog, Alert, LogSummary, NetworkMetric, db
-from collections import Counter
+from types import GeneratorType
+from models import ChatMessage, DiagnosticJob, NetworkLog, Alert, LogSummary
+from services.activity_rollup import latest_events, level_counts, severity_counts
+from services.alert_classifier import AlertClassifier
+from services.chat_history import ChatHistoryWriter
+from services.command_stats import MAX_WINDOW_MINUTES, get_command_stats
+from services.diagnostics import DiagnosticsPool
+from services.metric_series import get_series, get_summary
+from services.open_alerts import open_alerts
+from services.response_cache import ResponseCache, data_generation
+from services.sweep import ReachabilitySweep
 
 
 class ChatOps:
     """ChatOps service for network troubleshooting and management"""
     
-    def __init__(self):
+    ACK_FILTERS = ('severity', 'category', 'source', 'fingerprint')
+    MAX_ACK_RANGE = 10000
+    RECENT_EVENTS = 10  # Newest logs and alerts listed by `recent`
+    TREND_POINTS = 24  # Points in each `metrics` sparkline
+    SPARK_LEVELS = '▁▂▃▄▅▆▇█'
+    
+    # Read-only commands whose replies are cached; diagnostics run live every time
+    CACHED_COMMANDS = frozenset({
+        'status', 'health', 'metrics', 'logs', 'errors', 'recent', 'alerts', 'critical', 'summarize',
+        'report', 'help'
+    })
+    
+    def __init__(self, alert_classifier=None, cache_ttl=10.0):
+        self.alert_classifier = alert_classifier or AlertClassifier()
+        self.response_cache = ResponseCache(cache_ttl)
+        self.diagnostics = DiagnosticsPool()
+        self.sweep = ReachabilitySweep()
+        self.history = ChatHistoryWriter()
         self.commands = {
             'status': self._cmd_status,
             'health': self._cmd_health,
@@ -23,47 +47,96 @@ class ChatOps:
             'ping': self._cmd_ping,
             'traceroute': self._cmd_traceroute,
             'check': self._cmd_check,
+            'sweep': self._cmd_sweep,
             'summarize': self._cmd_summarize,
             'report': self._cmd_report,
+            'perf': self._cmd_perf,
             'help': self._cmd_help
         }
     
     def process_message(self, user_message):
-        """Process a user message and return a bot response"""
+        """Process a user message and return the exchange, queued for writing to the history"""
+        stream = self.stream_message(user_message)
+        while True:
+            try:
+                next(stream)
+            except StopIteration as done:
+                return done.value
+    
+    def stream_message(self, user_message):
+        """Process a user message, yielding the reply in chunks as the command produces them
+        
+        Commands may return their reply or yield it in parts. The generator's return value is
+        the exchange, queued for writing to the history.
+        """
         start_time = datetime.utcnow()
         
         # Parse command
         command, args = self._parse_command(user_message)
         
+        # Serve repeated read-only commands from the cache
+        cache_key = None
+        cache_hit = None
+        if command in self.CACHED_COMMANDS:
+            cache_key = (command, tuple(arg.lower() for arg in args))
+            response = self.response_cache.get(cache_key)
+            cache_hit = response is not None
+        
         # Execute command
-        if command in self.commands:
+        streamed = []  # Parts of the reply already yielded
+        if cache_hit:
+            success = True
+        elif command in self.commands:
+            generation = data_generation()
             try:
                 response = self.commands[command](args)
+                if isinstance(response, GeneratorType):
+                    for chunk in response:
+                        streamed.append(chunk)
+                        yield chunk
+                    response = ''.join(streamed)
                 success = True
             except Exception as e:
-                response = f"❌ Error executing command: {str(e)}"
+                response = ''.join(streamed) + ('\n' if streamed else '') + f"❌ Error executing command: {str(e)}"
                 success = False
+            
+            if success and cache_key:
+                self.response_cache.put(cache_key, response, generation)
         else:
             # Try natural language understanding
             response = self._handle_natural_language(user_message)
             command = 'natural'
             success = True
         
+        # Diagnostics return their background job; the reply says where to follow it
+        job_id = None
+        if isinstance(response, DiagnosticJob):
+            job_id = response.id
+            response = (f"⏳ {response.command.capitalize()} to {response.target} started as job {job_id}. "
+                        f"Follow it at /api/chat/jobs/{job_id}")
+        
+        # Send whatever the command did not yield itself
+        rest = response[sum(len(chunk) for chunk in streamed):]
+        if rest:
+            yield rest
+        
         # Calculate execution time
         execution_time = (datetime.utcnow() - start_time).total_seconds()
         
-        # Save chat message
+        # Record chat message; it is written in the background
         chat_msg = ChatMessage(
+            timestamp=start_time,
             user_message=user_message,
             bot_response=response,
             command_type=command,
             execution_time=execution_time,
+            cache_hit=cache_hit,
+            job_id=job_id,
             success=success
         )
-        db.session.add(chat_msg)
-        db.session.commit()
+        self.history.record(chat_msg)
         
-        return response
+        return chat_msg
     
     def _parse_command(self, message):
         """Parse user message into command and arguments"""
@@ -83,19 +156,16 @@ class ChatOps:
         # Count recent logs and alerts
         one_hour_ago = datetime.utcnow() - timedelta(hours=1)
         
-        log_count = NetworkLog.query.filter(NetworkLog.timestamp >= one_hour_ago).count()
-        alert_count = Alert.query.filter(Alert.timestamp >= one_hour_ago).count()
-        open_alerts = Alert.query.filter(Alert.status == 'open').count()
-        critical_alerts = Alert.query.filter(
-            Alert.severity == 'critical',
-            Alert.status == 'open'
-        ).count()
+        log_count = sum(level_counts(one_hour_ago).values())
+        alert_count = sum(severity_counts(one_hour_ago).values())
+        open_count = open_alerts.count()
+        critical_alerts = open_alerts.count('critical')
         
         response = "📊 **System Status**\n\n"
         response += f"🕐 Last Hour Activity:\n"
         response += f"  • Logs processed: {log_count}\n"
         response += f"  • New alerts: {alert_count}\n"
-        response += f"  • Open alerts: {open_alerts}\n"
+        response += f"  • Open alerts: {open_count}\n"
         
         if critical_alerts > 0:
             response += f"  • ⚠️ **Critical alerts: {critical_alerts}**\n"
@@ -108,13 +178,14 @@ class ChatOps:
         """Get health check summary"""
         # Check error rates
         one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        logs = NetworkLog.query.filter(NetworkLog.timestamp >= one_hour_ago).all()
+        counts = level_counts(one_hour_ago)
+        total = sum(counts.values())
         
-        if not logs:
+        if not total:
             return "ℹ️ No recent logs to analyze health"
         
-        error_count = sum(1 for log in logs if log.level in ['ERROR', 'CRITICAL'])
-        error_rate = (error_count / len(logs)) * 100
+        error_count = counts['ERROR'] + counts['CRITICAL']
+        error_rate = (error_count / total) * 100
         
         response = "💚 **Health Check**\n\n"
         
@@ -126,7 +197,7 @@ class ChatOps:
             response += "🔴 System health is degraded\n"
         
         response += f"\n📈 Metrics:\n"
-        response += f"  • Total logs (1h): {len(logs)}\n"
+        response += f"  • Total logs (1h): {total}\n"
         response += f"  • Error rate: {error_rate:.2f}%\n"
         response += f"  • Errors: {error_count}\n"
         
@@ -138,31 +209,31 @@ class ChatOps:
         if args and args[0].isdigit():
             hours = int(args[0])
         
-        time_threshold = datetime.utcnow() - timedelta(hours=hours)
-        metrics = NetworkMetric.query.filter(NetworkMetric.timestamp >= time_threshold).all()
+        now = datetime.utcnow()
+        time_threshold = now - timedelta(hours=hours)
+        summary = get_summary(time_threshold, now)
         
-        if not metrics:
+        if not summary:
             return f"ℹ️ No metrics data available for the last {hours} hour(s)"
         
-        # Group metrics by name
-        metric_groups = {}
-        for metric in metrics:
-            if metric.metric_name not in metric_groups:
-                metric_groups[metric.metric_name] = []
-            metric_groups[metric.metric_name].append(metric.metric_value)
+        series, _ = get_series(list(summary), time_threshold, now, self.TREND_POINTS)
         
         response = f"📊 **Network Metrics** (last {hours}h)\n\n"
         
-        for name, values in metric_groups.items():
-            avg_value = sum(values) / len(values)
-            max_value = max(values)
-            min_value = min(values)
+        for name, stats in summary.items():
             response += f"**{name}**:\n"
-            response += f"  • Average: {avg_value:.2f}\n"
-            response += f"  • Min: {min_value:.2f} | Max: {max_value:.2f}\n\n"
+            response += f"  • Average: {stats['avg']:.2f}\n"
+            response += f"  • Min: {stats['min']:.2f} | Max: {stats['max']:.2f}\n"
+            response += f"  • Trend: `{self._sparkline(series.get(name, []), stats['min'], stats['max'])}`\n\n"
         
         return response
     
+    def _sparkline(self, points, low, high):
+        """Draw bucket averages as block characters scaled between low and high"""
+        span = (high - low) or 1
+        top = len(self.SPARK_LEVELS) - 1
+        return ''.join(self.SPARK_LEVELS[round((point.avg - low) / span * top)] for point in points)
+    
     def _cmd_logs(self, args):
         """Get filtered logs"""
         level = args[0].upper() if args else None
@@ -213,38 +284,46 @@ class ChatOps:
         
         time_threshold = datetime.utcnow() - timedelta(minutes=minutes)
         
-        logs = NetworkLog.query.filter(NetworkLog.timestamp >= time_threshold).all()
-        alerts = Alert.query.filter(Alert.timestamp >= time_threshold).all()
+        logs = level_counts(time_threshold)
+        alerts = severity_counts(time_threshold)
         
         response = f"⏱️ **Recent Activity** (last {minutes} minutes)\n\n"
-        response += f"📝 Logs: {len(logs)}\n"
+        response += f"📝 Logs: {sum(logs.values())}\n"
         
-        if logs:
-            level_counts = Counter(log.level for log in logs)
-            for level in ['CRITICAL', 'ERROR', 'WARNING', 'INFO']:
-                count = level_counts.get(level, 0)
-                if count > 0:
-                    response += f"  • {level}: {count}\n"
+        for level in ['CRITICAL', 'ERROR', 'WARNING', 'INFO']:
+            if logs[level] > 0:
+                response += f"  • {level}: {logs[level]}\n"
         
-        response += f"\n🚨 Alerts: {len(alerts)}\n"
+        response += f"\n🚨 Alerts: {sum(alerts.values())}\n"
         
-        if alerts:
-            severity_counts = Counter(alert.severity for alert in alerts)
-            for severity in ['critical', 'high', 'medium', 'low']:
-                count = severity_counts.get(severity, 0)
-                if count > 0:
-                    response += f"  • {severity.capitalize()}: {count}\n"
+        for severity in ['critical', 'high', 'medium', 'low']:
+            if alerts[severity] > 0:
+                response += f"  • {severity.capitalize()}: {alerts[severity]}\n"
+        
+        events = latest_events(time_threshold, self.RECENT_EVENTS)
+        if events:
+            response += f"\n🕒 **Latest**\n"
+            for timestamp, kind, row in events:
+                if kind == 'log':
+                    icon = self._get_level_icon(row.level)
+                    response += f"{icon} `{timestamp.strftime('%H:%M:%S')}` [{row.source}] {(row.message or '')[:80]}\n"
+                else:
+                    icon = self._get_severity_icon(row.severity)
+                    response += f"{icon} `{timestamp.strftime('%H:%M:%S')}` **{row.title}**\n"
         
         return response
     
     def _cmd_alerts(self, args):
         """Get current alerts"""
-        status = args[0] if args else 'open'
+        status = args[0].lower() if args else 'open'
         limit = 10
         
-        alerts = Alert.query.filter(
-            Alert.status == status
-        ).order_by(Alert.priority_score.desc(), Alert.timestamp.desc()).limit(limit).all()
+        if status == 'open':
+            alerts = open_alerts.top(limit)
+        else:
+            alerts = Alert.query.filter(
+                Alert.status == status
+            ).order_by(Alert.priority_score.desc(), Alert.timestamp.desc()).limit(limit).all()
         
         if not alerts:
             return f"ℹ️ No {status} alerts"
@@ -261,10 +340,7 @@ class ChatOps:
     
     def _cmd_critical(self, args):
         """Get critical alerts"""
-        alerts = Alert.query.filter(
-            Alert.severity == 'critical',
-            Alert.status == 'open'
-        ).order_by(Alert.timestamp.desc()).all()
+        alerts = sorted(open_alerts.top(severity='critical'), key=lambda alert: alert.timestamp, reverse=True)
         
         if not alerts:
             return "✅ No critical alerts"
@@ -280,76 +356,107 @@ class ChatOps:
         return response
     
     def _cmd_acknowledge(self, args):
-        """Acknowledge an alert"""
-        if not args or not args[0].isdigit():
-            return "❌ Usage: acknowledge <alert_id>"
-        
-        alert_id = int(args[0])
-        alert = Alert.query.get(alert_id)
-        
-        if not alert:
-            return f"❌ Alert {alert_id} not found"
+        """Acknowledge alerts by id, id range or filter"""
+        usage = "❌ Usage: acknowledge <id|from-to>[,...] [severity=|category=|source=|fingerprint=<value>]"
+        if not args:
+            return usage
+        
+        alert_ids = []
+        filters = {}
+        for arg in args:
+            if '=' in arg:
+                field, value = arg.split('=', 1)
+                if field not in self.ACK_FILTERS:
+                    return f"❌ Unknown filter '{field}'. Use one of: {', '.join(self.ACK_FILTERS)}"
+                filters[field] = value
+                continue
+            
+            for part in arg.split(','):
+                bounds = part.split('-')
+                if not part or len(bounds) > 2 or not all(bound.isdigit() for bound in bounds):
+                    return usage
+                first, last = int(bounds[0]), int(bounds[-1])
+                if last < first or last - first >= self.MAX_ACK_RANGE:
+                    return f"❌ Invalid range {part} (at most {self.MAX_ACK_RANGE} ids)"
+                alert_ids.extend(range(first, last + 1))
+        
+        # A single id keeps the detailed reply
+        if len(alert_ids) == 1 and not filters:
+            alert_id = alert_ids[0]
+            alert = self.alert_classifier.update_alert_status(alert_id, 'acknowledged')
+            
+            if not alert:
+                return f"❌ Alert {alert_id} not found"
+            
+            return f"✅ Alert {alert_id} acknowledged: {alert.title}"
         
-        alert.status = 'acknowledged'
-        alert.acknowledged_at = datetime.utcnow()
-        db.session.commit()
+        # Bulk acknowledgement never reopens resolved alerts
+        filters['status'] = 'open'
+        updated = self.alert_classifier.bulk_update_status(
+            'acknowledged', alert_ids=alert_ids or None, filters=filters
+        )
         
-        return f"✅ Alert {alert_id} acknowledged: {alert.title}"
+        return f"✅ Acknowledged {updated} alert{'s' if updated != 1 else ''}"
     
     def _cmd_ping(self, args):
-        """Ping a host"""
+        """Ping a host in the background"""
         if not args:
             return "❌ Usage: ping <host>"
         
-        host = args[0]
-        
-        try:
-            # Platform-specific ping command
-            param = '-n' if platform.system().lower() == 'windows' else '-c'
-            command = ['ping', param, '4', host]
-            
-            result = subprocess.run(command, capture_output=True, text=True, timeout=5)
-            
-            if result.returncode == 0:
-                return f"✅ Ping to {host} successful\n```\n{result.stdout[:500]}\n```"
-            else:
-                return f"❌ Ping to {host} failed"
-        except subprocess.TimeoutExpired:
-            return f"⏱️ Ping to {host} timed out"
-        except Exception as e:
-            return f"❌ Error: {str(e)}"
+        return self._start_job('ping', args[0])
     
     def _cmd_traceroute(self, args):
-        """Traceroute to a host"""
+        """Traceroute to a host in the background"""
         if not args:
             return "❌ Usage: traceroute <host>"
         
-        host = args[0]
+        return self._start_job('traceroute', args[0])
+    
+    def _start_job(self, command, host):
+        """Queue a diagnostic command, returning its job or a reply explaining why it wasn't"""
+        try:
+            job = self.diagnostics.submit(command, host)
+        except ValueError as e:
+            return f"❌ {str(e)}"
+        
+        if job is None:
+            return f"⏳ Too many diagnostics are running. Try {command} again shortly."
+        
+        return job
+    
+    def _cmd_sweep(self, args):
+        """Check reachability of many hosts at once"""
+        usage = "❌ Usage: sweep <host|cidr>[,...] [ports=22,80,443] [icmp]"
+        targets = [arg for arg in args if arg.lower() != 'icmp' and not arg.startswith('ports=')]
+        if not targets:
+            return usage
+        
+        ports = next((arg.split('=', 1)[1] for arg in args if arg.startswith('ports=')), None)
+        icmp = any(arg.lower() == 'icmp' for arg in args)
         
+        started = datetime.utcnow()
         try:
-            # Platform-specific traceroute command with optimized parameters
-            if platform.system().lower() == 'windows':
-                # -h 10: max 10 hops, -w 1000: wait 1 second per hop
-                command = ['tracert', '-h', '10', '-w', '1000', host]
-            else:
-                # -m 10: max 10 hops, -w 1: wait 1 second per hop
-                command = ['traceroute', '-m', '10', '-w', '1', host]
-            
-            # Increased timeout to 60 seconds
-            result = subprocess.run(command, capture_output=True, text=True, timeout=60)
-            
-            if result.returncode == 0 or result.stdout:
-                # Truncate output if too long
-                output = result.stdout[:1500] if result.stdout else result.stderr[:1500]
-                return f"🌐 Traceroute to {host}:\n```\n{output}\n```"
-            else:
-                return f"❌ Traceroute to {host} failed\n{result.stderr[:200]}"
-        except subprocess.TimeoutExpired:
-            return f"⏱️ Traceroute to {host} timed out after 60 seconds. Try a closer host or reduce hops."
-        except FileNotFoundError:
-            return f"❌ Traceroute command not found on this system"
-        except Exception as e:
-            return f"❌ Error: {str(e)}"
+            results = self.sweep.run(targets, ports=ports, icmp=icmp)
+        except ValueError as e:
+            return f"❌ {str(e)}\n{usage}"
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        
+        reachable = sum(result.reachable for result in results)
+        response = f"📡 **Sweep** {' '.join(targets)}: {reachable}/{len(results)} reachable in {elapsed:.2f}s\n"
+        
+        # Unreachable hosts first, since they are what a sweep is looking for
+        rows = sorted(results, key=lambda result: result.reachable)
+        width = max(len(result.host) for result in results) + 2
+        response += "```\n"
+        response += f"{'HOST':<{width}}{'STATE':<8}{'PORT':>6}{'TCP ms':>10}{'ICMP ms':>10}\n"
+        for result in rows:
+            port = result.port if result.port is not None else '-'
+            tcp_ms = f"{result.tcp_ms:.2f}" if result.tcp_ms is not None else '-'
+            icmp_ms = f"{result.icmp_ms:.2f}" if result.icmp_ms is not None else '-'
+            response += f"{result.host:<{width}}{result.state:<8}{port:>6}{tcp_ms:>10}{icmp_ms:>10}\n"
+        response += "```"
+        
+        return response
     
     def _cmd_check(self, args):
         """Check service status"""
@@ -362,7 +469,7 @@ class ChatOps:
         return f"ℹ️ Service check for '{service}' would be executed here"
     
     def _cmd_summarize(self, args):
-        """Get log summary"""
+        """Get log summary, yielding the header before the summary text"""
         hours = 1
         if args and args[0].isdigit():
             hours = int(args[0])
@@ -370,50 +477,72 @@ class ChatOps:
         summaries = LogSummary.query.order_by(LogSummary.created_at.desc()).limit(3).all()
         
         if not summaries:
-            return "ℹ️ No summaries available. Generate one with: summarize <hours>"
+            yield "ℹ️ No summaries available. Generate one with: summarize <hours>"
+            return
         
         latest = summaries[0]
         
-        response = f"📊 **Latest Log Summary**\n\n"
-        response += f"Time range: {latest.start_time.strftime('%H:%M')} - {latest.end_time.strftime('%H:%M')}\n\n"
-        response += latest.summary_text
-        
-        return response
+        yield f"📊 **Latest Log Summary**\n\n"
+        yield f"Time range: {latest.start_time.strftime('%H:%M')} - {latest.end_time.strftime('%H:%M')}\n\n"
+        yield latest.summary_text
     
     def _cmd_report(self, args):
-        """Get comprehensive report"""
+        """Get comprehensive report, yielding each section as it is ready"""
         one_hour_ago = datetime.utcnow() - timedelta(hours=1)
         
-        logs = NetworkLog.query.filter(NetworkLog.timestamp >= one_hour_ago).all()
-        alerts = Alert.query.filter(Alert.timestamp >= one_hour_ago).all()
-        
-        response = "📋 **System Report** (Last Hour)\n\n"
+        yield "📋 **System Report** (Last Hour)\n\n"
         
         # Logs summary
+        logs = level_counts(one_hour_ago)
+        response = ""
         if logs:
-            level_counts = Counter(log.level for log in logs)
-            response += f"**Logs**: {len(logs)} total\n"
-            for level, count in level_counts.most_common():
+            response += f"**Logs**: {sum(logs.values())} total\n"
+            for level, count in logs.most_common():
                 response += f"  • {level}: {count}\n"
         
         response += f"\n"
+        yield response
         
         # Alerts summary
+        alerts = severity_counts(one_hour_ago)
+        response = ""
         if alerts:
-            severity_counts = Counter(alert.severity for alert in alerts)
-            response += f"**Alerts**: {len(alerts)} total\n"
-            for severity, count in severity_counts.most_common():
+            response += f"**Alerts**: {sum(alerts.values())} total\n"
+            for severity, count in alerts.most_common():
                 response += f"  • {severity.capitalize()}: {count}\n"
+            yield response
         
         # Open issues
-        open_critical = Alert.query.filter(
-            Alert.severity == 'critical',
-            Alert.status == 'open'
-        ).count()
+        open_critical = open_alerts.count('critical')
         
-        response += f"\n**Current Issues**:\n"
+        response = f"\n**Current Issues**:\n"
         response += f"  • Open critical alerts: {open_critical}\n"
         
+        yield response
+    
+    def _cmd_perf(self, args):
+        """Get per-command latency, error rate and volume"""
+        minutes = 60
+        if args and args[0].isdigit():
+            minutes = min(max(int(args[0]), 1), MAX_WINDOW_MINUTES)
+        
+        stats = get_command_stats(minutes)
+        totals = stats['totals']
+        if not totals['calls']:
+            return f"ℹ️ No commands recorded in the last {minutes} minutes"
+        
+        response = f"⏱️ **Command Performance** (last {minutes} minutes)\n"
+        response += f"{totals['calls']} calls, {totals['error_rate'] * 100:.1f}% errors, p95 {totals['p95_ms']}ms\n"
+        
+        # Slowest (by p95) first
+        width = max(len(command) for command in stats['commands']) + 2
+        response += "```\n"
+        response += f"{'COMMAND':<{width}}{'CALLS':>7}{'ERR%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}\n"
+        for command, row in stats['commands'].items():
+            response += (f"{command:<{width}}{row['calls']:>7}{row['error_rate'] * 100:>7.1f}"
+                         f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}\n")
+        response += "```"
+        
         return response
     
     def _cmd_help(self, args):
@@ -432,16 +561,18 @@ class ChatOps:
         response += "**Alerts**:\n"
         response += "  • `alerts [status]` - View alerts\n"
         response += "  • `critical` - View critical alerts\n"
-        response += "  • `acknowledge <id>` - Acknowledge alert\n\n"
+        response += "  • `acknowledge <id|from-to|filter>` - Acknowledge alerts\n\n"
         
         response += "**Diagnostics**:\n"
         response += "  • `ping <host>` - Ping a host\n"
         response += "  • `traceroute <host>` - Trace route\n"
-        response += "  • `check <service>` - Check service\n\n"
+        response += "  • `check <service>` - Check service\n"
+        response += "  • `sweep <host|cidr>[,...] [ports=...] [icmp]` - Reachability of many hosts\n\n"
         
         response += "**Reports**:\n"
         response += "  • `summarize [hours]` - Log summary\n"
         response += "  • `report` - Comprehensive report\n"
+        response += "  • `perf [minutes]` - Command latency and error rates\n"
         
         return response
     
@@ -484,5 +615,5 @@ class ChatOps:
         return icons.get(severity, '•')
     
     def get_chat_history(self, limit=50):
-        """Get recent chat history"""
-        return ChatMessage.query.order_by(ChatMessage.timestamp.desc()).limit(limit).all()
+        """Get recent chat history, newest first"""
+        return self.history.recent(limit)
@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from models import CommandLatencyStat, db
+from services.activity_rollup import minute_of
+from services.lifecycle_stats import bucket_index, sketch_quantile
+
+
+MAX_WINDOW_MINUTES = 7 * 24 * 60  # Rows older than this are pruned
+QUANTILES = (('p50_ms', 0.5), ('p95_ms', 0.95), ('p99_ms', 0.99))
+
+
+def _upsert():
+    """INSERT ... ON CONFLICT for the bound database"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    statement = insert(CommandLatencyStat)
+    return statement.on_conflict_do_update(
+        index_elements=['minute', 'command', 'bucket'],
+        set_={
+            'count': CommandLatencyStat.count + statement.excluded.count,
+            'errors': CommandLatencyStat.errors + statement.excluded.errors,
+            'total_ms': CommandLatencyStat.total_ms + statement.excluded.total_ms
+        }
+    )
+
+
+def record_commands(messages):
+    """Add ChatMessages' latency and outcome to the per-minute sketches, in the current transaction"""
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for message in messages:
+        # Sketch buckets over microseconds, so sub-millisecond cached replies stay distinct
+        bucket = bucket_index((message.execution_time or 0.0) * 1000000)
+        delta = deltas[(minute_of(message.timestamp), message.command_type or 'unknown', bucket)]
+        delta[0] += 1
+        delta[1] += 0 if message.success else 1
+        delta[2] += (message.execution_time or 0.0) * 1000
+    
+    if deltas:
+        db.session.execute(_upsert(), [
+            {'minute': minute, 'command': command, 'bucket': bucket, 'count': count, 'errors': errors,
+             'total_ms': total_ms}
+            for (minute, command, bucket), (count, errors, total_ms) in deltas.items()
+        ])
+
+
+def prune(now=None):
+    """Delete sketch rows older than the longest window, in the current transaction"""
+    cutoff = minute_of((now or datetime.utcnow()) - timedelta(minutes=MAX_WINDOW_MINUTES))
+    return CommandLatencyStat.query.filter(CommandLatencyStat.minute < cutoff).delete(synchronize_session=False)
+
+
+def _summarize(count, errors, total_ms, buckets):
+    stats = {
+        'calls': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'avg_ms': round(total_ms / count, 3) if count else None
+    }
+    for name, quantile in QUANTILES:
+        micros = sketch_quantile(buckets, quantile)
+        stats[name] = round(micros / 1000, 3) if micros is not None else None
+    return stats
+
+
+def get_command_stats(minutes=60):
+    """Get calls, error rate and p50/p95/p99 latency per ChatOps command over the last `minutes`
+    
+    Reads the sketch rows only, so the cost follows the window's length and the number of
+    commands, not how many messages were sent.
+    """
+    since = minute_of(datetime.utcnow() - timedelta(minutes=minutes))
+    rows = db.session.query(
+        CommandLatencyStat.command, CommandLatencyStat.bucket, db.func.sum(CommandLatencyStat.count),
+        db.func.sum(CommandLatencyStat.errors), db.func.sum(CommandLatencyStat.total_ms)
+    ).filter(
+        CommandLatencyStat.minute >= since
+    ).group_by(CommandLatencyStat.command, CommandLatencyStat.bucket)
+    
+    totals = defaultdict(lambda: [0, 0, 0.0, defaultdict(int)])
+    for command, bucket, count, errors, total_ms in rows:
+        for key in (command, None):
+            summary = totals[key]
+            summary[0] += count
+            summary[1] += errors
+            summary[2] += total_ms
+            summary[3][bucket] += count
+    
+    overall = totals.pop(None, [0, 0, 0.0, {}])
+    commands = {command: _summarize(*summary) for command, summary in totals.items()}
+    return {
+        'since': since.isoformat(),
+        'minutes': minutes,
+        'totals': _summarize(*overall),
+        'commands': dict(sorted(commands.items(), key=lambda item: item[1]['p95_ms'] or 0, reverse=True))
+    }
@@ -0,0 +1,166 @@
+import os
+import platform
+import re
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from models import DiagnosticJob, db
+
+
+HOST_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9.:-]{0,253}$')  # Host names and IP addresses, never options
+MAX_OUTPUT = 8000  # Characters of command output kept per job
+FINISHED_STATUSES = ('succeeded', 'failed', 'timed_out')
+
+
+def command_line(command, target):
+    """Get the argument list running a diagnostic command on this platform"""
+    windows = platform.system().lower() == 'windows'
+    if command == 'ping':
+        return ['ping', '-n' if windows else '-c', '4', target]
+    if windows:
+        # -h 10: max 10 hops, -w 1000: wait 1 second per hop
+        return ['tracert', '-h', '10', '-w', '1000', target]
+    # -m 10: max 10 hops, -w 1: wait 1 second per hop
+    return ['traceroute', '-m', '10', '-w', '1', target]
+
+
+def _kill(process):
+    if os.name != 'posix':
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class DiagnosticsPool:
+    """Bounded thread pool that runs ping and traceroute off the request path
+    
+    Each command is a row in diagnostic_jobs, so whichever worker answers a poll sees its
+    status and output so far. Commands run in the process that accepted them, at most
+    max_workers at once with up to max_pending accepted, and are killed after `timeout`
+    seconds.
+    """
+    
+    def __init__(self, max_workers=4, max_pending=16, timeout=30, flush_interval=0.5, retention=86400):
+        self.max_workers = max_workers
+        self.max_pending = max_pending  # Queued plus running jobs; more are refused
+        self.timeout = timeout
+        self.flush_interval = flush_interval  # Seconds between output writes while a command runs
+        self.retention = retention  # Seconds finished jobs are kept
+        self.app = None
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Bind the app whose context the pool's threads run in"""
+        self.app = app
+    
+    def submit(self, command, target):
+        """Queue a diagnostic command; returns its job, or None while the pool is full"""
+        if not HOST_PATTERN.match(target):
+            raise ValueError(f"Invalid host '{target}'")
+        
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='diagnostics')
+        
+        try:
+            job = DiagnosticJob(command=command, target=target)
+            db.session.add(job)
+            DiagnosticJob.query.filter(
+                DiagnosticJob.created_at < datetime.utcnow() - timedelta(seconds=self.retention),
+                DiagnosticJob.status.in_(FINISHED_STATUSES)
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            
+            self._executor.submit(self._run, job.id, command_line(command, target))
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        
+        return job
+    
+    def _run(self, job_id, argv):
+        try:
+            with self.app.app_context():
+                try:
+                    self._execute(db.session.get(DiagnosticJob, job_id), argv)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Diagnostic job %s failed', job_id)
+                    DiagnosticJob.query.filter_by(id=job_id).update(
+                        {'status': 'failed', 'finished_at': datetime.utcnow()}, synchronize_session=False
+                    )
+                    db.session.commit()
+                finally:
+                    db.session.remove()
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def _execute(self, job, argv):
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        
+        try:
+            # Its own process group, so a timeout also kills anything the command started
+            process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                       start_new_session=os.name == 'posix')
+        except FileNotFoundError:
+            self._finish(job, 'failed', None, f'{argv[0]} command not found on this system\n')
+            return
+        
+        timed_out = threading.Event()
+        
+        def kill():
+            timed_out.set()
+            _kill(process)
+        
+        timer = threading.Timer(self.timeout, kill)
+        timer.daemon = True
+        timer.start()
+        
+        output = []
+        size = 0
+        flushed_at = time.monotonic()
+        try:
+            for line in process.stdout:
+                if size < MAX_OUTPUT:
+                    output.append(line[:MAX_OUTPUT - size])
+                    size += len(output[-1])
+                
+                # Pollers see the output so far
+                if time.monotonic() - flushed_at >= self.flush_interval:
+                    job.output = ''.join(output)
+                    db.session.commit()
+                    flushed_at = time.monotonic()
+            exit_code = process.wait()
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                _kill(process)
+                process.wait()
+        
+        if timed_out.is_set():
+            output.append(f'\nKilled after {self.timeout}s\n')
+            self._finish(job, 'timed_out', exit_code, ''.join(output))
+        else:
+            self._finish(job, 'succeeded' if exit_code == 0 else 'failed', exit_code, ''.join(output))
+    
+    def _finish(self, job, status, exit_code, output):
+        job.status = status
+        job.exit_code = exit_code
+        job.output = output
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
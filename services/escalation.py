@@ -0,0 +1,138 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from sqlalchemy import bindparam, update
+from models import Alert, db
+from services.cache_sync import acquire_lease
+from services.instrumentation import ESCALATION_PASS_TIME, ESCALATION_ROWS
+from services.open_alerts import open_alerts
+from services.response_cache import mark_data_changed
+
+
+class EscalationScheduler:
+    """Background job that re-scores open alerts by age and auto-acknowledges the ones that fade
+    
+    An open alert's score is its classification-time base_priority plus its severity's rate
+    for every full `step` seconds of age, clamped to [0, 1]. Scores move in whole steps,
+    so a pass only rewrites alerts that crossed a step boundary since the last one. A
+    lease in the database keeps concurrent workers from running passes at the same time.
+    """
+    
+    LEASE_NAME = 'alert_escalation'
+    
+    def __init__(self, interval=300, step=3600, rates=None, auto_ack_threshold=0.3, batch_size=1000,
+                 history=20):
+        self.interval = interval  # Seconds between passes; 0 disables the scheduler
+        self.step = step
+        self.rates = dict(rates or {})  # severity -> score change per step of age
+        self.auto_ack_threshold = auto_ack_threshold
+        self.batch_size = batch_size
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self.passes = deque(maxlen=history)  # Stats of recent passes, newest last
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self, app):
+        """Run passes every `interval` seconds in a daemon thread (once per process)"""
+        if self._thread is not None or not self.interval:
+            return
+        with self._lock:
+            if not self.interval or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, args=(app,), name='alert-escalation', daemon=True)
+            self._thread.start()
+    
+    def _run(self, app):
+        while self.interval:
+            time.sleep(self.interval)
+            with app.app_context():
+                try:
+                    # The lease outlives one interval so a slow pass isn't run twice
+                    if acquire_lease(self.LEASE_NAME, self.owner, self.interval * 2):
+                        self.run_pass()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Alert escalation pass failed')
+                finally:
+                    db.session.remove()
+    
+    def score(self, base, severity, timestamp, now):
+        """Get an alert's age-adjusted priority score"""
+        steps = int((now - timestamp).total_seconds() // self.step) if self.step else 0
+        adjusted = base + self.rates.get(severity, 0.0) * max(0, steps)
+        return round(min(1.0, max(0.0, adjusted)), 4)
+    
+    def run_pass(self, now=None):
+        """Re-score every open alert in batches; returns the pass's stats"""
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        scanned = rescored = acknowledged = 0
+        last_id = 0
+        
+        while True:
+            rows = db.session.query(
+                Alert.id, Alert.severity, Alert.timestamp, Alert.priority_score,
+                db.func.coalesce(Alert.base_priority, Alert.priority_score)
+            ).filter(
+                Alert.status == 'open', Alert.id > last_id
+            ).order_by(Alert.id).limit(self.batch_size).all()
+            
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+            
+            changed = {}
+            fading = []
+            for alert_id, severity, timestamp, current, base in rows:
+                score = self.score(base, severity, timestamp, now)
+                if score < self.auto_ack_threshold <= (current or 0.0):
+                    fading.append(alert_id)
+                if score != round(current or 0.0, 4):
+                    changed[alert_id] = (score, base)
+            
+            if changed:
+                # One executemany; status is checked again so a concurrent acknowledgement stands
+                table = Alert.__table__
+                db.session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam('alert_id'), table.c.status == 'open')
+                    .values(priority_score=bindparam('score'), base_priority=bindparam('base')),
+                    [{'alert_id': alert_id, 'score': score, 'base': base}
+                     for alert_id, (score, base) in changed.items()]
+                )
+            if fading:
+                db.session.execute(
+                    update(Alert)
+                    .where(Alert.id.in_(fading), Alert.status == 'open')
+                    .values(status='acknowledged', acknowledged_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+            
+            rescored += len(changed)
+            acknowledged += len(fading)
+            for alert_id in fading:
+                changed.pop(alert_id, None)
+                open_alerts.discard(alert_id)
+            open_alerts.reprioritize({alert_id: score for alert_id, (score, _) in changed.items()})
+            if changed or fading:
+                mark_data_changed()
+        
+        elapsed = time.perf_counter() - started
+        ESCALATION_PASS_TIME.observe(elapsed)
+        ESCALATION_ROWS.inc(rescored, 'rescored')
+        ESCALATION_ROWS.inc(acknowledged, 'auto_acknowledged')
+        
+        stats = {
+            'finished_at': datetime.utcnow().isoformat(),
+            'scanned': scanned,
+            'rescored': rescored,
+            'auto_acknowledged': acknowledged,
+            'seconds': round(elapsed, 4)
+        }
+        self.passes.append(stats)
+        return stats
@@ -0,0 +1,254 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models import db
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+RULE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labels, extra=None):
+    pairs = list(zip(labelnames, labels))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def get(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+    
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative bucketed distribution per label set"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+    
+    def get_snapshot(self, *labels):
+        """Get (per-bucket counts, total count, sum) for one label set"""
+        with self._lock:
+            series = list(self._series.get(labels) or [0] * (len(self.buckets) + 2))
+        return series[:-1], sum(series[:-1]), series[-1]
+    
+    def get_quantile(self, quantile, *labels):
+        """Estimate a quantile as the upper bound of the bucket that contains it"""
+        counts, total, _ = self.get_snapshot(*labels)
+        if not total:
+            return None
+        
+        rank = quantile * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+    
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(float(bound))
+                yield f'{self.name}_bucket', _format_labels(self.labelnames, labels, ('le', le)), cumulative
+            yield f'{self.name}_count', _format_labels(self.labelnames, labels), cumulative
+            yield f'{self.name}_sum', _format_labels(self.labelnames, labels), series[-1]
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics rendered in Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics = []
+    
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    'http_requests_total', 'HTTP requests by route and status', ('endpoint', 'method', 'status'))
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('endpoint', 'method'))
+RESPONSE_SIZE = registry.histogram(
+    'http_response_size_bytes', 'HTTP response body size by route', ('endpoint',), SIZE_BUCKETS)
+REQUEST_STATEMENTS = registry.histogram(
+    'http_request_db_statements', 'SQL statements executed per request', ('endpoint',), COUNT_BUCKETS)
+REQUEST_DB_TIME = registry.histogram(
+    'http_request_db_seconds', 'Time spent in SQL statements per request', ('endpoint',))
+DB_STATEMENTS = registry.counter(
+    'db_statements_total', 'SQL statements executed')
+DB_TIME = registry.counter(
+    'db_statement_seconds_total', 'Time spent in SQL statements')
+COMMIT_LATENCY = registry.histogram(
+    'db_commit_duration_seconds', 'Session commit latency including flush')
+INGESTED_ROWS = registry.counter(
+    'ingested_rows_total', 'Rows written by ingest endpoints; use rate() for rows/sec', ('kind',))
+INGEST_BATCH_LATENCY = registry.histogram(
+    'ingest_batch_duration_seconds', 'Time to validate and store one ingest batch', ('kind',))
+RULE_SEARCH_TIME = registry.histogram(
+    'alert_rule_search_seconds', 'Time spent in each alert rule regex search', ('rule',), RULE_BUCKETS)
+RULE_HITS = registry.counter(
+    'alert_rule_hits_total', 'Alerts matched by each alert rule', ('rule',))
+LOG_ALERT_STAGE_TIME = registry.histogram(
+    'log_alert_stage_seconds', 'Time the log-to-alert stage adds to one log ingest batch')
+LOG_ALERTS = registry.counter(
+    'log_alerts_total', 'Alerts raised from ingested logs by trigger, and alerts suppressed', ('trigger',))
+ESCALATION_PASS_TIME = registry.histogram(
+    'alert_escalation_pass_seconds', 'Duration of one alert escalation pass')
+ESCALATION_ROWS = registry.counter(
+    'alert_escalation_rows_total', 'Alerts rewritten by escalation passes, by change', ('change',))
+SWEEP_TIME = registry.histogram(
+    'network_sweep_seconds', 'Duration of one reachability sweep, including storing its metrics')
+SWEEP_HOSTS = registry.counter(
+    'network_sweep_hosts_total', 'Hosts checked by reachability sweeps, by outcome', ('outcome',))
+CHAT_HISTORY_FLUSH_TIME = registry.histogram(
+    'chat_history_flush_seconds', 'Time to write one batch of chat messages')
+CHAT_HISTORY_ROWS = registry.counter(
+    'chat_history_rows_total', 'Chat messages written, dropped before writing, or deleted by retention', ('change',))
+
+
+def record_ingest(kind, rows, started):
+    """Record an ingest batch of `rows` that began at perf_counter() `started`"""
+    INGESTED_ROWS.inc(rows, kind)
+    INGEST_BATCH_LATENCY.observe(time.perf_counter() - started, kind)
+
+
+def init_app(app):
+    """Attach request, SQL and commit instrumentation to an app"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    
+    if not event.contains(db.session, 'before_commit', _before_commit):
+        event.listen(db.session, 'before_commit', _before_commit)
+        event.listen(db.session, 'after_commit', _after_commit)
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_statements = 0
+    g.metrics_db_time = 0.0
+
+
+def _finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    
+    endpoint = request.endpoint or 'unmatched'
+    REQUESTS.inc(1, endpoint, request.method, response.status_code)
+    REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint, request.method)
+    REQUEST_STATEMENTS.observe(g.pop('metrics_statements', 0), endpoint)
+    REQUEST_DB_TIME.observe(g.pop('metrics_db_time', 0.0), endpoint)
+    
+    # Streamed responses have no length up front
+    if response.content_length is not None:
+        RESPONSE_SIZE.observe(response.content_length, endpoint)
+    
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_statement_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_statement_started', None)
+    if started is None:
+        return
+    
+    elapsed = time.perf_counter() - started
+    DB_STATEMENTS.inc(1)
+    DB_TIME.inc(elapsed)
+    
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_statements += 1
+        g.metrics_db_time += elapsed
+
+
+def _before_commit(session):
+    session.info['metrics_commit_started'] = time.perf_counter()
+
+
+def _after_commit(session):
+    started = session.info.pop('metrics_commit_started', None)
+    if started is not None:
+        COMMIT_LATENCY.observe(time.perf_counter() - started)
@@ -0,0 +1,152 @@
+import math
+from collections import defaultdict
+from models import AlertLifecycleStat, db
+
+
+RELATIVE_ACCURACY = 0.05  # Quantile estimates are within 5% of an actual duration
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+METRICS = ('created', 'acknowledged', 'resolved')
+
+
+def bucket_index(seconds):
+    """Get the sketch bucket of a duration: bucket i holds (GAMMA**(i-1), GAMMA**i] seconds"""
+    if seconds <= 1:
+        return 0
+    return math.ceil(math.log(seconds) / LOG_GAMMA)
+
+
+def bucket_value(index):
+    """Estimate the durations in a bucket, within RELATIVE_ACCURACY of each of them"""
+    if index == 0:
+        return 0.0  # Under a second
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+def sketch_quantile(buckets, quantile):
+    """Estimate a quantile from {bucket: count}"""
+    total = sum(buckets.values())
+    if not total:
+        return None
+    
+    rank = quantile * (total - 1)
+    seen = 0
+    for index in sorted(buckets):
+        seen += buckets[index]
+        if seen > rank:
+            return round(bucket_value(index), 1)
+    return round(bucket_value(max(buckets)), 1)
+
+
+def _upsert():
+    """INSERT ... ON CONFLICT for the bound database"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    statement = insert(AlertLifecycleStat)
+    return statement.on_conflict_do_update(
+        index_elements=['day', 'category', 'severity', 'metric', 'bucket'],
+        set_={
+            'count': AlertLifecycleStat.count + statement.excluded.count,
+            'total_seconds': AlertLifecycleStat.total_seconds + statement.excluded.total_seconds
+        }
+    )
+
+
+def _add(deltas):
+    if not deltas:
+        return
+    
+    db.session.execute(_upsert(), [
+        {'day': day, 'category': category, 'severity': severity, 'metric': metric, 'bucket': bucket,
+         'count': count, 'total_seconds': seconds}
+        for (day, category, severity, metric, bucket), (count, seconds) in deltas.items()
+    ])
+
+
+def record_created(alerts):
+    """Count new alerts, given as (timestamp, category, severity), in the current transaction"""
+    deltas = defaultdict(lambda: [0, 0.0])
+    for timestamp, category, severity in alerts:
+        deltas[(timestamp.date(), category, severity, 'created', 0)][0] += 1
+    _add(deltas)
+
+
+def record_transitions(metric, alerts, now):
+    """Add alerts, given as (timestamp, category, severity), reaching `metric` at `now`
+    
+    Runs in the current transaction, so the aggregates commit with the status change.
+    """
+    deltas = defaultdict(lambda: [0, 0.0])
+    for timestamp, category, severity in alerts:
+        seconds = max(0.0, (now - timestamp).total_seconds())
+        delta = deltas[(timestamp.date(), category, severity, metric, bucket_index(seconds))]
+        delta[0] += 1
+        delta[1] += seconds
+    _add(deltas)
+
+
+class _Summary:
+    __slots__ = ('counts', 'seconds', 'buckets')
+    
+    def __init__(self):
+        self.counts = dict.fromkeys(METRICS, 0)
+        self.seconds = dict.fromkeys(METRICS, 0.0)
+        self.buckets = {'acknowledged': defaultdict(int), 'resolved': defaultdict(int)}
+    
+    def add(self, metric, bucket, count, seconds):
+        self.counts[metric] += count
+        self.seconds[metric] += seconds
+        if metric in self.buckets:
+            self.buckets[metric][bucket] += count
+    
+    def to_dict(self):
+        result = {
+            'created': self.counts['created'],
+            'acknowledged': self.counts['acknowledged'],
+            'resolved': self.counts['resolved']
+        }
+        for prefix, metric in (('mtta', 'acknowledged'), ('mttr', 'resolved')):
+            count = self.counts[metric]
+            result[f'{prefix}_seconds'] = round(self.seconds[metric] / count, 1) if count else None
+            result[f'{prefix}_p50_seconds'] = sketch_quantile(self.buckets[metric], 0.5)
+            result[f'{prefix}_p95_seconds'] = sketch_quantile(self.buckets[metric], 0.95)
+        return result
+
+
+def get_analytics(start_day, end_day, category=None, severity=None):
+    """Get lifecycle totals, and breakdowns by day, category and severity, for raise days in a range
+    
+    Reads the aggregate rows only, so the cost depends on the days covered, not on alert volume.
+    """
+    query = db.session.query(
+        AlertLifecycleStat.day, AlertLifecycleStat.category, AlertLifecycleStat.severity,
+        AlertLifecycleStat.metric, AlertLifecycleStat.bucket, AlertLifecycleStat.count,
+        AlertLifecycleStat.total_seconds
+    ).filter(AlertLifecycleStat.day >= start_day, AlertLifecycleStat.day <= end_day)
+    
+    if category:
+        query = query.filter(AlertLifecycleStat.category == category)
+    if severity:
+        query = query.filter(AlertLifecycleStat.severity == severity)
+    
+    totals = _Summary()
+    by_day = defaultdict(_Summary)
+    by_category = defaultdict(_Summary)
+    by_severity = defaultdict(_Summary)
+    
+    for day, row_category, row_severity, metric, bucket, count, seconds in query:
+        for summary in (totals, by_day[day], by_category[row_category], by_severity[row_severity]):
+            summary.add(metric, bucket, count, seconds)
+    
+    return {
+        'start_day': start_day.isoformat(),
+        'end_day': end_day.isoformat(),
+        'totals': totals.to_dict(),
+        'by_day': [{'day': day.isoformat(), **by_day[day].to_dict()} for day in sorted(by_day)],
+        'by_category': {name: summary.to_dict() for name, summary in sorted(by_category.items())},
+        'by_severity': {name: summary.to_dict() for name, summary in sorted(by_severity.items())}
+    }
@@ -0,0 +1,223 @@
+import bisect
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from models import AlertThreshold, db
+from services.cache_sync import VersionedCache, bump_version
+from services.instrumentation import LOG_ALERT_STAGE_TIME, LOG_ALERTS
+
+
+LEVEL_RANKS = {'DEBUG': 0, 'INFO': 1, 'WARNING': 2, 'ERROR': 3, 'CRITICAL': 4}
+TITLE_LENGTH = 200  # Alert.title column size
+
+
+class ThresholdSpec:
+    """Immutable copy of an enabled threshold rule"""
+    
+    __slots__ = ('id', 'name', 'level', 'source', 'count', 'window')
+    
+    def __init__(self, threshold):
+        self.id = threshold.id
+        self.name = threshold.name
+        self.level = threshold.level
+        self.source = threshold.source
+        self.count = threshold.count
+        self.window = timedelta(seconds=threshold.window_seconds)
+
+
+class LogAlertStage:
+    """Streaming stage on log ingest that raises alerts through the alert classifier
+    
+    A log becomes an alert when its level is at least alert_level, or at least rule_level
+    and an alert rule matches its message. Threshold rules count each source's logs of a
+    level in sliding windows held in memory, so they see what this worker ingests.
+    """
+    
+    THRESHOLDS_CACHE = 'alert_thresholds'
+    
+    def __init__(self, classifier, alert_level='CRITICAL', rule_level='ERROR', max_alerts=100,
+                 check_interval=1.0, max_windows=10000):
+        self.classifier = classifier
+        self.alert_level = alert_level
+        self.rule_level = rule_level
+        self.max_alerts = max_alerts  # Alerts raised per batch; the rest are counted as suppressed
+        self.max_windows = max_windows
+        self._thresholds = VersionedCache(self.THRESHOLDS_CACHE, self._load_thresholds, check_interval)
+        self._windows = {}  # (threshold id, source) -> sorted deque of log timestamps
+        self._longest_window = timedelta(0)
+        self._lock = threading.Lock()
+    
+    def _load_thresholds(self):
+        by_level = {}
+        for threshold in AlertThreshold.query.filter_by(enabled=True).all():
+            spec = ThresholdSpec(threshold)
+            by_level.setdefault(spec.level, []).append(spec)
+            self._longest_window = max(self._longest_window, spec.window)
+        return by_level
+    
+    def process(self, entries):
+        """Evaluate a committed batch of (timestamp, source, level, message) logs and store its alerts
+        
+        Returns {'raised', 'suppressed'}.
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        rule_set = self.classifier.get_rule_set()
+        thresholds = self._thresholds.get()
+        alert_rank = LEVEL_RANKS.get(self.alert_level, 4)
+        rule_rank = LEVEL_RANKS.get(self.rule_level, 4)
+        
+        items = []
+        triggers = []
+        suppressed = 0
+        
+        for timestamp, source, level, message in entries:
+            rank = LEVEL_RANKS.get(level, 1)
+            
+            trigger = None
+            if rank >= alert_rank:
+                trigger = 'level'
+            elif rank >= rule_rank and message and rule_set.match(message.lower()):
+                trigger = 'rule'
+            
+            if trigger:
+                if len(items) < self.max_alerts:
+                    items.append(self._log_alert(timestamp, source, level, message))
+                    triggers.append(trigger)
+                else:
+                    suppressed += 1
+            
+            for threshold in thresholds.get(level, ()):
+                if threshold.source and threshold.source != source:
+                    continue
+                if not self._count(threshold, source, timestamp, now):
+                    continue
+                if len(items) < self.max_alerts:
+                    items.append(self._threshold_alert(threshold, timestamp, source, message))
+                    triggers.append('threshold')
+                else:
+                    suppressed += 1
+        
+        if items:
+            results = self.classifier.classify_batch(items)
+            for trigger, result in zip(triggers, results):
+                if 'error' not in result:
+                    LOG_ALERTS.inc(1, trigger)
+        if suppressed:
+            LOG_ALERTS.inc(suppressed, 'suppressed')
+        
+        LOG_ALERT_STAGE_TIME.observe(time.perf_counter() - started)
+        return {'raised': len(items), 'suppressed': suppressed}
+    
+    def _count(self, threshold, source, timestamp, now):
+        """Add a log to its sliding window; True when it brings the window to the threshold"""
+        
+        # Backfilled logs older than the window can't trip a live threshold
+        if timestamp < now - threshold.window:
+            return False
+        
+        key = (threshold.id, source)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                if len(self._windows) >= self.max_windows:
+                    self._prune(now)
+                window = self._windows[key] = deque()
+            
+            if not window or timestamp >= window[-1]:
+                window.append(timestamp)
+            else:
+                window.insert(bisect.bisect_right(window, timestamp), timestamp)
+            
+            # Only the newest `count` timestamps within the window matter
+            while window[0] < window[-1] - threshold.window or len(window) > threshold.count:
+                window.popleft()
+            
+            if len(window) < threshold.count:
+                return False
+            
+            # Start counting afresh, so a steady rate raises one alert per `count` logs
+            window.clear()
+            return True
+    
+    def _prune(self, now):
+        """Drop windows with nothing recent, or the stalest half if all are live"""
+        horizon = now - self._longest_window
+        live = {key: window for key, window in self._windows.items() if window and window[-1] >= horizon}
+        if len(live) >= self.max_windows:
+            newest = sorted(live.items(), key=lambda item: item[1][-1])[len(live) // 2:]
+            live = dict(newest)
+        self._windows = live
+    
+    def _log_alert(self, timestamp, source, level, message):
+        lines = (message or '').strip().splitlines()
+        title = lines[0][:TITLE_LENGTH] if lines else f'{level} log'
+        return {
+            'title': title,
+            'description': f'{level} log from {source}: {message}',
+            'source': source,
+            'timestamp': timestamp.isoformat(),
+            'metadata': {'origin': 'log', 'level': level}
+        }
+    
+    def _threshold_alert(self, threshold, timestamp, source, message):
+        window = int(threshold.window.total_seconds())
+        title = f'{threshold.name}: {threshold.count} {threshold.level} logs from {source} within {window}s'
+        return {
+            'title': title[:TITLE_LENGTH],
+            'description': f'Threshold rule {threshold.name!r} reached. Latest {threshold.level} log: {message}',
+            'source': source,
+            'timestamp': timestamp.isoformat(),
+            'metadata': {'origin': 'threshold', 'threshold_id': threshold.id, 'level': threshold.level}
+        }
+    
+    def create_threshold(self, name, level, count, window_seconds=300, source=None):
+        """Create a threshold rule"""
+        threshold = AlertThreshold(name=name, source=source or None)
+        self._apply(threshold, {'level': level, 'count': count, 'window_seconds': window_seconds})
+        
+        db.session.add(threshold)
+        bump_version(self.THRESHOLDS_CACHE)
+        db.session.commit()
+        self._thresholds.invalidate()
+        
+        return threshold
+    
+    def update_threshold(self, threshold_id, changes):
+        """Update a threshold rule"""
+        threshold = db.session.get(AlertThreshold, threshold_id)
+        
+        if not threshold:
+            return None
+        
+        self._apply(threshold, changes)
+        
+        bump_version(self.THRESHOLDS_CACHE)
+        db.session.commit()
+        self._thresholds.invalidate()
+        
+        return threshold
+    
+    def _apply(self, threshold, changes):
+        """Validate and set threshold fields, raising ValueError on bad values"""
+        if 'level' in changes:
+            level = str(changes['level']).upper()
+            if level not in LEVEL_RANKS:
+                raise ValueError(f"Invalid level. Must be one of: {list(LEVEL_RANKS)}")
+            threshold.level = level
+        
+        for field in ('count', 'window_seconds'):
+            if field in changes:
+                value = changes[field]
+                if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                    raise ValueError(f"{field} must be a positive integer")
+                setattr(threshold, field, value)
+        
+        for field in ('name', 'source', 'enabled'):
+            if field in changes:
+                setattr(threshold, field, changes[field])
+    
+    def get_thresholds(self):
+        """Get all threshold rules"""
+        return AlertThreshold.query.all()
@@ -0,0 +1,318 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from models import NetworkLog, db
+
+
+EPOCH = datetime(1970, 1, 1)
+
+MAGIC = b'INMSSEG1'
+VERSION = 1
+SECTIONS = ['ids', 'timestamps', 'levels', 'sources', 'message_offsets',
+            'messages', 'meta_offsets', 'meta', 'dictionary']
+
+# magic, version, row count, min/max timestamp, then (offset, length) for each section
+HEADER = struct.Struct('<8sIIqq' + 'QQ' * len(SECTIONS))
+
+# Arrays are written in native byte order (little-endian on every supported platform)
+TYPECODES = {
+    'ids': 'q',
+    'timestamps': 'q',
+    'levels': 'B',
+    'sources': 'I',
+    'message_offsets': 'Q',
+    'meta_offsets': 'Q'
+}
+
+
+def to_micros(timestamp):
+    """Convert a naive UTC datetime to microseconds since the epoch"""
+    delta = timestamp - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def from_micros(micros):
+    """Convert microseconds since the epoch to a naive UTC datetime"""
+    return EPOCH + timedelta(microseconds=micros)
+
+
+class ArchivedLog:
+    """Read-only log row served from an archive segment"""
+    
+    __slots__ = ('id', 'timestamp', 'source', 'level', 'message', 'meta_data')
+    
+    def __init__(self, id, timestamp, source, level, message, meta_data):
+        self.id = id
+        self.timestamp = timestamp
+        self.source = source
+        self.level = level
+        self.message = message
+        self.meta_data = meta_data
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'timestamp': self.timestamp.isoformat(),
+            'source': self.source,
+            'level': self.level,
+            'message': self.message,
+            'metadata': json.loads(self.meta_data) if self.meta_data else {}
+        }
+
+
+class LogSegment:
+    """Memory-mapped, immutable columnar segment holding one day of logs"""
+    
+    def __init__(self, path):
+        self.path = path
+        
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        fields = HEADER.unpack_from(self._mmap, 0)
+        magic, version, self.count, self.min_time, self.max_time = fields[:5]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a log archive segment')
+        
+        view = memoryview(self._mmap)
+        sections = {}
+        for index, name in enumerate(SECTIONS):
+            offset, length = fields[5 + index * 2], fields[6 + index * 2]
+            section = view[offset:offset + length]
+            if name in TYPECODES:
+                section = section.cast(TYPECODES[name])
+            sections[name] = section
+        
+        # Sections are plain views over the mapping; nothing is copied until a row is read
+        self.ids = sections['ids']
+        self.timestamps = sections['timestamps']
+        self.levels = sections['levels']
+        self.sources = sections['sources']
+        self.message_offsets = sections['message_offsets']
+        self.messages = sections['messages']
+        self.meta_offsets = sections['meta_offsets']
+        self.meta = sections['meta']
+        
+        dictionary = json.loads(bytes(sections['dictionary']))
+        self.source_names = dictionary['sources']
+        self.level_names = dictionary['levels']
+        self.source_codes = {name: code for code, name in enumerate(self.source_names)}
+        self.level_codes = {name: code for code, name in enumerate(self.level_names)}
+    
+    def overlaps(self, start_micros, end_micros):
+        """Check if the segment's time index overlaps a range"""
+        return self.min_time <= end_micros and self.max_time >= start_micros
+    
+    def scan(self, start_micros, end_micros, level=None, source=None, newest_first=True):
+        """Yield row positions within a time range that match the filters"""
+        level_code = source_code = None
+        if level is not None:
+            level_code = self.level_codes.get(level)
+            if level_code is None:
+                return
+        if source is not None:
+            source_code = self.source_codes.get(source)
+            if source_code is None:
+                return
+        
+        lo = bisect_left(self.timestamps, start_micros)
+        hi = bisect_right(self.timestamps, end_micros)
+        positions = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+        
+        levels, sources = self.levels, self.sources
+        for position in positions:
+            if level_code is not None and levels[position] != level_code:
+                continue
+            if source_code is not None and sources[position] != source_code:
+                continue
+            yield position
+    
+    def row(self, position):
+        """Materialize a single row"""
+        message = self.messages[self.message_offsets[position]:self.message_offsets[position + 1]]
+        meta = self.meta[self.meta_offsets[position]:self.meta_offsets[position + 1]]
+        
+        return ArchivedLog(
+            id=self.ids[position],
+            timestamp=from_micros(self.timestamps[position]),
+            source=self.source_names[self.sources[position]],
+            level=self.level_names[self.levels[position]],
+            message=str(message, 'utf-8'),
+            meta_data=str(meta, 'utf-8') or None
+        )
+
+
+class LogArchive:
+    """Service for archiving closed days of logs and querying archived ranges"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self._segments = []
+        self._directory_mtime = None
+    
+    # Reading
+    
+    def get_segments(self):
+        """Get open segments sorted by time, reopening if the directory changed"""
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        
+        if mtime != self._directory_mtime:
+            # Replaced segments are unmapped once in-flight readers drop them
+            segments = []
+            if mtime is not None:
+                for name in sorted(os.listdir(self.directory)):
+                    if name.endswith('.seg'):
+                        segments.append(LogSegment(os.path.join(self.directory, name)))
+            segments.sort(key=lambda segment: (segment.min_time, segment.max_time))
+            self._segments = segments
+            self._directory_mtime = mtime
+        
+        return self._segments
+    
+    def get_time_range(self):
+        """Get the (oldest, newest) archived timestamps, or None if the archive is empty"""
+        segments = self.get_segments()
+        if not segments:
+            return None
+        
+        return (
+            from_micros(min(segment.min_time for segment in segments)),
+            from_micros(max(segment.max_time for segment in segments))
+        )
+    
+    def query(self, start_time=None, end_time=None, level=None, source=None, limit=None, newest_first=True):
+        """Get archived logs in a time range, newest first by default"""
+        start_micros = to_micros(start_time) if start_time else -2 ** 63
+        end_micros = to_micros(end_time) if end_time else 2 ** 63 - 1
+        
+        segments = [s for s in self.get_segments() if s.overlaps(start_micros, end_micros)]
+        if newest_first:
+            segments.reverse()
+        
+        results = []
+        for segment in segments:
+            if limit is not None and len(results) >= limit:
+                # Late-arrival segments can overlap; skip any that can't beat the rows kept so far
+                boundary = to_micros(results[-1].timestamp)
+                if segment.max_time < boundary if newest_first else segment.min_time > boundary:
+                    continue
+            
+            taken = 0
+            for position in segment.scan(start_micros, end_micros, level, source, newest_first):
+                results.append(segment.row(position))
+                taken += 1
+                if limit is not None and taken >= limit:
+                    break
+            
+            results = self._sorted(results, newest_first)[:limit]
+        
+        return results
+    
+    def _sorted(self, logs, newest_first):
+        return sorted(logs, key=lambda log: (log.timestamp, log.id), reverse=newest_first)
+    
+    # Writing
+    
+    def archive_closed_days(self, keep_days=1):
+        """Archive every full day older than keep_days, returning {day: row count}"""
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        cutoff = today - timedelta(days=keep_days - 1)
+        
+        archived = {}
+        oldest = db.session.query(db.func.min(NetworkLog.timestamp)).filter(
+            NetworkLog.timestamp < cutoff
+        ).scalar()
+        
+        day = oldest.replace(hour=0, minute=0, second=0, microsecond=0) if oldest else cutoff
+        while day < cutoff:
+            count = self.archive_day(day)
+            if count:
+                archived[day.date().isoformat()] = count
+            day += timedelta(days=1)
+        
+        return archived
+    
+    def archive_day(self, day):
+        """Move one day of logs from the database into a new segment file"""
+        start_time = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_time = start_time + timedelta(days=1)
+        
+        in_range = (NetworkLog.timestamp >= start_time, NetworkLog.timestamp < end_time)
+        logs = NetworkLog.query.filter(*in_range).order_by(
+            NetworkLog.timestamp, NetworkLog.id
+        ).yield_per(5000)
+        
+        columns = {name: array(code) for name, code in TYPECODES.items()}
+        columns['message_offsets'].append(0)
+        columns['meta_offsets'].append(0)
+        messages, meta = bytearray(), bytearray()
+        source_codes, level_codes = {}, {}
+        max_id = None
+        
+        for log in logs:
+            columns['ids'].append(log.id)
+            columns['timestamps'].append(to_micros(log.timestamp))
+            columns['levels'].append(level_codes.setdefault(log.level, len(level_codes)))
+            columns['sources'].append(source_codes.setdefault(log.source, len(source_codes)))
+            messages += (log.message or '').encode('utf-8')
+            meta += (log.meta_data or '').encode('utf-8')
+            columns['message_offsets'].append(len(messages))
+            columns['meta_offsets'].append(len(meta))
+            max_id = log.id if max_id is None else max(max_id, log.id)
+        
+        count = len(columns['ids'])
+        if not count:
+            return 0
+        
+        dictionary = json.dumps({'sources': list(source_codes), 'levels': list(level_codes)})
+        sections = dict(columns)
+        sections['messages'] = messages
+        sections['meta'] = meta
+        sections['dictionary'] = dictionary.encode('utf-8')
+        
+        self._write_segment(start_time, count, columns['timestamps'], sections)
+        
+        # Rows that arrived while the segment was written stay for the next run
+        NetworkLog.query.filter(*in_range, NetworkLog.id <= max_id).delete(synchronize_session=False)
+        db.session.commit()
+        
+        return count
+    
+    def _write_segment(self, day, count, timestamps, sections):
+        """Write sections to a uniquely named segment, atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        
+        base = f"logs-{day.date().isoformat()}"
+        suffix = 0
+        path = os.path.join(self.directory, f'{base}.seg')
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(self.directory, f'{base}-{suffix}.seg')
+        
+        payloads = [bytes(sections[name]) for name in SECTIONS]
+        
+        offsets = []
+        position = HEADER.size
+        for payload in payloads:
+            position += -position % 8  # Keep every array 8-byte aligned
+            offsets.extend([position, len(payload)])
+            position += len(payload)
+        
+        header = HEADER.pack(MAGIC, VERSION, count, min(timestamps), max(timestamps), *offsets)
+        
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            for payload, offset in zip(payloads, offsets[0::2]):
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
@@ -0,0 +1,88 @@
+import re
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from models import LogTemplate, db
+
+
+class LogMessageCodec:
+    """Service for storing log messages as a template reference plus packed parameters"""
+    
+    # Variable parts of a message: hex ids, IP addresses, versions and plain numbers
+    PARAM_PATTERN = re.compile(r'0x[0-9a-fA-F]+|\d+(?:\.\d+)*')
+    
+    # pattern -> LogTemplate.id, shared by every codec in the process
+    _template_ids = {}
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+    
+    def store_message(self, log, message):
+        """Set the message on a log, using the compact form when enabled"""
+        encoded = self.encode(message) if self.enabled else None
+        
+        if encoded is None:
+            log.message = message
+            return log
+        
+        pattern, params = encoded
+        log.raw_message = None
+        log.template_id = self._get_template_id(pattern)
+        log.message_params = params
+        return log
+    
+    def encode(self, message):
+        """Split a message into (pattern, packed params), or None if it should be kept as-is"""
+        if not message:
+            return None
+        if LogTemplate.PLACEHOLDER in message or LogTemplate.PARAM_SEPARATOR in message:
+            return None
+        
+        params = self.PARAM_PATTERN.findall(message)
+        pattern = self.PARAM_PATTERN.sub(LogTemplate.PLACEHOLDER, message)
+        packed = LogTemplate.PARAM_SEPARATOR.join(params) if params else None
+        
+        if LogTemplate.fill(pattern, packed) != message:
+            return None
+        
+        return pattern, packed
+    
+    def _get_template_id(self, pattern):
+        """Look up a template id, creating the template on first use"""
+        template_id = self._template_ids.get(pattern)
+        if template_id is not None:
+            return template_id
+        
+        template = LogTemplate.query.filter_by(pattern=pattern).first()
+        
+        if template is None:
+            try:
+                # Savepoint so a concurrent insert of the same pattern doesn't abort the batch
+                with db.session.begin_nested():
+                    template = LogTemplate(pattern=pattern)
+                    db.session.add(template)
+                db.session.info.setdefault('new_log_templates', {})[pattern] = template.id
+            except IntegrityError:
+                template = LogTemplate.query.filter_by(pattern=pattern).one()
+        
+        self._template_ids[pattern] = template.id
+        return template.id
+    
+    @classmethod
+    def _on_commit(cls, session):
+        session.info.pop('new_log_templates', None)
+    
+    @classmethod
+    def _on_rollback(cls, session):
+        # Templates inserted by the rolled back transaction no longer exist
+        for pattern, template_id in session.info.pop('new_log_templates', {}).items():
+            cls._template_ids.pop(pattern, None)
+            LogTemplate.forget(template_id)
+    
+    def get_template_count(self):
+        """Get the number of known message templates"""
+        return LogTemplate.query.count()
+
+
+# Registered once, as the template cache they maintain is shared by every codec
+event.listen(db.session, 'after_commit', LogMessageCodec._on_commit)
+event.listen(db.session, 'after_rollback', LogMessageCodec._on_rollback)
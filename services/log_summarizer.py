@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
 from models import NetworkLog, LogSummary, db
+from services.response_cache import mark_data_changed
 import json
 import re
 from statistics import mean, stdev
@@ -9,9 +10,10 @@ from statistics import mean, stdev
 class LogSummarizer:
     """Service for summarizing network logs"""
     
-    def __init__(self, anomaly_threshold=2.5, max_events=10):
+    def __init__(self, anomaly_threshold=2.5, max_events=10, archive=None):
         self.anomaly_threshold = anomaly_threshold
         self.max_events = max_events
+        self.archive = archive
     
     def generate_summary(self, start_time, end_time):
         """Generate a summary for logs within the given time range"""
@@ -22,6 +24,10 @@ class LogSummarizer:
             NetworkLog.timestamp <= end_time
         ).all()
         
+        # Include closed days that have been moved to the archive
+        if self.archive:
+            logs.extend(self.archive.query(start_time, end_time, newest_first=False))
+        
         if not logs:
             return None
         
@@ -55,6 +61,7 @@ class LogSummarizer:
         
         db.session.add(summary)
         db.session.commit()
+        mark_data_changed()
         
         return summary
     
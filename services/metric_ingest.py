@@ -0,0 +1,191 @@
+import math
+from datetime import datetime, timezone
+from itertools import chain, repeat
+from operator import itemgetter, methodcaller
+from sqlalchemy import insert
+from models import NetworkMetric, db
+
+
+PRECISIONS = {'s': 1, 'ms': 1000, 'us': 1000000, 'ns': 1000000000}  # Line protocol timestamp units per second
+SOURCE_TAGS = ('source', 'host')
+COLUMNS = ('timestamp', 'metric_name', 'metric_value', 'unit', 'source')  # Order of a parsed row
+STORED_TIMESTAMP = methodcaller('isoformat', ' ', 'microseconds')  # SQLAlchemy's SQLite DateTime format
+SERIES_ORDER = itemgetter(1, 0)  # Name then timestamp, the order of ix_network_metrics_name_time
+TEXT_COLUMNS = {'name': 'metric_name', 'source': 'source', 'unit': 'unit'}
+MAX_LENGTHS = {field: NetworkMetric.__table__.c[column].type.length for field, column in TEXT_COLUMNS.items()}
+SQLITE_ROWS_PER_INSERT = 100  # Rows per multi-row INSERT, keeping parameters under SQLite's oldest 999 limit
+SQLITE_ROW = f"({', '.join('?' * len(COLUMNS))})"
+SQLITE_INSERT = f"INSERT INTO network_metrics ({', '.join(COLUMNS)}) VALUES {SQLITE_ROW}"
+SQLITE_BULK_INSERT = f"{SQLITE_INSERT}{f', {SQLITE_ROW}' * (SQLITE_ROWS_PER_INSERT - 1)}"
+
+
+def naive_utc(value):
+    """Convert an aware datetime to naive UTC, as timestamps are stored; naive ones are taken as UTC"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _timestamps(values):
+    """Convert epoch seconds or ISO strings to naive UTC datetimes"""
+    try:
+        return list(map(datetime.utcfromtimestamp, values))
+    except TypeError:
+        return [naive_utc(datetime.fromisoformat(value)) if isinstance(value, str)
+                else datetime.utcfromtimestamp(value) for value in values]
+
+
+def _values(values):
+    """Convert values to floats, rejecting NaN and infinity"""
+    values = list(map(float, values))
+    if not all(map(math.isfinite, values)):
+        raise ValueError('Metric values must be finite')
+    return values
+
+
+def _check_text(field, value, required=False):
+    """Check a name, source or unit is a string that fits its column"""
+    if not value and required:
+        raise ValueError(f'{field} is required')
+    if value is None:
+        return
+    if not isinstance(value, str):
+        raise ValueError(f'{field} must be a string')
+    if len(value) > MAX_LENGTHS[field]:
+        raise ValueError(f'{field} is longer than {MAX_LENGTHS[field]} characters')
+
+
+def _tags(items):
+    """Split key=value tags into a dict"""
+    if not all('=' in item for item in items):
+        raise ValueError('tags must be key=value pairs')
+    return dict(item.split('=', 1) for item in items)
+
+
+def parse_columnar(payload, now=None):
+    """Expand columnar batches into metric rows, raising ValueError on bad input
+    
+    A batch is {"name", "source", "unit", "timestamps": [...], "values": [...]}, with
+    timestamps as epoch seconds or ISO strings; a payload is one batch or a list of them.
+    """
+    now = now or datetime.utcnow()
+    batches = payload if isinstance(payload, list) else [payload]
+    
+    rows = []
+    for index, batch in enumerate(batches):
+        if not isinstance(batch, dict) or not batch.get('name'):
+            raise ValueError(f'Batch {index}: name is required')
+        values = batch.get('values', [])
+        timestamps = batch.get('timestamps')
+        if not isinstance(values, list) or not isinstance(timestamps, (list, type(None))):
+            raise ValueError(f'Batch {index}: values and timestamps must be arrays')
+        if timestamps and len(timestamps) != len(values):
+            raise ValueError(f"Batch {index}: {len(timestamps)} timestamps for {len(values)} values")
+        
+        try:
+            for field in TEXT_COLUMNS:
+                _check_text(field, batch.get(field), required=field == 'name')
+            timestamps = _timestamps(timestamps) if timestamps else [now] * len(values)
+            values = _values(values)
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            raise ValueError(f'Batch {index}: {e}')
+        
+        count = len(values)
+        rows.extend(zip(timestamps, repeat(batch['name'], count), values, repeat(batch.get('unit'), count),
+                        repeat(batch.get('source'), count)))
+    
+    return rows
+
+
+def parse_line_protocol(text, precision='ns', now=None):
+    """Parse line protocol into metric rows, raising ValueError on bad input
+    
+    `measurement[,tag=value...] field=value[,field=value...] [timestamp]`: a `value` field is
+    stored under the measurement's name and any other field as measurement_field. The
+    `source` (or `host`) and `unit` tags fill those columns; other tags are ignored.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {', '.join(PRECISIONS)}")
+    per_second = PRECISIONS[precision]
+    now = now or datetime.utcnow()
+    
+    # Lines repeat the same series and timestamps, so each is parsed and checked once per request
+    rows = []
+    series = {}  # measurement and tags -> (measurement, unit, source)
+    names = {}  # (measurement, field key) -> metric name
+    stamps = {}  # timestamp as sent -> datetime
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line[0] == '#':
+            continue
+        
+        try:
+            parts = line.split(' ')
+            if len(parts) == 3:
+                timestamp = stamps.get(parts[2])
+                if timestamp is None:
+                    timestamp = stamps[parts[2]] = datetime.utcfromtimestamp(int(parts[2]) / per_second)
+            elif len(parts) == 2:
+                timestamp = now
+            else:
+                raise ValueError('expected measurement, fields and an optional timestamp')
+            
+            if parts[0] not in series:
+                measurement, *tags = parts[0].split(',')
+                tags = _tags(tags)
+                source = next((tags[tag] for tag in SOURCE_TAGS if tag in tags), None)
+                _check_text('source', source)
+                _check_text('unit', tags.get('unit'))
+                series[parts[0]] = (measurement, tags.get('unit'), source)
+            measurement, unit, source = series[parts[0]]
+            
+            for field in parts[1].split(','):
+                key, separator, value = field.partition('=')
+                name = names.get((measurement, key))
+                if name is None:
+                    if not separator:
+                        raise ValueError('fields must be key=value pairs')
+                    name = measurement if key == 'value' else f'{measurement}_{key}'
+                    _check_text('name', name, required=True)
+                    names[(measurement, key)] = name
+                try:
+                    value = float(value)
+                except ValueError:
+                    if not value.endswith(('i', 'u')):
+                        raise
+                    value = float(value[:-1])
+                if not math.isfinite(value):
+                    raise ValueError('Metric values must be finite')
+                rows.append((timestamp, name, value, unit, source))
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            raise ValueError(f'Line {number}: {e}')
+    
+    return rows
+
+
+def store(rows):
+    """Insert parsed metric rows in bulk, in the current transaction
+    
+    On SQLite the rows go straight to the driver as multi-row INSERTs, with each distinct
+    timestamp formatted once in SQLAlchemy's storage format, skipping its per-row
+    parameter processing. They are inserted in series order, so interleaved series
+    (as line protocol usually sends them) update the name/time index sequentially.
+    """
+    if not rows:
+        return 0
+    
+    if db.session.get_bind().dialect.name == 'sqlite':
+        timestamps, *rest = zip(*sorted(rows, key=SERIES_ORDER))
+        stored = {timestamp: STORED_TIMESTAMP(timestamp) for timestamp in set(timestamps)}
+        params = list(zip(map(stored.__getitem__, timestamps), *rest))
+        
+        # Whole multi-row statements first, then the remainder one row at a time
+        bulk = len(params) - len(params) % SQLITE_ROWS_PER_INSERT
+        connection = db.session.connection()
+        if bulk:
+            flat = chain.from_iterable(params[:bulk])
+            statements = zip(*[flat] * (SQLITE_ROWS_PER_INSERT * len(COLUMNS)))  # One flat tuple per statement
+            connection.exec_driver_sql(SQLITE_BULK_INSERT, list(statements))
+        if bulk < len(params):
+            connection.exec_driver_sql(SQLITE_INSERT, params[bulk:])
+    else:
+        db.session.execute(insert(NetworkMetric.__table__), [dict(zip(COLUMNS, row)) for row in rows])
+    return len(rows)
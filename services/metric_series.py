@@ -0,0 +1,128 @@
+from collections import defaultdict
+from datetime import timedelta
+from models import NetworkMetric, db
+
+
+OVERSAMPLE = 4  # SQL buckets per requested point, for LTTB to choose from
+MIN_BUCKET_SECONDS = 1
+
+
+class SeriesPoint:
+    """Aggregate of one metric over one time bucket"""
+    
+    __slots__ = ('timestamp', 'avg', 'min', 'max', 'count')
+    
+    def __init__(self, timestamp, avg, min, max, count):
+        self.timestamp = timestamp  # Start of the bucket
+        self.avg = avg
+        self.min = min
+        self.max = max
+        self.count = count
+    
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'avg': round(self.avg, 4),
+            'min': self.min,
+            'max': self.max,
+            'count': self.count
+        }
+
+
+def _seconds_since(column, start):
+    """SQL expression for the seconds from `start` to a timestamp column"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return db.func.extract('epoch', column - start)
+    return (db.func.julianday(column) - db.func.julianday(start)) * 86400.0
+
+
+def _bucket(column, start, width):
+    """SQL expression for a timestamp's bucket number; timestamps are never before `start`"""
+    offset = _seconds_since(column, start) / width
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return db.cast(db.func.floor(offset), db.Integer)
+    return db.cast(offset, db.Integer)  # Truncates, which floors non-negative offsets
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of time-ordered points to `threshold` points
+    
+    Keeps the first and last point, and from each bucket in between the point forming the
+    largest triangle with the previously kept point and the next bucket's average, so peaks
+    and dips survive while flat stretches thin out.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    
+    xs = [(point.timestamp - points[0].timestamp).total_seconds() for point in points]
+    ys = [point.avg for point in points]
+    
+    sampled = [points[0]]
+    kept = 0
+    every = (len(points) - 2) / (threshold - 2)
+    for i in range(threshold - 2):
+        # Average of the next bucket, the triangle's third corner
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+        
+        best = best_area = -1
+        for j in range(int(i * every) + 1, next_start):
+            area = abs((xs[kept] - avg_x) * (ys[j] - ys[kept]) - (xs[kept] - xs[j]) * (avg_y - ys[kept]))
+            if area > best_area:
+                best, best_area = j, area
+        
+        sampled.append(points[best])
+        kept = best
+    
+    sampled.append(points[-1])
+    return sampled
+
+
+def bucket_width(start, end, points):
+    """Get the SQL bucket width in seconds for a window drawn with `points` points"""
+    return max((end - start).total_seconds() / (points * OVERSAMPLE), MIN_BUCKET_SECONDS)
+
+
+def get_series(names, start, end, points=300, source=None):
+    """Get each metric's series between `start` and `end`, as at most `points` points per name
+    
+    Buckets are aggregated in one grouped SQL query, so only the aggregates reach Python,
+    then LTTB picks the `points` buckets that best keep the shape of each series.
+    Returns ({name: [SeriesPoint]}, bucket width in seconds).
+    """
+    width = bucket_width(start, end, points)
+    bucket = _bucket(NetworkMetric.timestamp, start, width).label('bucket')
+    
+    query = db.session.query(
+        NetworkMetric.metric_name, bucket, db.func.avg(NetworkMetric.metric_value),
+        db.func.min(NetworkMetric.metric_value), db.func.max(NetworkMetric.metric_value), db.func.count()
+    ).filter(
+        NetworkMetric.metric_name.in_(names), NetworkMetric.timestamp >= start, NetworkMetric.timestamp < end
+    )
+    if source:
+        query = query.filter(NetworkMetric.source == source)
+    query = query.group_by(NetworkMetric.metric_name, bucket).order_by(NetworkMetric.metric_name, bucket)
+    
+    series = defaultdict(list)
+    for name, index, avg, low, high, count in query:
+        series[name].append(SeriesPoint(start + timedelta(seconds=index * width), avg, low, high, count))
+    
+    return {name: lttb(series[name], points) for name in names if name in series}, width
+
+
+def get_summary(start, end):
+    """Get count, average, min and max of every metric between `start` and `end`, by name"""
+    rows = db.session.query(
+        NetworkMetric.metric_name, db.func.count(), db.func.avg(NetworkMetric.metric_value),
+        db.func.min(NetworkMetric.metric_value), db.func.max(NetworkMetric.metric_value)
+    ).filter(
+        NetworkMetric.timestamp >= start, NetworkMetric.timestamp < end
+    ).group_by(NetworkMetric.metric_name).order_by(NetworkMetric.metric_name)
+    
+    return {
+        name: {'count': count, 'avg': avg, 'min': low, 'max': high}
+        for name, count, avg, low, high in rows
+    }
@@ -0,0 +1,193 @@
+import heapq
+import threading
+import time
+from collections import Counter
+from models import Alert, db
+from services.log_archive import to_micros
+
+
+DESCRIPTION_LENGTH = 200  # Characters of each description kept in memory
+
+
+class OpenAlert:
+    """Lightweight copy of the fields read paths show for an open alert"""
+    
+    __slots__ = ('id', 'title', 'description', 'severity', 'category', 'priority_score', 'timestamp', 'source',
+                 'sort_key')
+    
+    def __init__(self, id, title, description, severity, category, priority_score, timestamp, source):
+        self.id = id
+        self.title = title
+        self.description = (description or '')[:DESCRIPTION_LENGTH]
+        self.severity = severity
+        self.category = category
+        self.priority_score = priority_score or 0.0
+        self.timestamp = timestamp
+        self.source = source
+        
+        # Heap key: highest priority, then newest, then highest id first
+        self.sort_key = (-self.priority_score, -to_micros(timestamp), -id)
+    
+    @classmethod
+    def from_alert(cls, alert):
+        return cls(alert.id, alert.title, alert.description, alert.severity, alert.category,
+                   alert.priority_score, alert.timestamp, alert.source)
+
+
+class OpenAlertIndex:
+    """Process-local index of open alerts: a priority heap and counters per severity
+    
+    Writers in this process keep it current; changes made by other workers show up at
+    the next reconciliation, which reloads the open set from the database.
+    """
+    
+    def __init__(self, reconcile_interval=30.0):
+        self.reconcile_interval = reconcile_interval  # Seconds between reloads from the database
+        self._lock = threading.Lock()
+        self._alerts = {}  # id -> OpenAlert
+        self._heaps = {}  # severity -> [(sort key, id)], with stale entries skipped lazily
+        self._by_severity = Counter()
+        self._by_category = Counter()
+        self._loaded_at = None
+    
+    # Maintenance
+    
+    def reload(self):
+        """Rebuild the index from the open alerts in the database"""
+        rows = db.session.query(
+            Alert.id, Alert.title, db.func.substr(Alert.description, 1, DESCRIPTION_LENGTH),
+            Alert.severity, Alert.category, Alert.priority_score, Alert.timestamp, Alert.source
+        ).filter(Alert.status == 'open').all()
+        
+        alerts = {row[0]: OpenAlert(*row) for row in rows}
+        heaps = {}
+        for alert in alerts.values():
+            heaps.setdefault(alert.severity, []).append((alert.sort_key, alert.id))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+        
+        with self._lock:
+            self._alerts = alerts
+            self._heaps = heaps
+            self._by_severity = Counter(alert.severity for alert in alerts.values())
+            self._by_category = Counter(alert.category for alert in alerts.values())
+            self._loaded_at = time.monotonic()
+    
+    def update(self, alert):
+        """Apply an alert's committed state: index it while open, drop it otherwise"""
+        if alert.status == 'open':
+            self.add(OpenAlert.from_alert(alert))
+        else:
+            self.discard(alert.id)
+    
+    def add(self, entry):
+        """Index (or re-index) an open alert"""
+        with self._lock:
+            previous = self._remove(entry.id)
+            self._alerts[entry.id] = entry
+            self._by_severity[entry.severity] += 1
+            self._by_category[entry.category] += 1
+            
+            # An unchanged alert keeps its existing heap entry
+            if previous is None or (previous.severity, previous.sort_key) != (entry.severity, entry.sort_key):
+                heapq.heappush(self._heaps.setdefault(entry.severity, []), (entry.sort_key, entry.id))
+    
+    def reprioritize(self, scores):
+        """Apply new priority scores, given as {id: score}, to indexed alerts"""
+        for alert_id, score in scores.items():
+            with self._lock:
+                entry = self._alerts.get(alert_id)
+            if entry is not None:
+                self.add(OpenAlert(entry.id, entry.title, entry.description, entry.severity, entry.category,
+                                   score, entry.timestamp, entry.source))
+        
+        with self._lock:
+            for severity in list(self._heaps):
+                self._compact(severity)
+    
+    def discard(self, alert_id):
+        """Drop an alert that is no longer open"""
+        with self._lock:
+            entry = self._remove(alert_id)
+            if entry is not None:
+                self._compact(entry.severity)
+    
+    def _compact(self, severity):
+        """Rebuild a heap once it is mostly stale entries (they are otherwise skipped lazily)"""
+        heap = self._heaps.get(severity)
+        if heap and len(heap) > 2 * self._by_severity[severity] + 64:
+            heap = [item for item in heap if self._is_current(item, severity)]
+            heapq.heapify(heap)
+            self._heaps[severity] = heap
+    
+    def _remove(self, alert_id):
+        entry = self._alerts.pop(alert_id, None)
+        if entry is not None:
+            self._by_severity[entry.severity] -= 1
+            self._by_category[entry.category] -= 1
+        return entry
+    
+    def _is_current(self, item, severity):
+        sort_key, alert_id = item
+        entry = self._alerts.get(alert_id)
+        return entry is not None and entry.severity == severity and entry.sort_key == sort_key
+    
+    def _ensure_fresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reconcile_interval:
+            self.reload()
+    
+    # Reading
+    
+    def count(self, severity=None):
+        """Number of open alerts, optionally of one severity"""
+        self._ensure_fresh()
+        with self._lock:
+            return self._by_severity[severity] if severity else len(self._alerts)
+    
+    def get_counts(self):
+        """Get open alert totals by severity and category"""
+        self._ensure_fresh()
+        with self._lock:
+            return {
+                'total': len(self._alerts),
+                'by_severity': {name: count for name, count in self._by_severity.items() if count},
+                'by_category': {name: count for name, count in self._by_category.items() if count}
+            }
+    
+    def top(self, limit=None, severity=None):
+        """Get the highest-priority open alerts (all of them if limit is None)"""
+        self._ensure_fresh()
+        with self._lock:
+            if limit is None:
+                alerts = [a for a in self._alerts.values() if severity is None or a.severity == severity]
+                return sorted(alerts, key=lambda alert: alert.sort_key)
+            
+            severities = [severity] if severity else list(self._heaps)
+            candidates = []
+            for name in severities:
+                candidates.extend(self._peek(name, limit))
+            
+            candidates.sort(key=lambda alert: alert.sort_key)
+            return candidates[:limit]
+    
+    def _peek(self, severity, limit):
+        """Pop up to limit current entries off one heap, discarding stale ones, and push them back"""
+        heap = self._heaps.get(severity)
+        if not heap:
+            return []
+        
+        kept = []
+        seen = set()
+        while heap and len(kept) < limit:
+            item = heapq.heappop(heap)
+            if item[1] not in seen and self._is_current(item, severity):
+                kept.append(item)
+                seen.add(item[1])
+        
+        for item in kept:
+            heapq.heappush(heap, item)
+        
+        return [self._alerts[alert_id] for _, alert_id in kept]
+
+
+open_alerts = OpenAlertIndex()
@@ -0,0 +1,222 @@
+import re
+from collections import deque
+
+try:
+    from re import _constants as sre, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants as sre
+    import sre_parse
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton reporting every stored keyword found in one pass over a text"""
+    
+    def __init__(self, keywords=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+        
+        for keyword, value in keywords:
+            self.add(keyword, value)
+    
+    def add(self, keyword, value):
+        """Store a keyword with the value to report when it is found"""
+        if not keyword:
+            raise ValueError('Keywords must be non-empty')
+        
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        
+        self._out[node].append(value)
+        self._built = False
+    
+    def build(self):
+        """Compute failure links (called automatically before the first search)"""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                
+                # Inherit the outputs of the longest proper suffix that is also a keyword
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        
+        self._built = True
+    
+    def search(self, text):
+        """Get the values of every keyword occurring in text"""
+        if not self._built:
+            self.build()
+        
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        
+        return found
+
+
+MAX_EXPANDED_BRANCHES = 32  # Alternatives a nested alternation may expand into before it is left to the regex
+REPEATS = {sre.MAX_REPEAT, sre.MIN_REPEAT, getattr(sre, 'POSSESSIVE_REPEAT', None)}
+
+
+def decompose_pattern(pattern):
+    """Split a regex into branches for literal prefiltering
+    
+    Returns a list of (kind, text) pairs, one per branch:
+      ('literal', s) - the branch matches exactly the literal s
+      ('factor', s)  - the branch can only match if the literal s occurs
+      ('regex', None) - no usable literal; the branch must always be checked
+    
+    Branches come from the pattern as parsed by the re module, so escapes such as \\x20,
+    \\u00e9, \\N{...} and octal ones count as the characters they stand for.
+    """
+    try:
+        re.compile(pattern)
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        # Invalid regexes are matched as plain keywords
+        return [('literal', pattern.lower())]
+    
+    if re.search(r'\(\?[aiLmsux-]', pattern):
+        return [('regex', None)]  # Inline flags change how the literals match
+    if _refers_back(parsed):
+        return [('regex', None)]  # Backreferences
+    
+    return [_analyze_branch(branch) for branch in _expand(_flatten(parsed))]
+
+
+def _refers_back(items):
+    """Whether parsed items contain a backreference, at any depth"""
+    for op, av in items:
+        if op in (sre.GROUPREF, sre.GROUPREF_EXISTS):
+            return True
+        nested = av if isinstance(av, (tuple, list)) else [av]
+        for child in nested:
+            children = child if isinstance(child, list) else [child]
+            if any(isinstance(sub, sre_parse.SubPattern) and _refers_back(sub) for sub in children):
+                return True
+    return False
+
+
+def _flatten(items):
+    """Splice the contents of groups without flags into the surrounding sequence"""
+    flat = []
+    for op, av in items:
+        if op == sre.SUBPATTERN and not av[1] and not av[2]:
+            flat.extend(_flatten(av[3]))
+        else:
+            flat.append((op, av))
+    return flat
+
+
+def _expand(items):
+    """Distribute the sequence's alternations into separate branches, while there are few enough"""
+    branches = [items]
+    while True:
+        expanded = []
+        for branch in branches:
+            index = next((i for i, (op, _) in enumerate(branch) if op == sre.BRANCH), None)
+            if index is None:
+                expanded.append(branch)
+                continue
+            expanded.extend(
+                branch[:index] + _flatten(alternative) + branch[index + 1:]
+                for alternative in branch[index][1][1]
+            )
+        
+        if len(expanded) > MAX_EXPANDED_BRANCHES:
+            return branches  # Remaining alternations end the literal runs around them
+        if len(expanded) == len(branches):
+            return expanded
+        branches = expanded
+
+
+def _analyze_branch(items):
+    runs = []
+    run = []
+    pure = True
+    
+    def close_run():
+        if run:
+            runs.append(''.join(run))
+            run.clear()
+    
+    for op, av in items:
+        if op == sre.LITERAL:
+            run.append(chr(av))
+            continue
+        
+        pure = False
+        if op in REPEATS and av[0] >= 1:
+            # The repeated part occurs at least once, so its literals are required
+            body = _analyze_branch(_flatten(av[2]))
+            if body[0] == 'literal':
+                run.append(body[1])
+                close_run()
+                continue
+            close_run()
+            if body[0] == 'factor':
+                runs.append(body[1])
+            continue
+        
+        # Classes, anchors, optional repeats, lookarounds and alternations end the literal run
+        close_run()
+    
+    close_run()
+    
+    if pure:
+        text = ''.join(runs)
+        return ('literal', text.lower()) if text else ('regex', None)
+    
+    longest = max(runs, key=len, default='')
+    if len(longest) >= 2:
+        return ('factor', longest.lower())
+    return ('regex', None)
+
+
+class KeywordLevels:
+    """Ordered keyword lists matched with compiled alternations instead of one `in` test per keyword"""
+    
+    def __init__(self, levels):
+        self.levels = [(label, _alternation(keywords)) for label, keywords in levels]
+        self._any = _alternation([keyword for _, keywords in levels for keyword in keywords])
+    
+    def classify(self, text, default=None):
+        """Get the label of the first level with a keyword in text"""
+        # Most texts match no keyword at all; one combined search settles those
+        if not self._any.search(text):
+            return default
+        
+        for label, regex in self.levels:
+            if regex.search(text):
+                return label
+        return default
+
+
+def _alternation(keywords):
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
@@ -0,0 +1,158 @@
+import time
+
+try:
+    from re import _constants as sre, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants as sre
+    import sre_parse
+
+
+PROBE_MAX_LENGTH = 1024  # Longest probe input; quadratic searches of longer texts are left to the runtime budget
+PROBE_SUFFIX = '\x00'  # Ends every probe so a pattern anchored at the end has to fail
+MAX_PROBE_UNITS = 12
+
+# Probe lengths grow slowly while exponential blow-up is possible, then geometrically
+PROBE_LENGTHS = list(range(8, 33, 2))
+while PROBE_LENGTHS[-1] < PROBE_MAX_LENGTH:
+    PROBE_LENGTHS.append(min(PROBE_MAX_LENGTH, PROBE_LENGTHS[-1] * 3 // 2))
+
+REPEATS = {sre.MAX_REPEAT, sre.MIN_REPEAT}
+CATEGORY_SAMPLES = {
+    sre.CATEGORY_DIGIT: '0',
+    sre.CATEGORY_NOT_DIGIT: 'a',
+    sre.CATEGORY_SPACE: ' ',
+    sre.CATEGORY_NOT_SPACE: 'a',
+    sre.CATEGORY_WORD: 'a',
+    sre.CATEGORY_NOT_WORD: ' '
+}
+
+
+def _children(op, av):
+    """Get the subpatterns nested directly in one parsed item"""
+    if op in REPEATS or op == getattr(sre, 'POSSESSIVE_REPEAT', None):
+        return [av[2]]
+    if op == sre.SUBPATTERN:
+        return [av[3]]
+    if op == sre.BRANCH:
+        return av[1]
+    if op in (sre.ASSERT, sre.ASSERT_NOT):
+        return [av[1]]
+    if op == getattr(sre, 'ATOMIC_GROUP', None):
+        return [av]
+    if op == sre.GROUPREF_EXISTS:
+        return [branch for branch in av[1:] if branch is not None]
+    return []
+
+
+def _has_unbounded_repeat(subpattern):
+    for op, av in subpattern:
+        if op in REPEATS and av[1] == sre.MAXREPEAT:
+            return True
+        if any(_has_unbounded_repeat(child) for child in _children(op, av)):
+            return True
+    return False
+
+
+def _find_nested(subpattern):
+    for op, av in subpattern:
+        # Possessive repeats and atomic groups never give back what they matched
+        if op in REPEATS and av[1] > 1 and _has_unbounded_repeat(av[2]):
+            return True
+        if any(_find_nested(child) for child in _children(op, av)):
+            return True
+    return False
+
+
+def nested_quantifier(pattern):
+    """Whether a pattern repeats something that itself repeats without bound, as in (a+)+"""
+    try:
+        return _find_nested(sre_parse.parse(pattern))
+    except Exception:
+        return False
+
+
+def _samples(op, av):
+    """Get characters one parsed item can match"""
+    if op == sre.LITERAL:
+        return [chr(av)]
+    if op in (sre.ANY, sre.NOT_LITERAL):
+        return ['a']
+    if op == sre.IN:
+        samples = []
+        for item_op, item_av in av:
+            if item_op == sre.NEGATE:
+                return ['a']
+            if item_op == sre.LITERAL:
+                samples.append(chr(item_av))
+            elif item_op == sre.RANGE:
+                samples.append(chr(item_av[0]))
+            elif item_op == sre.CATEGORY and item_av in CATEGORY_SAMPLES:
+                samples.append(CATEGORY_SAMPLES[item_av])
+        return samples
+    return []
+
+
+def _collect_units(subpattern, units):
+    """Add every character and literal run of a parsed pattern to units, in pattern order"""
+    run = ''
+    for op, av in subpattern:
+        if op == sre.LITERAL:
+            run += chr(av)
+        elif len(run) > 1:
+            units.append(run)
+            run = ''
+        else:
+            run = ''
+        units.extend(_samples(op, av))
+        for child in _children(op, av):
+            _collect_units(child, units)
+    if len(run) > 1:
+        units.append(run)
+
+
+def probe_inputs(pattern):
+    """Get (prefix, pump units) for inputs that make a pattern backtrack as much as it can
+    
+    Each probe is the pattern's leading literal text, one unit repeated, then PROBE_SUFFIX.
+    """
+    parsed = sre_parse.parse(pattern)
+    
+    prefix = ''
+    for op, av in parsed:
+        if op == sre.AT:
+            continue
+        if op != sre.LITERAL:
+            break
+        prefix += chr(av)
+    
+    units = []
+    _collect_units(parsed, units)
+    distinct = list(dict.fromkeys(unit.lower() for unit in units if unit))
+    return prefix.lower(), distinct[:MAX_PROBE_UNITS] or ['a']
+
+
+def _time_search(regex, text):
+    started = time.perf_counter()
+    regex.search(text)
+    return time.perf_counter() - started
+
+
+def find_slow_input(regex, time_budget):
+    """Get (seconds, input length) of the first probe a compiled pattern takes longer than
+    time_budget to search, or None
+    
+    Probes stop growing at the first one over budget, so checking a pathological pattern
+    costs a few times the budget rather than the full blow-up.
+    """
+    prefix, units = probe_inputs(regex.pattern)
+    
+    for unit in units:
+        for length in PROBE_LENGTHS:
+            text = prefix + unit * max(1, length // len(unit)) + PROBE_SUFFIX
+            if _time_search(regex, text) > time_budget:
+                # Confirm, so a scheduling hiccup doesn't reject a good pattern
+                elapsed = _time_search(regex, text)
+                if elapsed > time_budget:
+                    return elapsed, len(text)
+    
+    return None
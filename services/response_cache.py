@@ -0,0 +1,64 @@
+import itertools
+import threading
+import time
+
+
+_changes = itertools.count(1)
+_generation = 0  # Bumped by mark_data_changed; entries from an older generation are stale
+
+
+def mark_data_changed():
+    """Drop every ResponseCache entry in this process, after new data is committed"""
+    global _generation
+    _generation = next(_changes)
+
+
+def data_generation():
+    """Get the current data generation, to pass to ResponseCache.put"""
+    return _generation
+
+
+class ResponseCache:
+    """Process-local cache of rendered responses that expire after `ttl` seconds
+    
+    Writers in this process call mark_data_changed() to drop every entry at once; data
+    committed by other workers shows up when the entries expire.
+    """
+    
+    def __init__(self, ttl=10.0, max_entries=256):
+        self.ttl = ttl  # 0 disables the cache
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (expires at, generation, value)
+    
+    def get(self, key):
+        """Get a cached value, or None if it is missing, expired or stale"""
+        if not self.ttl:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, generation, value = entry
+            if generation != _generation or expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+    
+    def put(self, key, value, generation):
+        """Cache a value computed from the data of `generation` (read before computing it)"""
+        if not self.ttl or generation != _generation:
+            return
+        
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {
+                    k: entry for k, entry in self._entries.items()
+                    if entry[1] == _generation and entry[0] > now
+                }
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, generation, value)
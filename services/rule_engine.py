@@ -0,0 +1,180 @@
+import logging
+import re
+import time
+from services.instrumentation import RULE_HITS, RULE_SEARCH_TIME
+from services.pattern_matcher import AhoCorasick, decompose_pattern
+from services.regex_guard import find_slow_input, nested_quantifier
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledRule:
+    """Classification rule with its pattern compiled once"""
+    
+    __slots__ = ('id', 'name', 'pattern', 'regex', 'category', 'severity', 'priority_boost')
+    
+    def __init__(self, rule):
+        self.id = rule.id
+        self.name = rule.name
+        self.pattern = rule.pattern
+        self.category = rule.category
+        self.severity = rule.severity
+        self.priority_boost = rule.priority_boost or 0.0
+        self.regex = compile_pattern(rule.pattern, rule.name)
+
+
+def compile_pattern(pattern, name=None):
+    """Compile a rule pattern, treating invalid regexes as plain keywords"""
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        logger.warning("Rule %r has an invalid regex (%s); matching it as a keyword", name or pattern, e)
+        return re.compile(re.escape(pattern), re.IGNORECASE)
+
+
+def validate_pattern(pattern, time_budget=None):
+    """Raise ValueError if a pattern is not a valid regex, or backtracks past time_budget on a probe"""
+    try:
+        regex = re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid rule pattern: {e}")
+    
+    if not time_budget:
+        return
+    
+    slow = find_slow_input(regex, time_budget)
+    if slow:
+        elapsed, length = slow
+        hint = ' (a repeated group contains an unbounded repeat)' if nested_quantifier(pattern) else ''
+        raise ValueError(
+            f"Rule pattern backtracks excessively{hint}: {elapsed * 1000:.0f} ms on a "
+            f"{length}-character input, over the {time_budget * 1000:g} ms budget"
+        )
+
+
+class RuleSet:
+    """Immutable snapshot of enabled rules, ordered so the first match is the best one
+    
+    Literal branches of every rule are matched in one Aho-Corasick pass; regexes only
+    run for rules whose required literals occur, or that have no literal to look for.
+    Every regex search is timed per rule, and a rule whose search takes longer than
+    time_budget is skipped from then on and reported in over_budget for disabling.
+    """
+    
+    def __init__(self, rules, severity_scores, time_budget=None):
+        # Highest severity first; ties keep the older rule, as max() over id order did
+        self.rules = sorted(
+            (CompiledRule(rule) for rule in rules),
+            key=lambda rule: (-severity_scores.get(rule.severity, 0), rule.id)
+        )
+        
+        self.time_budget = time_budget  # Seconds one regex search may take
+        self.over_budget = {}  # rule id -> slowest search over the budget, not yet disabled
+        self._suspended = frozenset()  # Ranks of rules that went over the budget
+        
+        self._matcher = AhoCorasick()
+        unconditional = []  # Ranks of rules that must always be checked by regex
+        
+        for rank, rule in enumerate(self.rules):
+            branches = decompose_pattern(rule.pattern)
+            if any(kind == 'regex' for kind, _ in branches):
+                unconditional.append(rank)
+                continue
+            for kind, literal in branches:
+                # Literal branches confirm the rule; factors only make it a candidate
+                self._matcher.add(literal, (rank, kind == 'literal'))
+        
+        # Risky patterns stay out of the shared prefilter so their time is charged to them
+        gated = [rank for rank in unconditional if not nested_quantifier(self.rules[rank].pattern)]
+        self._combined = self._combine([self.rules[rank] for rank in gated])
+        if self._combined is None:
+            gated = []
+        self._gated = gated
+        self._ungated = [rank for rank in unconditional if rank not in set(gated)]
+    
+    def __len__(self):
+        return len(self.rules)
+    
+    def _combine(self, rules):
+        """Join regex-only rules into one alternation that rejects most texts in a single search"""
+        if not rules:
+            return None
+        try:
+            return re.compile('|'.join(f'(?:{rule.regex.pattern})' for rule in rules), re.IGNORECASE)
+        except re.error:
+            return None  # Inline flags, backreferences or duplicate group names don't combine
+    
+    def _scan(self, text):
+        """Get (confirmed ranks, ranks still needing their regex) for a text"""
+        confirmed, candidates = set(), set()
+        for rank, is_literal in self._matcher.search(text):
+            (confirmed if is_literal else candidates).add(rank)
+        
+        if self._gated and self._prefilter(text):
+            candidates.update(self._gated)
+        candidates.update(self._ungated)
+        
+        suspended = self._suspended
+        return confirmed - suspended, candidates - confirmed - suspended
+    
+    def _prefilter(self, text):
+        started = time.perf_counter()
+        found = self._combined.search(text)
+        
+        if self.time_budget and time.perf_counter() - started > self.time_budget:
+            # The slow rule can't be told apart inside the alternation; search them one by one
+            logger.warning("Combined rule prefilter exceeded the time budget; checking rules individually")
+            self._ungated = self._ungated + self._gated
+            self._gated = []
+            return True
+        
+        return found
+    
+    def _search(self, rank, text):
+        """Run one rule's regex, recording its time and suspending it if over budget"""
+        rule = self.rules[rank]
+        started = time.perf_counter()
+        found = rule.regex.search(text)
+        elapsed = time.perf_counter() - started
+        RULE_SEARCH_TIME.observe(elapsed, rule.id)
+        
+        if self.time_budget and elapsed > self.time_budget:
+            logger.warning("Rule %r took %.0f ms, over the %g ms budget; suspending it",
+                           rule.name, elapsed * 1000, self.time_budget * 1000)
+            self._suspended = self._suspended | {rank}
+            self.over_budget[rule.id] = max(elapsed, self.over_budget.get(rule.id, 0))
+        
+        return found is not None
+    
+    def take_over_budget(self):
+        """Get and clear {rule id: slowest search} for rules that exceeded the budget"""
+        slow, self.over_budget = self.over_budget, {}
+        return slow
+    
+    def match(self, text):
+        """Get the best matching rule for already-lowercased text, or None"""
+        confirmed, candidates = self._scan(text)
+        best = min(confirmed, default=len(self.rules))
+        
+        for rank in sorted(rank for rank in candidates if rank < best):
+            if self._search(rank, text):
+                best = rank
+                break
+        
+        if best == len(self.rules):
+            return None
+        
+        rule = self.rules[best]
+        RULE_HITS.inc(1, rule.id)
+        return rule
+    
+    def matches(self, text):
+        """Get every rule matching already-lowercased text, best first"""
+        confirmed, candidates = self._scan(text)
+        ranks = confirmed | {rank for rank in candidates if self._search(rank, text)}
+        
+        rules = [self.rules[rank] for rank in sorted(ranks)]
+        for rule in rules:
+            RULE_HITS.inc(1, rule.id)
+        return rules
@@ -0,0 +1,82 @@
+import hashlib
+import struct
+from services.alert_dedup import normalize_title
+
+
+NUM_PERM = 32
+SHINGLE_SIZE = 4
+SIGNATURE = struct.Struct(f'<{NUM_PERM}I')
+
+
+def shingles(text):
+    """Get the set of overlapping character n-grams of a normalized title"""
+    normalized = normalize_title(text)
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def title_signature(title):
+    """Compute the packed MinHash signature of an alert title"""
+    # One SHAKE digest per shingle supplies an independent 32-bit hash for every permutation,
+    # so the per-permutation minimum is taken in C rather than in a Python loop
+    hashes = (
+        SIGNATURE.unpack(hashlib.shake_128(shingle.encode('utf-8')).digest(SIGNATURE.size))
+        for shingle in shingles(title)
+    )
+    return SIGNATURE.pack(*map(min, zip(*hashes)))
+
+
+def estimate_similarity(first, second):
+    """Estimate the Jaccard similarity of two unpacked signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+def band_shape(threshold, recall=0.95):
+    """Pick (bands, rows) so pairs at the threshold collide in some band with the given probability"""
+    for rows in range(8, 1, -1):
+        bands = NUM_PERM // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return NUM_PERM, 1
+
+
+class SimilarityIndex:
+    """LSH banding index that clusters signatures around the first member of each group
+    
+    Each new signature is compared only with the group leaders it shares a band with, and
+    joins the first one whose estimated similarity reaches the threshold, so clustering a
+    window costs roughly one comparison per candidate group rather than one per alert pair.
+    """
+    
+    def __init__(self, threshold=0.6):
+        self.threshold = threshold
+        self.bands, self.rows = band_shape(threshold)
+        self._buckets = {}  # (band, band values) -> leader keys
+        self._leaders = {}  # leader key -> unpacked signature
+        self._groups = {}  # leader key -> member keys
+    
+    def add(self, key, signature):
+        """Add a packed signature to the most similar candidate group, or start a new one"""
+        values = SIGNATURE.unpack(signature)
+        band_keys = [(band, values[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+        
+        checked = set()
+        for band_key in band_keys:
+            for leader in self._buckets.get(band_key, ()):
+                if leader in checked:
+                    continue
+                checked.add(leader)
+                if estimate_similarity(values, self._leaders[leader]) >= self.threshold:
+                    self._groups[leader].append(key)
+                    return leader
+        
+        self._leaders[key] = values
+        self._groups[key] = [key]
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return key
+    
+    def groups(self):
+        """Get the clusters as lists of keys in insertion order"""
+        return list(self._groups.values())
@@ -138,20 +138,67 @@ async function sendChatMessage() {
     // Add user message to UI
     addChatMessage(message, 'user');
 
+    // Render the reply as the server streams it
+    const contentDiv = addChatMessage('⏳', 'bot');
+    let reply = '';
+
     try {
-        const response = await fetch(`${API_BASE}/api/chat/message`, {
+        const response = await fetch(`${API_BASE}/api/chat/message/stream`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ message })
         });
 
-        const data = await response.json();
+        if (!response.ok) {
+            const data = await response.json();
+            contentDiv.innerHTML = formatMessage(`❌ Error: ${data.error}`);
+            return;
+        }
 
-        // Add bot response to UI
-        addChatMessage(data.bot_response, 'bot');
+        await readEvents(response, (name, data) => {
+            if (name === 'chunk') {
+                reply += data.text;
+                contentDiv.innerHTML = formatMessage(reply);
+            } else if (name === 'done' && data.job_id) {
+                // Diagnostics run in the background; show their output as it arrives
+                followJob(data.job_id, addChatMessage('⏳ Waiting for output...', 'bot'));
+            } else if (name === 'error') {
+                addChatMessage(`❌ Error: ${data.error}`, 'bot');
+            }
+
+            const container = document.getElementById('chat-messages');
+            container.scrollTop = container.scrollHeight;
+        });
     } catch (error) {
         console.error('Error sending message:', error);
-        addChatMessage('❌ Error: Could not process message', 'bot');
+        contentDiv.innerHTML = formatMessage('❌ Error: Could not process message');
+    }
+}
+
+async function readEvents(response, onEvent) {
+    // Parse a text/event-stream body; EventSource can only make GET requests
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+
+            let name = 'message';
+            const data = [];
+            for (const line of block.split('\n')) {
+                if (line.startsWith('event:')) name = line.slice(6).trim();
+                else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+            }
+            if (data.length) onEvent(name, JSON.parse(data.join('\n')));
+        }
     }
 }
 
@@ -170,6 +217,40 @@ function addChatMessage(message, type) {
 
     // Scroll to bottom
     container.scrollTop = container.scrollHeight;
+
+    return contentDiv;
+}
+
+const JOB_POLL_INTERVAL = 1000;  // ms
+const JOB_ICONS = { succeeded: '✅', failed: '❌', timed_out: '⏱️' };
+
+async function followJob(jobId, contentDiv) {
+    try {
+        const response = await fetch(`${API_BASE}/api/chat/jobs/${jobId}`);
+        const job = await response.json();
+
+        if (!response.ok) {
+            contentDiv.innerHTML = formatMessage(`❌ ${job.error}`);
+            return;
+        }
+
+        if (!renderJob(job, contentDiv)) {
+            setTimeout(() => followJob(jobId, contentDiv), JOB_POLL_INTERVAL);
+        }
+    } catch (error) {
+        console.error('Error polling job:', error);
+    }
+}
+
+function renderJob(job, contentDiv) {
+    const finished = job.status !== 'queued' && job.status !== 'running';
+    const icon = finished ? (JOB_ICONS[job.status] || 'ℹ️') : '⏳';
+    let text = `${icon} **${job.command} ${job.target}** (job ${job.id}: ${job.status.replace('_', ' ')})`;
+    if (job.output) {
+        text += `\n\`\`\`\n${job.output}\n\`\`\``;
+    }
+    contentDiv.innerHTML = formatMessage(text);
+    return finished;
 }
 
 function formatMessage(message) {
@@ -0,0 +1,8 @@
+"""
+WSGI Entry Point
+Run with a multi-process server, e.g. gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+"""
+
+from main import create_app
+
+app = create_app()